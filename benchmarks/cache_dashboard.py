@@ -0,0 +1,95 @@
+"""Compara a latência das consultas do dashboard com o cache frio, quente no disco e quente na memória.
+
+A carga de trabalho é a de um usuário percorrendo o dashboard: temporadas,
+evolução e, para cada temporada, estatísticas e agregados. Cada fase roda
+num processo novo, como uma réplica recém-iniciada:
+
+  - frio: diretório de cache vazio, tudo vem do banco;
+  - disco: outro processo com o mesmo diretório (réplica reiniciada ou
+    vizinha), as respostas vêm dos arquivos Arrow;
+  - memória: segunda passada no mesmo processo da fase disco.
+
+Usa o banco de DATABASE_URL (ou o MySQL do .env), que já deve estar carregado,
+e um diretório de cache temporário.
+
+Uso:
+    python benchmarks/cache_dashboard.py --repeticoes 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+# %%
+
+def percorrer(dados):
+    tempos = []
+    def medir(funcao, *args):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+        return resultado
+    temporadas = medir(dados.temporadas)
+    medir(dados.evolucao_jogadores)
+    for temporada in temporadas:
+        medir(dados.estatisticas_temporada, temporada)
+        medir(dados.agregados_temporada, temporada)
+    return tempos
+
+def resumir(tempos):
+    tempos = sorted(tempos)
+    return {
+        'consultas': len(tempos),
+        'p50_ms': round(statistics.median(tempos), 3),
+        'p95_ms': round(tempos[max(0, int(len(tempos) * 0.95) - 1)], 3),
+        'total_ms': round(sum(tempos), 1)
+    }
+
+def executar_fase(fases):
+    """Roda as fases num processo só e imprime um JSON por fase (chamado pelo processo principal)."""
+    from dashboard import dados
+    for fase in fases:
+        tempos = percorrer(dados)
+        metricas = dados.metricas_cache()
+        print(json.dumps({'fase': fase, **resumir(tempos), 'acertos_memoria': metricas['acertos_memoria'],
+                          'acertos_disco': metricas['acertos_disco'], 'faltas': metricas['faltas'],
+                          'bytes_disco': metricas['bytes_disco']}))
+
+# %%
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=3, help="Rodadas completas (frio, disco, memória).")
+    parser.add_argument('--fases', nargs='+', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.fases:
+        executar_fase(args.fases)
+        sys.exit(0)
+
+    resultados = {}
+    for _ in range(args.repeticoes):
+        ambiente = {**os.environ, 'DASHBOARD_CACHE_DIR': tempfile.mkdtemp(), 'DASHBOARD_CACHE_DISCO': '1'}
+        for fases in (['frio'], ['disco', 'memoria']):
+            saida = subprocess.run(
+                [sys.executable, __file__, '--fases', *fases], env=ambiente, capture_output=True, text=True, check=True
+            ).stdout
+            for linha in saida.splitlines():
+                if linha.startswith('{'):
+                    medida = json.loads(linha)
+                    resultados.setdefault(medida['fase'], []).append(medida)
+
+    print(f"{'fase':<10}{'consultas':>10}{'p50 ms':>10}{'p95 ms':>10}{'total ms':>11}{'do banco':>10}")
+    for fase, medidas in resultados.items():
+        medida = sorted(medidas, key=lambda m: m['total_ms'])[len(medidas) // 2]
+        print(f"{fase:<10}{medida['consultas']:>10}{medida['p50_ms']:>10.3f}{medida['p95_ms']:>10.3f}{medida['total_ms']:>11.1f}{medida['faltas']:>10}")
+    print(f"Cache em disco: {resultados['frio'][0]['bytes_disco'] / 1024 ** 2:.2f} MB")
@@ -0,0 +1,77 @@
+"""Mede o tamanho do payload e o tempo de montagem do scatter do dashboard, antes e depois do nível de detalhe no servidor.
+
+"antes" é o px.scatter com todos os pontos, como o app fazia; "depois" é
+dispersao.grafico_dispersao no modo automático, com a faixa inteira e com
+uma faixa ampliada (zoom em ~10% de cada eixo). O payload é o JSON da figura
+que o Streamlit envia ao navegador; o tempo inclui montar e serializar a
+figura. O tempo de desenho no navegador acompanha o número de marcadores,
+que também é impresso.
+
+Os pontos são sintéticos (médias por jogo com distribuição gama), de uma
+temporada da liga ativa (~500) até a escala de game logs de várias temporadas.
+
+Uso:
+    python benchmarks/dispersao.py --pontos 500 5000 50000 500000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+from dashboard import dispersao
+
+LABELS = {'pontos_por_jogo': 'Pontos por Jogo', 'assistencias_por_jogo': 'Assistências por Jogo', 'jogos_jogados': 'Jogos'}
+
+# %%
+
+def gerar_pontos(n, semente=42):
+    rng = np.random.default_rng(semente)
+    return pd.DataFrame({
+        'pontos_por_jogo': rng.gamma(4, 3.5, n),
+        'assistencias_por_jogo': rng.gamma(2, 1.2, n),
+        'jogos_jogados': rng.integers(1, 83, n),
+        'nome_jogador': [f"Jogador Simulado {i}" for i in range(n)]
+    })
+
+def medir(montar, repeticoes=3):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = montar()
+        figura = resultado[0] if isinstance(resultado, tuple) else resultado
+        payload = figura.to_json()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    marcadores = resultado[1]['marcadores'] if isinstance(resultado, tuple) else sum(len(trace.x) for trace in figura.data)
+    return sorted(tempos)[len(tempos) // 2], len(payload), marcadores
+
+# %%
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pontos', type=int, nargs='+', default=[500, 5000, 50000, 500000])
+    args = parser.parse_args()
+
+    print(f"{'pontos':>8} {'caminho':<16}{'marcadores':>11}{'payload KB':>12}{'ms':>9}")
+    for n in args.pontos:
+        df = gerar_pontos(n)
+        faixa_x = tuple(df['pontos_por_jogo'].quantile([0.45, 0.55]))
+        faixa_y = tuple(df['assistencias_por_jogo'].quantile([0.45, 0.55]))
+        caminhos = {
+            'antes': lambda: px.scatter(df, x='pontos_por_jogo', y='assistencias_por_jogo', size='jogos_jogados',
+                                        hover_name='nome_jogador', labels=LABELS, height=820),
+            'depois': lambda: dispersao.grafico_dispersao(df, 'pontos_por_jogo', 'assistencias_por_jogo', 'jogos_jogados',
+                                                          'nome_jogador', '', LABELS),
+            'depois + zoom': lambda: dispersao.grafico_dispersao(df, 'pontos_por_jogo', 'assistencias_por_jogo', 'jogos_jogados',
+                                                                 'nome_jogador', '', LABELS, faixa_x=faixa_x, faixa_y=faixa_y),
+        }
+        for nome, montar in caminhos.items():
+            ms, payload, marcadores = medir(montar)
+            print(f"{n:>8} {nome:<16}{marcadores:>11}{payload / 1024:>12.1f}{ms:>9.1f}")
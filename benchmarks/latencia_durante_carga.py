@@ -0,0 +1,107 @@
+"""Mede a latência da consulta por temporada do dashboard enquanto uma carga roda.
+
+Compara os modos de carga 'substituir' (TRUNCATE + insert) e 'troca'
+(tabelas sombra + RENAME TABLE), contando também quantas consultas
+voltaram vazias durante a janela de carga.
+
+Uso:
+    python benchmarks/latencia_durante_carga.py --jogadores 2000
+    DATABASE_URL=mysql+pymysql://... python benchmarks/latencia_durante_carga.py
+"""
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+# %%
+
+def gerar_dados_transformados(quantidade):
+    from etl.endpoint_simulado import gerar_carreira_sintetica, obter_jogadores_simulados
+    from etl.transform import transformar_dados_evolucao_jogador
+
+    frames = []
+    for jogador in obter_jogadores_simulados(quantidade):
+        df = gerar_carreira_sintetica(jogador['id'])
+        df['PLAYER_NAME'] = jogador['full_name']
+        frames.append(df)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return transformar_dados_evolucao_jogador(pd.concat(frames, ignore_index=True))
+
+def medir_durante_carga(engine, carregar_para_mysql, consulta, df, modo, temporada, tamanho_lote):
+    latencias = []
+    vazias = 0
+    erros = {}
+    resultado = {}
+
+    def carga():
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado.update(carregar_para_mysql(df, engine_destino=engine, modo=modo, tamanho_lote=tamanho_lote, usar_infile=False))
+
+    thread = threading.Thread(target=carga)
+    thread.start()
+    while thread.is_alive():
+        inicio = time.perf_counter()
+        try:
+            with engine.connect() as conn:
+                linhas = conn.execute(consulta, {'temporada': temporada}).fetchall()
+        except Exception as e:
+            motivo = f"{type(e).__name__}: {str(e).splitlines()[0][:80]}"
+            erros[motivo] = erros.get(motivo, 0) + 1
+            continue
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        if not linhas:
+            vazias += 1
+    thread.join()
+
+    latencias.sort()
+    return {
+        'modo': modo,
+        'consultas': len(latencias),
+        'vazias': vazias,
+        'erros': erros,
+        'p50_ms': round(statistics.median(latencias), 2) if latencias else 0.0,
+        'p95_ms': round(latencias[int(len(latencias) * 0.95) - 1], 2) if latencias else 0.0,
+        'max_ms': round(latencias[-1], 2) if latencias else 0.0,
+        'segundos_carga': resultado.get('segundos')
+    }
+
+# %%
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jogadores', type=int, default=2000)
+    parser.add_argument('--tamanho-lote', type=int, default=500)
+    parser.add_argument('--rodadas', type=int, default=3)
+    args = parser.parse_args()
+
+    if 'DATABASE_URL' not in os.environ:
+        os.environ['DATABASE_URL'] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'benchmark.db'}"
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        from etl.load import carregar_para_mysql
+        from dashboard.db_setup import obter_engine
+        engine = obter_engine()
+        from dashboard.consultas import CONSULTA_ESTATISTICAS_TEMPORADA
+
+    df = gerar_dados_transformados(args.jogadores)
+    temporada = df['temporada'].max()
+    print(f"Banco: {engine.url.render_as_string(hide_password=True)} | {len(df)} linhas | temporada consultada {temporada}")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        carregar_para_mysql(df, engine_destino=engine, modo='substituir', usar_infile=False)
+
+    for rodada in range(args.rodadas):
+        for modo in ('substituir', 'troca'):
+            print(medir_durante_carga(engine, carregar_para_mysql, CONSULTA_ESTATISTICAS_TEMPORADA, df, modo, temporada, args.tamanho_lote))
@@ -0,0 +1,91 @@
+"""Compara o pico de memória (RSS) do pipeline materializado com o pipeline em streaming.
+
+Para cada quantidade de jogadores, roda em um processo separado:
+  * materializado: extrai todos os jogadores, concatena, transforma e
+    carrega o DataFrame inteiro (o fluxo de extract.py -> transform.py ->
+    load.py, sem os arquivos de staging);
+  * streaming: etl/streaming.py, lote a lote.
+O endpoint é o simulado (sem latência nem falhas) e o banco é um SQLite
+temporário, salvo se DATABASE_URL estiver definido. No modo materializado
+o pico cresce com o número de jogadores; no streaming fica praticamente
+constante.
+
+Uso:
+    python benchmarks/memoria_pipeline.py --jogadores 500 2000 5000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+# %%
+
+def _executar(modo, quantidade, jogadores_por_lote):
+    from etl.endpoint_simulado import criar_endpoint_simulado, obter_jogadores_simulados
+    from etl.extract import extrair_estatisticas_concorrente
+    from etl.transform import transformar_dados_evolucao_jogador
+    from etl.load import carregar_para_mysql
+    from etl.streaming import executar_pipeline_streaming
+
+    opcoes = {
+        'endpoint': criar_endpoint_simulado(latencia_min=0, latencia_max=0, taxa_falha=0),
+        'max_em_voo': 8,
+        'requisicoes_por_segundo': 1_000_000
+    }
+    jogadores = obter_jogadores_simulados(quantidade)
+    rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if modo == 'materializado':
+            df_bruto, _ = extrair_estatisticas_concorrente(jogadores, **opcoes)
+            carregar_para_mysql(transformar_dados_evolucao_jogador(df_bruto), modo='troca')
+        else:
+            executar_pipeline_streaming(jogadores, jogadores_por_lote, modo='troca', **opcoes)
+    return {
+        'modo': modo,
+        'jogadores': quantidade,
+        'segundos': round(time.perf_counter() - inicio, 2),
+        # ru_maxrss vem em KB no Linux; o pico antes do pipeline é descontado
+        'pico_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'acrescimo_rss_mb': round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_inicial) / 1024, 1)
+    }
+
+def _medir_em_subprocesso(modo, quantidade, jogadores_por_lote, database_url):
+    saida = subprocess.run(
+        [sys.executable, __file__, '--interno', modo, '--jogadores', str(quantidade), '--jogadores-por-lote', str(jogadores_por_lote)],
+        env={**os.environ, 'DATABASE_URL': database_url}, capture_output=True, text=True, check=True
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+# %%
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jogadores', type=int, nargs='+', default=[500, 2000, 5000])
+    parser.add_argument('--jogadores-por-lote', type=int, default=100)
+    parser.add_argument('--interno', choices=('materializado', 'streaming'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.interno:
+        resultado = _executar(args.interno, args.jogadores[0], args.jogadores_por_lote)
+        print(json.dumps(resultado))
+        sys.exit(0)
+
+    print(f"{'modo':<14}{'jogadores':>10}{'segundos':>10}{'pico RSS (MB)':>15}{'acréscimo (MB)':>16}")
+    for quantidade in args.jogadores:
+        for modo in ('materializado', 'streaming'):
+            with tempfile.TemporaryDirectory() as diretorio:
+                database_url = os.getenv('DATABASE_URL') or f"sqlite:///{Path(diretorio) / 'benchmark.db'}"
+                r = _medir_em_subprocesso(modo, quantidade, args.jogadores_por_lote, database_url)
+            print(f"{r['modo']:<14}{r['jogadores']:>10}{r['segundos']:>10}{r['pico_rss_mb']:>15}{r['acrescimo_rss_mb']:>16}")
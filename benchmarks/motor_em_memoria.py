@@ -0,0 +1,79 @@
+"""Compara o motor em memória (dashboard/analitico.py) com uma ida ao banco por interação.
+
+Para cada temporada simula a troca no selectbox do dashboard: estatísticas
+da temporada, top 10 em pontos por jogo e agregados. O caminho "banco"
+executa as consultas de consultas.py direto no banco, sem cache; o caminho
+"memória" responde a partir do snapshot indexado. Mede também a carga
+inicial do snapshot e a recarga depois de uma nova versão de carga.
+
+Usa o banco de DATABASE_URL (ou o MySQL do .env), que já deve estar carregado.
+O cache em disco é desligado para que a carga do snapshot venha do banco.
+
+Uso:
+    python benchmarks/motor_em_memoria.py --repeticoes 5
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+# %%
+
+def interacao_banco(engine, consultas, temporada):
+    with engine.connect() as conn:
+        df = pd.read_sql(consultas.CONSULTA_ESTATISTICAS_TEMPORADA, conn, params={'temporada': temporada})
+        conn.execute(consultas.CONSULTA_AGREGADOS_TEMPORADA, {'temporada': temporada}).mappings().first()
+    df['pontos_por_jogo'] = df['pontos'] / df['jogos_jogados']
+    return df.sort_values('pontos_por_jogo', ascending=False).head(10)
+
+def interacao_memoria(analitico, temporada):
+    analitico.estatisticas_temporada(temporada)
+    analitico.agregados_temporada(temporada)
+    return analitico.top_jogadores(temporada, 'pontos_por_jogo', 10)
+
+def medir(funcao, temporadas, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        for temporada in temporadas:
+            inicio = time.perf_counter()
+            funcao(temporada)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {'p50_ms': round(statistics.median(tempos), 3), 'p95_ms': round(tempos[int(len(tempos) * 0.95) - 1], 3), 'max_ms': round(tempos[-1], 3)}
+
+# %%
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticoes', type=int, default=5, help="Passadas por todas as temporadas.")
+    args = parser.parse_args()
+
+    os.environ['DASHBOARD_CACHE_DISCO'] = '0'
+    from dashboard import consultas, dados, analitico
+    from dashboard.db_setup import obter_engine
+    from etl.materializacao import registrar_versao_carga
+
+    engine = obter_engine()
+    inicio = time.perf_counter()
+    temporadas = analitico.temporadas()
+    print(f"Carga do snapshot: {(time.perf_counter() - inicio) * 1000:.1f} ms | {analitico.info_snapshot()}")
+
+    banco = medir(lambda t: interacao_banco(engine, consultas, t), temporadas, args.repeticoes)
+    memoria = medir(lambda t: interacao_memoria(analitico, t), temporadas, args.repeticoes)
+    print(f"troca de temporada, banco:   {banco}")
+    print(f"troca de temporada, memória: {memoria} ({banco['p50_ms'] / memoria['p50_ms']:.0f}x no p50)")
+
+    with engine.begin() as conn:
+        versao = registrar_versao_carga(conn, 'temporadas')
+    dados.versoes_carga(forcar=True)
+    inicio = time.perf_counter()
+    analitico.temporadas()
+    print(f"Recarga após a versão {versao}: {(time.perf_counter() - inicio) * 1000:.1f} ms | {analitico.info_snapshot()}")
@@ -0,0 +1,113 @@
+"""Mede a partida a frio do dashboard (tempo até a primeira pintura e até o fim do primeiro rerun) e o custo de cada rerun seguinte.
+
+Cada amostra roda num processo novo, como uma réplica recém-iniciada: o
+processo já tem o streamlit importado (como o servidor) e executa o app.py
+com o AppTest, sem navegador. "Primeira pintura" é o primeiro elemento
+enviado ao navegador; "primeiro rerun" é a execução inteira do script, com
+os imports, a conexão ao banco e as primeiras consultas. Depois, o mesmo
+processo repete o script 'reruns' vezes (cache e módulos já quentes), que é
+o custo pago a cada interação na página. Também lista quais módulos pesados
+já estavam importados no momento da primeira pintura.
+
+Cada amostra usa um diretório de cache vazio. Usa o banco de DATABASE_URL
+(ou o MySQL do .env), que já deve estar carregado. --app permite medir outra
+versão do app.py (por exemplo, de um git worktree) para comparar.
+
+Uso:
+    python benchmarks/partida_dashboard.py --amostras 5 --reruns 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+raiz = Path(__file__).resolve().parent.parent
+MODULOS_PESADOS = ('pandas', 'numpy', 'pyarrow', 'sqlalchemy', 'pymysql', 'plotly.express')
+
+# %%
+
+def executar_amostra(app, reruns):
+    """Roda no processo filho: mede o primeiro rerun e os seguintes e imprime um JSON."""
+    from streamlit.delta_generator import DeltaGenerator
+    from streamlit.testing.v1 import AppTest
+
+    marcas = []
+    modulos_na_pintura = None
+    enfileirar = DeltaGenerator._enqueue
+
+    def _enqueue(self, *args, **kwargs):
+        nonlocal modulos_na_pintura
+        if modulos_na_pintura is None:
+            modulos_na_pintura = [m for m in MODULOS_PESADOS if m in sys.modules]
+        marcas.append(time.perf_counter())
+        return enfileirar(self, *args, **kwargs)
+
+    DeltaGenerator._enqueue = _enqueue
+
+    # O fim do rerun é o último elemento enviado: o AppTest espera o script em
+    # passos de alguns milissegundos, o que somaria ruído a cada rerun.
+    inicio = time.perf_counter()
+    at = AppTest.from_file(str(app), default_timeout=300).run()
+    if at.exception or at.error:
+        raise RuntimeError(f"O app falhou: {(at.exception or at.error)[0].value}")
+    primeira_pintura, primeiro_rerun = marcas[0] - inicio, marcas[-1] - inicio
+
+    pinturas, tempos = [], []
+    for _ in range(reruns):
+        marcas.clear()
+        inicio = time.perf_counter()
+        at.run()
+        tempos.append((marcas[-1] - inicio) * 1000)
+        pinturas.append((marcas[0] - inicio) * 1000)
+    print(json.dumps({
+        'primeira_pintura_ms': round(primeira_pintura * 1000, 1),
+        'primeiro_rerun_ms': round(primeiro_rerun * 1000, 1),
+        'rerun_ms': tempos,
+        'pintura_rerun_ms': pinturas,
+        'modulos_na_pintura': modulos_na_pintura
+    }))
+
+def medir_amostra(app, reruns):
+    ambiente = {**os.environ, 'DASHBOARD_CACHE_DIR': tempfile.mkdtemp(prefix='nba-partida-')}
+    processo = subprocess.run(
+        [sys.executable, __file__, '--amostra', str(app), '--reruns', str(reruns)],
+        capture_output=True, text=True, env=ambiente, cwd=raiz
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(processo.stderr.strip().splitlines()[-1])
+    return json.loads(processo.stdout.strip().splitlines()[-1])
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[max(0, round(len(valores) * p) - 1)]
+
+# %%
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--app', type=Path, default=raiz / 'src' / 'dashboard' / 'app.py', help="app.py a medir.")
+    parser.add_argument('--amostras', type=int, default=5, help="Partidas a frio (um processo cada).")
+    parser.add_argument('--reruns', type=int, default=10, help="Reruns quentes medidos em cada processo.")
+    parser.add_argument('--amostra', type=Path, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.amostra:
+        executar_amostra(args.amostra, args.reruns)
+        sys.exit(0)
+
+    amostras = [medir_amostra(args.app.resolve(), args.reruns) for _ in range(args.amostras)]
+    pinturas = [a['primeira_pintura_ms'] for a in amostras]
+    primeiros = [a['primeiro_rerun_ms'] for a in amostras]
+    reruns = [t for a in amostras for t in a['rerun_ms']]
+    pinturas_rerun = [t for a in amostras for t in a['pintura_rerun_ms']]
+    print(f"app: {args.app}")
+    print(f"primeira pintura (frio):    p50 {statistics.median(pinturas):8.1f} ms | máx {max(pinturas):8.1f} ms")
+    print(f"primeiro rerun (frio):      p50 {statistics.median(primeiros):8.1f} ms | máx {max(primeiros):8.1f} ms")
+    print(f"rerun quente:               p50 {statistics.median(reruns):8.1f} ms | p95 {percentil(reruns, 0.95):8.1f} ms")
+    print(f"pintura num rerun quente:   p50 {statistics.median(pinturas_rerun):8.2f} ms")
+    print(f"módulos pesados já importados na primeira pintura: {', '.join(amostras[0]['modulos_na_pintura']) or 'nenhum'}")
@@ -0,0 +1,72 @@
+"""Mede o pool de conexões do db_setup sob sessões simultâneas do dashboard.
+
+Cada thread simula uma sessão do Streamlit repetindo a consulta da aba de
+temporada (CONSULTA_ESTATISTICAS_TEMPORADA). Ao fim são impressas a vazão,
+a latência por consulta e as métricas do pool (checkouts, conexões
+abertas, pico de uso e espera para obter conexão em db_setup.conectar()). Com mais threads do que
+DB_POOL_SIZE + DB_MAX_OVERFLOW a espera aparece em 'espera_maxima_ms'.
+
+Também mede o custo de importar o db_setup, que não abre conexão nenhuma
+até o primeiro uso do engine.
+
+Usa o banco de DATABASE_URL (ou o MySQL do .env), que já deve estar carregado.
+
+Uso:
+    DB_POOL_SIZE=5 DB_MAX_OVERFLOW=0 python benchmarks/pool_conexoes.py --threads 1 8 32 --consultas 50
+"""
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+# %%
+
+def sessao(db_setup, consulta, temporada, consultas):
+    tempos = []
+    for _ in range(consultas):
+        inicio = time.perf_counter()
+        with db_setup.conectar() as conn:
+            conn.execute(consulta, {'temporada': temporada}).fetchall()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+# %%
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--consultas', type=int, default=50, help="Consultas por thread.")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    from dashboard import db_setup
+    from dashboard.consultas import CONSULTA_TEMPORADAS, CONSULTA_ESTATISTICAS_TEMPORADA
+    print(f"import do db_setup: {(time.perf_counter() - inicio) * 1000:.1f} ms, engine criado: {db_setup._engine is not None}")
+
+    inicio = time.perf_counter()
+    engine = db_setup.obter_engine()
+    with engine.connect() as conn:
+        temporada = conn.execute(CONSULTA_TEMPORADAS).first()[0]
+    print(f"primeira conexão: {(time.perf_counter() - inicio) * 1000:.1f} ms | pool_size={db_setup.DB_POOL_SIZE} "
+          f"max_overflow={db_setup.DB_MAX_OVERFLOW} pre_ping={db_setup.DB_POOL_PRE_PING} | temporada {temporada}")
+
+    for threads in args.threads:
+        antes = db_setup.metricas_pool()
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            futuros = [executor.submit(sessao, db_setup, CONSULTA_ESTATISTICAS_TEMPORADA, temporada, args.consultas) for _ in range(threads)]
+            tempos = sorted(t for futuro in futuros for t in futuro.result())
+        segundos = time.perf_counter() - inicio
+        depois = db_setup.metricas_pool()
+        medidas = depois['conexoes_medidas'] - antes['conexoes_medidas']
+        espera = depois['espera_total_ms'] - antes['espera_total_ms']
+        print(f"{threads:>3} threads: {len(tempos) / segundos:8.1f} consultas/s | p50 {statistics.median(tempos):.2f} ms, "
+              f"p95 {tempos[int(len(tempos) * 0.95) - 1]:.2f} ms | conexões abertas {depois['conexoes_abertas']}, "
+              f"pico em uso {depois['pico_em_uso']}, espera média {espera / medidas if medidas else 0:.3f} ms")
+    print(db_setup.metricas_pool())
@@ -0,0 +1,279 @@
+"""Suíte de benchmarks do ETL e das consultas do dashboard sobre uma liga sintética, com histórico para comparar commits.
+
+Os dados vêm de endpoint_simulado.gerar_liga_sintetica (determinístico,
+com temporadas em mais de um time) na escala pedida: 1 é a liga ativa
+(~500 jogadores), 100 passa do tamanho da história inteira da NBA. Tudo
+roda num diretório temporário, com um banco SQLite próprio (ou o de
+--banco), então a suíte não toca no banco nem no staging do projeto.
+
+Benchmarks:
+  - etl.geracao: o gerador sintético;
+  - etl.extracao: extrair_estatisticas_concorrente contra o endpoint
+    simulado, sem latência nem falhas (custo do próprio extrator);
+  - etl.staging: gravação do staging bruto em Parquet;
+  - etl.transformacao: leitura do staging + transformar_dados_evolucao_jogador;
+  - etl.carga: carregar_para_mysql no modo 'troca', com as tabelas derivadas;
+  - app.<função>.<motor>: cada função de consulta do app.py, pelo motor
+    'banco' (dados.py com o cache descartado antes de cada chamada) e pelo
+    'memoria' (analitico.py, o padrão do dashboard); as funções por
+    temporada passam por todas as temporadas;
+  - app.snapshot.memoria: carga e indexação do snapshot do motor em memória;
+  - app.search_players.memoria: a busca por nome do busca.py (índice já
+    montado), com prefixos e nomes com erro de digitação;
+  - app.get_player_career.<motor>: a carreira de uma amostra de jogadores.
+
+Cada execução acrescenta um JSON em data/benchmarks/resultados.jsonl com o
+commit, a escala e os tempos (p50, p95, mínimo). --comparar confronta a
+execução com a última registrada de outro commit na mesma escala e banco
+(ou de um commit específico) e aponta as regressões acima da tolerância.
+
+Uso:
+    python benchmarks/suite.py --escala 1
+    python benchmarks/suite.py --escala 10 --grupos app --comparar
+    python benchmarks/suite.py --escala 10 --comparar a155e06 --falhar-em-regressao
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+raiz = Path(__file__).resolve().parent.parent
+src_dir = raiz / 'src'
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+ARQUIVO_RESULTADOS = raiz / 'data' / 'benchmarks' / 'resultados.jsonl'
+GRUPOS = ('etl', 'app')
+RUIDO_MS = 1.0 # Diferenças absolutas menores que isso não contam como regressão
+
+# Funções de consulta do app.py -> (função de dados.py/analitico.py, recebe temporada, argumentos extras, motores)
+CONSULTAS_APP = {
+    'get_player_evolution_data': ('evolucao_jogadores', False, (), ('banco',)),
+    'get_all_seasons_from_db': ('temporadas', False, (), ('banco', 'memoria')),
+    'get_seasonal_player_stats': ('estatisticas_temporada', True, (), ('banco', 'memoria')),
+    'get_season_aggregates': ('agregados_temporada', True, (), ('banco', 'memoria')),
+    'get_top_players': ('top_jogadores', True, ('pontos_por_jogo', 10), ('banco', 'memoria')),
+}
+
+# %%
+
+def resumir(tempos, **extras):
+    tempos = sorted(tempos)
+    return {
+        'p50_ms': round(statistics.median(tempos), 3),
+        'p95_ms': round(tempos[math.ceil(len(tempos) * 0.95) - 1], 3),
+        'min_ms': round(tempos[0], 3),
+        'amostras': len(tempos),
+        **extras
+    }
+
+def cronometrar(funcao, *args):
+    """Roda funcao(*args) sem a saída no terminal; retorna (resultado, milissegundos)."""
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado = funcao(*args)
+    return resultado, (time.perf_counter() - inicio) * 1000
+
+def benchmarks_etl(escala, repeticoes, diretorio, engine):
+    from etl.endpoint_simulado import criar_endpoint_simulado, gerar_liga_sintetica, obter_jogadores_simulados, JOGADORES_ATIVOS
+    from etl.extract import extrair_estatisticas_concorrente
+    from etl.staging import salvar_staging
+    from etl.transform import carregar_dados_brutos, transformar_dados_evolucao_jogador
+    from etl.load import carregar_para_mysql
+
+    jogadores = obter_jogadores_simulados(max(1, round(JOGADORES_ATIVOS * escala)))
+    caminho_bruto = diretorio / 'nba_stats_brutas'
+    tempos = {etapa: [] for etapa in ('geracao', 'extracao', 'staging', 'transformacao', 'carga')}
+    for _ in range(repeticoes):
+        bruto, ms = cronometrar(gerar_liga_sintetica, escala)
+        tempos['geracao'].append(ms)
+        endpoint = criar_endpoint_simulado(latencia_min=0, latencia_max=0, taxa_falha=0)
+        (extraido, _), ms = cronometrar(extrair_estatisticas_concorrente, jogadores, endpoint, 8, 1e9)
+        tempos['extracao'].append(ms)
+        _, ms = cronometrar(lambda: salvar_staging(extraido, caminho_bruto, formato='parquet', coluna_particao='SEASON_ID'))
+        tempos['staging'].append(ms)
+        transformado, ms = cronometrar(lambda: transformar_dados_evolucao_jogador(carregar_dados_brutos(caminho_bruto)))
+        tempos['transformacao'].append(ms)
+        carga, ms = cronometrar(lambda: carregar_para_mysql(transformado, engine_destino=engine, modo='troca', usar_infile=False))
+        if not carga:
+            raise RuntimeError("A carga do benchmark falhou; rode carregar_para_mysql no mesmo banco para ver o erro.")
+        tempos['carga'].append(ms)
+
+    linhas = {'geracao': len(bruto), 'extracao': len(extraido), 'staging': len(extraido), 'transformacao': len(transformado), 'carga': carga['linhas']}
+    return {f"etl.{etapa}": resumir(valores, linhas=linhas[etapa]) for etapa, valores in tempos.items()}
+
+def benchmarks_app(repeticoes):
+    from dashboard import dados, analitico, busca
+
+    dados.versoes_carga(forcar=True)
+    temporadas = list(dados.temporadas())
+    if not temporadas:
+        raise RuntimeError("Banco sem temporadas; rode o grupo 'etl' antes ou aponte --banco para um banco carregado.")
+    resultados = {}
+
+    tempos = []
+    for _ in range(repeticoes):
+        dados.invalidar_cache()
+        _, ms = cronometrar(analitico.temporadas)
+        tempos.append(ms)
+    resultados['app.snapshot.memoria'] = resumir(tempos, linhas=analitico.info_snapshot()['linhas'])
+
+    for funcao_app, (nome, por_temporada, extras, motores) in CONSULTAS_APP.items():
+        chamadas = [(temporada, *extras) for temporada in temporadas] if por_temporada else [extras]
+        for motor in motores:
+            funcao = getattr(dados if motor == 'banco' else analitico, nome)
+            if motor == 'memoria':
+                analitico.temporadas() # Snapshot já carregado, como no dashboard depois da primeira visita
+            tempos = []
+            for _ in range(repeticoes):
+                for args in chamadas:
+                    if motor == 'banco':
+                        dados.invalidar_cache()
+                    resultado, ms = cronometrar(funcao, *args)
+                    tempos.append(ms)
+            linhas = int(bool(resultado)) if isinstance(resultado, dict) else len(resultado)
+            resultados[f"app.{funcao_app}.{motor}"] = resumir(tempos, linhas=linhas)
+
+    # Busca e carreira: ~50 jogadores espalhados pela tabela, como quem digita o nome e abre a carreira.
+    jogadores = dados.jogadores()
+    amostra = jogadores.iloc[::max(1, len(jogadores) // 50)]
+    termos = [termo for nome in amostra['nome_jogador'] for termo in (nome[:3], nome[:8], nome[:6] + nome[7:])]
+    busca.buscar_jogadores(termos[0]) # Índice já montado, como depois da primeira busca
+    tempos = []
+    for _ in range(repeticoes):
+        for termo in termos:
+            resultado, ms = cronometrar(busca.buscar_jogadores, termo)
+            tempos.append(ms)
+    resultados['app.search_players.memoria'] = resumir(tempos, linhas=busca.info_indice()['jogadores'])
+
+    for motor in ('banco', 'memoria'):
+        funcao = getattr(dados if motor == 'banco' else analitico, 'carreira_jogador')
+        tempos, linhas = [], 0
+        for _ in range(repeticoes):
+            for id_jogador in amostra['id_jogador']:
+                if motor == 'banco':
+                    dados.invalidar_cache()
+                resultado, ms = cronometrar(funcao, id_jogador)
+                tempos.append(ms)
+                linhas = max(linhas, len(resultado))
+        resultados[f"app.get_player_career.{motor}"] = resumir(tempos, linhas=linhas)
+    return resultados
+
+# %%
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=raiz, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def ler_historico(arquivo):
+    if not Path(arquivo).exists():
+        return []
+    with open(arquivo, encoding='utf-8') as f:
+        return [json.loads(linha) for linha in f if linha.strip()]
+
+def escolher_base(historico, registro, referencia):
+    """Última execução comparável (mesma escala e banco): do commit 'referencia' ou, com 'anterior', de outro commit."""
+    if referencia == 'anterior':
+        alvo = None
+    else:
+        alvo = _git('rev-parse', '--short', referencia) or referencia
+    for anterior in reversed(historico):
+        if anterior['escala'] != registro['escala'] or anterior['banco'] != registro['banco']:
+            continue
+        if (alvo is None and anterior['commit'] != registro['commit']) or (alvo is not None and anterior['commit'] == alvo):
+            return anterior
+    return None
+
+def comparar(base, registro, tolerancia):
+    """Imprime a variação do p50 de cada benchmark em comum e retorna os nomes dos que regrediram."""
+    print(f"\nComparação com {base['commit']} ({base['data']}), tolerância {tolerancia:.0%}:")
+    print(f"{'benchmark':<48}{'base p50 ms':>14}{'atual p50 ms':>14}{'variação':>10}")
+    regressoes = []
+    for nome, atual in registro['resultados'].items():
+        anterior = base['resultados'].get(nome)
+        if anterior is None:
+            continue
+        variacao = atual['p50_ms'] / anterior['p50_ms'] - 1 if anterior['p50_ms'] else 0.0
+        regrediu = variacao > tolerancia and atual['p50_ms'] - anterior['p50_ms'] > RUIDO_MS
+        if regrediu:
+            regressoes.append(nome)
+        print(f"{nome:<48}{anterior['p50_ms']:>14.3f}{atual['p50_ms']:>14.3f}{variacao:>+10.1%}{'  REGRESSÃO' if regrediu else ''}")
+    return regressoes
+
+# %%
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--escala', type=float, default=1, help="Múltiplo da liga ativa (~500 jogadores), de 1 a 100.")
+    parser.add_argument('--repeticoes', type=int, default=3, help="Repetições de cada benchmark.")
+    parser.add_argument('--grupos', nargs='+', choices=GRUPOS, default=list(GRUPOS), help="Grupos a rodar (padrão: todos).")
+    parser.add_argument('--banco', default=None, help="URL de um banco de teste (padrão: SQLite temporário). Os dados dele são substituídos.")
+    parser.add_argument('--resultados', type=Path, default=ARQUIVO_RESULTADOS, help="Arquivo JSON lines com o histórico de execuções.")
+    parser.add_argument('--comparar', nargs='?', const='anterior', default=None,
+                        help="Compara com a última execução de outro commit ou, com um commit/ref, com a última daquele commit.")
+    parser.add_argument('--tolerancia', type=float, default=0.2, help="Aumento relativo do p50 que conta como regressão.")
+    parser.add_argument('--falhar-em-regressao', action='store_true', help="Sai com código 1 se houver regressão.")
+    args = parser.parse_args()
+
+    if args.escala <= 0:
+        parser.error("--escala deve ser positiva.")
+    if 'app' in args.grupos and 'etl' not in args.grupos and not args.banco:
+        parser.error("O grupo 'app' sozinho precisa de --banco com dados carregados (o padrão é um SQLite vazio).")
+
+    diretorio = Path(tempfile.mkdtemp(prefix='nba-bench-'))
+    os.environ['DATABASE_URL'] = args.banco or f"sqlite:///{diretorio / 'bench.db'}"
+    os.environ['DASHBOARD_CACHE_DIR'] = str(diretorio / 'cache')
+    os.environ['DASHBOARD_CACHE_DISCO'] = '0'
+    from dashboard.db_setup import obter_engine
+    engine = obter_engine()
+
+    registro = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git('rev-parse', '--short', 'HEAD'),
+        'alteracoes_locais': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'escala': args.escala,
+        'repeticoes': args.repeticoes,
+        'banco': engine.dialect.name,
+        'python': platform.python_version(),
+        'maquina': f"{platform.machine()} {os.cpu_count()} CPUs",
+        'resultados': {}
+    }
+    if 'etl' in args.grupos:
+        print(f"ETL na escala {args.escala}x...")
+        registro['resultados'].update(benchmarks_etl(args.escala, args.repeticoes, diretorio, engine))
+    if 'app' in args.grupos:
+        print("Consultas do dashboard...")
+        registro['resultados'].update(benchmarks_app(args.repeticoes))
+
+    print(f"\n{'benchmark':<48}{'p50 ms':>12}{'p95 ms':>12}{'linhas':>10}")
+    for nome, r in registro['resultados'].items():
+        print(f"{nome:<48}{r['p50_ms']:>12.3f}{r['p95_ms']:>12.3f}{r['linhas']:>10}")
+
+    historico = ler_historico(args.resultados)
+    args.resultados.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.resultados, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(registro, ensure_ascii=False) + '\n')
+    print(f"Resultados acrescentados a '{args.resultados}' (commit {registro['commit']}"
+          f"{', com alterações locais' if registro['alteracoes_locais'] else ''}).")
+
+    regressoes = []
+    if args.comparar:
+        base = escolher_base(historico, registro, args.comparar)
+        if base is None:
+            print(f"\nNenhuma execução anterior comparável ({args.comparar}, escala {args.escala}, banco {registro['banco']}).")
+        else:
+            regressoes = comparar(base, registro, args.tolerancia)
+            print(f"{len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}." if regressoes else "Nenhuma regressão.")
+    sys.exit(1 if regressoes and args.falhar_em_regressao else 0)
@@ -0,0 +1,88 @@
+"""Compara a transformação original (CSV + cópias + sort) com a atual (Parquet tipado + groupby).
+
+Gera um conjunto bruto sintético em escala configurável (padrão: 10x a
+liga ativa, ~5.000 jogadores), grava em CSV e em Parquet e mede, para cada
+caminho, leitura + transformação: tempo, pico de memória (tracemalloc) e
+memória do resultado. Também confere que os dois caminhos produzem as
+mesmas linhas.
+
+Uso:
+    python benchmarks/transformacao.py --escala 10
+"""
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import pandas as pd
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+from etl.endpoint_simulado import gerar_liga_sintetica
+from etl.staging import salvar_staging
+from etl.transform import carregar_dados_brutos, transformar_dados_evolucao_jogador, COLUNAS_ORIGINAIS, NOVOS_NOMES
+
+# %%
+
+def transformacao_original(df_bruto):
+    """Cópia do algoritmo anterior, mantida só como referência de desempenho."""
+    colunas_presentes = [col for col in COLUNAS_ORIGINAIS if col in df_bruto.columns]
+    df_transformado = df_bruto[colunas_presentes].copy()
+    df_transformado.rename(columns=NOVOS_NOMES, inplace=True)
+    for col in ['jogos_jogados', 'pontos', 'assistencias', 'rebotes', 'perc_arremessos_quadra', 'perc_arremessos_3pts', 'perc_lances_livres']:
+        df_transformado[col] = pd.to_numeric(df_transformado[col], errors='coerce')
+    df_transformado['id_time'] = pd.to_numeric(df_transformado['id_time'], errors='coerce')
+    df_transformado.dropna(subset=['id_jogador', 'temporada'], inplace=True)
+    df_transformado.sort_values(by=['id_jogador', 'temporada', 'id_time'], ascending=[True, True, True], inplace=True)
+    df_transformado.drop_duplicates(subset=['id_jogador', 'temporada'], keep='first', inplace=True)
+    df_transformado.info(buf=io.StringIO())
+    return df_transformado
+
+def medir(funcao):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        resultado = funcao()
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, {
+        'segundos': round(segundos, 3),
+        'pico_memoria_mb': round(pico / 1024 ** 2, 1),
+        'memoria_resultado_mb': round(float(resultado.memory_usage(deep=True).sum()) / 1024 ** 2, 1)
+    }
+
+# %%
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--escala', type=int, default=10, help="Múltiplo da liga ativa (~500 jogadores).")
+    args = parser.parse_args()
+
+    bruto = gerar_liga_sintetica(args.escala)
+    diretorio = Path(tempfile.mkdtemp())
+    caminho_csv = diretorio / 'bruto.csv'
+    bruto.to_csv(caminho_csv, index=False)
+    salvar_staging(bruto, diretorio / 'bruto', formato='parquet', coluna_particao='SEASON_ID')
+    print(f"Escala {args.escala}x: {len(bruto)} linhas brutas, {bruto.shape[1]} colunas")
+    del bruto
+
+    original, metricas_original = medir(lambda: transformacao_original(pd.read_csv(caminho_csv)))
+    atual, metricas_atual = medir(lambda: transformar_dados_evolucao_jogador(carregar_dados_brutos(diretorio / 'bruto')))
+
+    print(f"original (CSV + sort):       {metricas_original}")
+    print(f"atual (Parquet + groupby):   {metricas_atual}")
+    print(f"redução de tempo: {metricas_original['segundos'] / metricas_atual['segundos']:.1f}x | "
+          f"redução do pico de memória: {metricas_original['pico_memoria_mb'] / metricas_atual['pico_memoria_mb']:.1f}x")
+
+    chaves = ['id_jogador', 'temporada', 'id_time']
+    iguais = original[chaves].astype(str).reset_index(drop=True).equals(
+        atual.sort_values(chaves[:2])[chaves].astype(str).reset_index(drop=True)
+    )
+    print(f"mesmas linhas nos dois caminhos: {iguais}")
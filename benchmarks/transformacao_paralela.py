@@ -0,0 +1,61 @@
+"""Mede como a transformação escala com o número de processos (transform.py --workers).
+
+Gera um staging bruto sintético particionado por SEASON_ID (padrão: 20x a
+liga ativa, ~10.000 jogadores) e roda transformar_em_paralelo com 1, 2, 4
+e 8 processos, comparando com a transformação sequencial e conferindo que
+todos produzem exatamente o mesmo DataFrame. O ganho real depende de
+quantos núcleos a máquina tem (os.cpu_count() é impresso no início) e
+do tamanho da entrada: com poucas linhas o custo de subir os processos
+domina.
+
+Uso:
+    python benchmarks/transformacao_paralela.py --escala 20 --workers 1 2 4 8
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+from transformacao import gerar_bruto
+from etl.staging import salvar_staging
+from etl.transform import carregar_dados_brutos, transformar_dados_evolucao_jogador, transformar_em_paralelo
+
+# %%
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--escala', type=int, default=20, help="Múltiplo da liga ativa (~500 jogadores).")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--repeticoes', type=int, default=3, help="Execuções por configuração; vale a mediana.")
+    args = parser.parse_args()
+
+    diretorio = Path(tempfile.mkdtemp())
+    bruto = gerar_bruto(args.escala)
+    caminho = diretorio / 'bruto'
+    salvar_staging(bruto, caminho, formato='parquet', coluna_particao='SEASON_ID')
+    print(f"Escala {args.escala}x: {len(bruto)} linhas brutas, {bruto['SEASON_ID'].nunique()} temporadas, {os.cpu_count()} CPUs")
+    del bruto
+
+    def mediana(funcao):
+        tempos = []
+        for _ in range(args.repeticoes):
+            inicio = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                resultado = funcao()
+            tempos.append(time.perf_counter() - inicio)
+        return sorted(tempos)[len(tempos) // 2], resultado
+
+    base, referencia = mediana(lambda: transformar_dados_evolucao_jogador(carregar_dados_brutos(caminho)))
+    print(f"{'configuração':<16}{'segundos':>10}{'speedup':>10}{'idêntico':>10}")
+    print(f"{'sequencial':<16}{base:>10.3f}{1.0:>10.2f}{'-':>10}")
+    for workers in args.workers:
+        segundos, resultado = mediana(lambda: transformar_em_paralelo(caminho, workers))
+        print(f"{f'{workers} processos':<16}{segundos:>10.3f}{base / segundos:>10.2f}{str(resultado.equals(referencia)):>10}")
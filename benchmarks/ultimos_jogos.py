@@ -0,0 +1,87 @@
+"""Mede a consulta "últimos N jogos do jogador X" sobre o game log carregado por etl/jogos.py.
+
+Gera o game log sintético de várias temporadas (padrão: 16 temporadas da
+liga simulada de 500 jogadores), carrega em 'estatisticas_jogo' e mede a
+latência de CONSULTA_ULTIMOS_JOGOS para jogadores sorteados. Para comparação,
+a mesma consulta roda numa cópia da tabela sem chave nem índice, que é o
+que se teria com o game log carregado "como veio".
+
+Usa um SQLite temporário, salvo se DATABASE_URL estiver definido.
+
+Uso:
+    python benchmarks/ultimos_jogos.py --temporadas 16 --consultas 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+# %%
+
+def medir(conn, consulta, ids, limite):
+    tempos = []
+    for id_jogador in ids:
+        inicio = time.perf_counter()
+        conn.execute(consulta, {'id_jogador': id_jogador, 'limite': limite}).fetchall()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        'p50_ms': round(statistics.median(tempos), 3),
+        'p95_ms': round(tempos[int(len(tempos) * 0.95) - 1], 3),
+        'max_ms': round(tempos[-1], 3)
+    }
+
+# %%
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--temporadas', type=int, default=16, help="Temporadas até 2024-25.")
+    parser.add_argument('--consultas', type=int, default=500)
+    parser.add_argument('--limite', type=int, default=10)
+    args = parser.parse_args()
+
+    if not os.getenv('DATABASE_URL'):
+        os.environ['DATABASE_URL'] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'benchmark.db'}"
+
+    from dashboard.db_setup import obter_engine, EstatisticaJogo
+    from dashboard.consultas import CONSULTA_ULTIMOS_JOGOS
+    from etl.endpoint_simulado import gerar_jogos_sinteticos, obter_jogadores_simulados
+    from etl.jogos import transformar_jogos, carregar_jogos
+
+    engine = obter_engine()
+    jogadores = obter_jogadores_simulados()
+    inicio = time.perf_counter()
+    linhas = 0
+    for ano in range(2025 - args.temporadas, 2025):
+        temporada = f"{ano}-{(ano + 1) % 100:02d}"
+        linhas += carregar_jogos(transformar_jogos(gerar_jogos_sinteticos(temporada, jogadores)), engine)
+    print(f"{linhas} jogos de {args.temporadas} temporadas carregados em {time.perf_counter() - inicio:.1f}s")
+
+    tabela = EstatisticaJogo.__tablename__
+    copia = f"{tabela}_sem_indice"
+    consulta_copia = text(CONSULTA_ULTIMOS_JOGOS.text.replace(f"FROM\n    {tabela} ej", f"FROM\n    {copia} ej"))
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE IF EXISTS {copia}"))
+        conn.execute(text(f"CREATE TABLE {copia} AS SELECT * FROM {tabela}"))
+
+    with engine.connect() as conn:
+        ids = [linha[0] for linha in conn.execute(text(f"SELECT DISTINCT id_jogador FROM {tabela}"))]
+        sorteados = [random.Random(42).choice(ids) for _ in range(args.consultas)]
+        com_indice = medir(conn, CONSULTA_ULTIMOS_JOGOS, sorteados, args.limite)
+        sem_indice = medir(conn, consulta_copia, sorteados[:max(1, args.consultas // 10)], args.limite)
+
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP TABLE {copia}"))
+
+    print(f"últimos {args.limite} jogos, chave (id_jogador, data_jogo, id_jogo): {com_indice}")
+    print(f"últimos {args.limite} jogos, tabela sem chave nem índice:       {sem_indice}")
@@ -0,0 +1,128 @@
+from pathlib import Path
+import sys
+import threading
+import time
+import pandas as pd
+
+# %%
+
+script_dir = Path(__file__).resolve().parent
+src_dir = script_dir.parent
+
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+from dashboard import dados
+from dashboard.ranking import indexar, top_n
+
+# %%
+# Motor analítico em memória do dashboard. Em vez de uma consulta ao banco por
+# temporada escolhida, o dashboard carrega uma vez o snapshot colunar de
+# 'estatisticas_temporada' (dados.snapshot_estatisticas, ordenado por
+# temporada) e responde localmente o filtro de temporada (uma fatia contígua
+# do snapshot), o top-N (ordens pré-calculadas por temporada e métrica, ver
+# ranking.py), os agregados e a carreira de um jogador (as posições de cada
+# jogador no snapshot, já em ordem de temporada).
+#
+# O snapshot vem do cache de dados.py, então é compartilhado entre sessões e
+# réplicas e some quando o ETL publica uma nova versão de 'temporadas'. Aqui
+# só se guarda o índice montado sobre ele: quando dados devolve um snapshot
+# diferente do indexado, o índice é refeito e trocado de uma vez, e as
+# sessões em andamento continuam com o anterior até a próxima chamada.
+
+METRICAS_POR_JOGO = ('pontos_por_jogo', 'assistencias_por_jogo', 'rebotes_por_jogo')
+
+_trava = threading.Lock()
+_indice = {'snapshot': None, 'fatias': {}, 'temporadas': (), 'agregados': {}, 'rankings': {}, 'carreiras': {}, 'versao': None, 'segundos_indexacao': 0.0, 'recargas': 0}
+
+# %%
+
+def _indexar(snapshot):
+    inicio = time.perf_counter()
+    # O snapshot vem ordenado por temporada, então cada temporada é um intervalo contíguo de posições.
+    posicoes = snapshot.groupby('temporada', observed=True, sort=False).indices
+    fatias = {str(temporada): (int(p[0]), int(p[-1]) + 1) for temporada, p in posicoes.items()}
+
+    por_temporada = snapshot.groupby('temporada', observed=True)
+    quadrados = snapshot[list(METRICAS_POR_JOGO)].pow(2).groupby(snapshot['temporada'], observed=True).sum()
+    somas = por_temporada[list(METRICAS_POR_JOGO)].sum()
+    contagens = por_temporada.size()
+    jogadores = por_temporada['id_jogador'].nunique()
+    agregados = {}
+    for temporada in somas.index:
+        linha = {'temporada': str(temporada), 'total_linhas': int(contagens[temporada]), 'total_jogadores': int(jogadores[temporada])}
+        for metrica in METRICAS_POR_JOGO:
+            linha[f"soma_{metrica}"] = float(somas.at[temporada, metrica])
+            linha[f"soma_quadrados_{metrica}"] = float(quadrados.at[temporada, metrica])
+        agregados[str(temporada)] = linha
+
+    return {
+        'snapshot': snapshot,
+        'fatias': fatias,
+        'temporadas': tuple(sorted(fatias, reverse=True)),
+        'agregados': agregados,
+        'rankings': indexar(snapshot, fatias),
+        # Ordenado por (temporada, id_jogador): as posições de cada jogador já saem em ordem cronológica.
+        'carreiras': {int(id_jogador): p for id_jogador, p in snapshot.groupby('id_jogador', observed=True, sort=False).indices.items()},
+        'versao': dados.versoes_carga().get('temporadas', 0),
+        'segundos_indexacao': round(time.perf_counter() - inicio, 4),
+        'recargas': _indice['recargas'] + 1
+    }
+
+def _atual():
+    global _indice
+    snapshot = dados.snapshot_estatisticas()
+    indice = _indice
+    if snapshot is indice['snapshot']:
+        return indice
+    with _trava:
+        if snapshot is not _indice['snapshot']:
+            _indice = _indexar(snapshot)
+        return _indice
+
+# %%
+
+def temporadas():
+    """Temporadas presentes no snapshot, da mais recente para a mais antiga."""
+    return _atual()['temporadas']
+
+def estatisticas_temporada(temporada):
+    """Linhas da temporada, com as mesmas colunas de dados.estatisticas_temporada; é uma fatia do snapshot, não a altere."""
+    indice = _atual()
+    inicio, fim = indice['fatias'].get(temporada, (0, 0))
+    return indice['snapshot'].iloc[inicio:fim]
+
+def top_jogadores(temporada, metrica, n):
+    """Os n jogadores com maior 'metrica' na temporada.
+
+    Para as métricas de ranking.METRICAS_RANKING só lê as n primeiras
+    posições da ordem pré-calculada; outras colunas caem em nlargest.
+    """
+    indice = _atual()
+    ordem = indice['rankings'].get((temporada, metrica))
+    if ordem is None:
+        return top_n(estatisticas_temporada(temporada), metrica, n)
+    return indice['snapshot'].iloc[ordem[:n]]
+
+def carreira_jogador(id_jogador):
+    """Temporadas do jogador em ordem cronológica, com as colunas de dados.carreira_jogador; é uma cópia do snapshot."""
+    indice = _atual()
+    posicoes = indice['carreiras'].get(int(id_jogador), [])
+    return indice['snapshot'].iloc[posicoes]
+
+def agregados_temporada(temporada):
+    """Contagem, soma e soma dos quadrados das médias por jogo, no formato de 'agregados_temporada' (sem os top-N)."""
+    return dict(_atual()['agregados'].get(temporada, {}))
+
+def info_snapshot():
+    """Linhas, temporadas, memória, versão de carga e custo da última indexação do snapshot em uso."""
+    indice = _atual()
+    snapshot = indice['snapshot']
+    return {
+        'linhas': len(snapshot),
+        'temporadas': len(indice['temporadas']),
+        'memoria_mb': round(float(snapshot.memory_usage(deep=True).sum()) / 1024 ** 2, 2),
+        'versao': indice['versao'],
+        'segundos_indexacao': indice['segundos_indexacao'],
+        'recargas': indice['recargas']
+    }
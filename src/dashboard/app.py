@@ -1,12 +1,16 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 from pathlib import Path 
 from dotenv import load_dotenv 
+import math
 import os 
 import sys 
 
 # %%
+# Partida rápida: pandas, plotly, SQLAlchemy e os módulos de dados só são
+# importados depois que o título já foi enviado ao navegador, e o banco só é
+# conectado na primeira consulta (db_setup.obter_engine). O que não muda entre
+# reruns (.env, CSS, figuras de uma mesma versão de carga) fica em
+# st.cache_resource, compartilhado por todas as sessões.
 
 script_dir = Path(__file__).resolve().parent 
 src_dir = script_dir.parent                
@@ -16,345 +20,374 @@ if str(src_dir) not in sys.path:
     sys.path.insert(0, str(src_dir))
 
 dotenv_path = project_root_dir / '.env'
-load_dotenv(dotenv_path)
 
-DB_HOST = os.getenv('DB_HOST')
-DB_NAME = os.getenv('DB_NAME')
-DB_USER = os.getenv('DB_USER')
-DB_PASSWORD = os.getenv('DB_PASSWORD')
+@st.cache_resource
+def carregar_ambiente():
+    # O .env é lido uma vez por processo, não a cada rerun; mudanças nele pedem reiniciar o app.
+    # Sem as variáveis a função levanta em vez de retornar False: exceções não ficam no
+    # st.cache_resource, então o próximo rerun lê o .env de novo depois de corrigido.
+    load_dotenv(dotenv_path)
+    DB_HOST = os.getenv('DB_HOST')
+    DB_NAME = os.getenv('DB_NAME')
+    DB_USER = os.getenv('DB_USER')
+    DB_PASSWORD = os.getenv('DB_PASSWORD')
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    if not (DATABASE_URL or all([DB_HOST, DB_NAME, DB_USER, DB_PASSWORD])):
+        raise RuntimeError("Variáveis de ambiente do banco de dados não carregadas.")
+    return True
+
+@st.cache_resource
+def carregar_estilo():
+    return f"<style>\n{(script_dir / 'estilo.css').read_text(encoding='utf-8')}</style>"
 
-if not all([DB_HOST, DB_NAME, DB_USER, DB_PASSWORD]):
-    st.error("Erro: Variáveis de ambiente do banco de dados não carregadas. Verifique o arquivo .env e o caminho.")
-    st.stop() 
-
-from dashboard.db_setup import engine, SessionLocal, Jogador, EstatisticaTemporada
+st.set_page_config(layout="wide", page_title="Dashboard - NBA")
 
-# %%
+try:
+    carregar_ambiente()
+except RuntimeError:
+    st.error("Erro: Variáveis de ambiente do banco de dados não carregadas. Verifique o arquivo .env e o caminho.")
+    st.stop()
 
+st.markdown(carregar_estilo(), unsafe_allow_html=True)
 st.markdown("""
-<style>
-    /* Titulo e subtitulo */
-    .title-container {
-        background-color: #2a3a52; 
-        padding: 30px 0;
-        border-radius: 10px;
-        text-align: center;
-        color: white;
-        margin-bottom: 30px;
-        box-shadow: 0px 4px 10px rgba(0, 0, 0, 0.2);
-    }
-    .title-container h1 {
-        color: white !important;
-        font-size: 3.5em;
-        margin-bottom: 10px;
-        text-shadow: 2px 2px 4px rgba(0, 0, 0, 0.3);
-        text-align: center !important;
-    }
-    .title-container p {
-        color: #e0e0e0 !important;
-        font-size: 1.2em;
-        text-align: center !important;
-    }
-
-    /* Tabela (st.dataframe) */
-    div[data-testid="stDataFrame"] {
-        border: 2px solid #2a3a52;
-        border-radius: 8px;
-        overflow: hidden;
-        box-shadow: 0px 2px 8px rgba(0, 0, 0, 0.1);
-    }
-    div[data-testid="stDataFrame"] .st-ag-header {
-        background-color: #2a3a52;
-        color: white;
-        font-weight: bold;
-    }
-    div[data-testid="stDataFrame"] .st-ag-column-headers,
-    div[data-testid="stDataFrame"] .st-ag-table-body {
-        border-bottom: 1px solid #4b6a8e !important;
-        border-right: 1px solid #4b6a8e !important;
-    }
-    div[data-testid="stDataFrame"] .st-ag-cell,
-    div[data-testid="stDataFrame"] .st-ag-header-cell {
-        border-right: 1px solid #4b6a8e !important;
-        border-bottom: 1px solid #4b6a8e !important;
-    }
-
-    div[data-testid="stDataFrame"] .st-ag-row:hover {
-        background-color: #e6f7ff;
-    }
-    div[data-testid="stDataFrame"] .st-ag-row-selected {
-        background-color: #cceeff;
-    }
-
-    h1, h2, h3, h4, h5, h6 {
-        color: #2a3a52;
-    }
-
-</style>
+<div class="title-container">
+    <h1>Análise de Desempenho de Jogadores da NBA 🏀</h1>
+    <p>Este é um dashboard de análise de dados da NBA. Objetivo: explorar a evolução de jogadores e estatísticas por temporada.</p>
+</div>
 """, unsafe_allow_html=True)
 
+from dashboard import diagnostico
+
 # %%
 
-@st.cache_data
+@diagnostico.medido
 def get_player_evolution_data():
-    session = SessionLocal()
     try:
-        query = """
-        WITH EstatisticasComTemporadaAnterior AS (
-            SELECT
-                et.id_jogador,
-                j.nome_jogador,
-                et.temporada,
-                et.pontos,
-                et.assistencias,
-                et.rebotes,
-                et.jogos_jogados,
-                LAG(et.pontos, 1, 0) OVER (PARTITION BY et.id_jogador ORDER BY et.temporada ASC) AS pontos_anterior,
-                LAG(et.assistencias, 1, 0) OVER (PARTITION BY et.id_jogador ORDER BY et.temporada ASC) AS assistencias_anterior,
-                LAG(et.rebotes, 1, 0) OVER (PARTITION BY et.id_jogador ORDER BY et.temporada ASC) AS rebotes_anterior,
-                LAG(et.jogos_jogados, 1, 0) OVER (PARTITION BY et.id_jogador ORDER BY et.temporada ASC) AS jogos_jogados_anterior
-            FROM
-                estatisticas_temporada et
-            JOIN
-                jogadores j ON et.id_jogador = j.id_jogador
-        ),
-        EvolucaoDesempenho AS (
-            SELECT
-                id_jogador,
-                nome_jogador,
-                temporada,
-                pontos,
-                assistencias,
-                rebotes,
-                jogos_jogados,
-                jogos_jogados_anterior,
-                pontos_anterior,
-                assistencias_anterior,
-                rebotes_anterior,
-                (pontos - pontos_anterior) AS diferenca_pontos,
-                (assistencias - assistencias_anterior) AS diferenca_assistencias,
-                (rebotes - rebotes_anterior) AS diferenca_rebotes
-            FROM
-                EstatisticasComTemporadaAnterior
-            WHERE
-                jogos_jogados >= 50
-                AND jogos_jogados_anterior >= 50
-        )
-        SELECT
-            id_jogador,
-            nome_jogador,
-            temporada AS temporada_atual,
-            jogos_jogados AS jogos_jogados_atual,
-            jogos_jogados_anterior,
-            pontos AS pontos_atual,
-            pontos_anterior,
-            diferenca_pontos,
-            assistencias AS assistencias_atual,
-            assistencias_anterior,
-            diferenca_assistencias,
-            rebotes AS rebotes_atual,
-            rebotes_anterior,
-            diferenca_rebotes
-        FROM
-            EvolucaoDesempenho
-        WHERE
-            diferenca_pontos > 0 OR diferenca_assistencias > 0 OR diferenca_rebotes > 0
-        ORDER BY
-            diferenca_pontos DESC, diferenca_assistencias DESC, diferenca_rebotes DESC
-        LIMIT 20;
-        """
-        df = pd.read_sql(query, engine)
-        return df
+        return dados.evolucao_jogadores()
     except Exception as e:
+        diagnostico.registrar_erro(e)
         st.error(f"Erro ao buscar dados de evolução de jogadores: {e}")
         return pd.DataFrame()
-    finally:
-        session.close()
 
 # %%
 
-@st.cache_data
+@diagnostico.medido
 def get_all_seasons_from_db():
-    session = SessionLocal()
     try:
-        seasons = session.query(EstatisticaTemporada.temporada).distinct().order_by(EstatisticaTemporada.temporada.desc()).all()
-        return [s[0] for s in seasons]
+        return list(fonte_temporadas.temporadas())
     except Exception as e:
+        diagnostico.registrar_erro(e)
         st.error(f"Erro ao buscar temporadas: {e}")
         return []
-    finally:
-        session.close()
 
 # %%
 
-@st.cache_data
+@diagnostico.medido
 def get_seasonal_player_stats(season):
-    session = SessionLocal()
     try:
-        query = f"""
-        SELECT
-            j.id_jogador,
-            j.nome_jogador,
-            et.temporada,
-            et.jogos_jogados,
-            et.pontos,
-            et.assistencias,
-            et.rebotes
-        FROM
-            estatisticas_temporada et
-        JOIN
-            jogadores j ON et.id_jogador = j.id_jogador
-        WHERE
-            et.temporada = '{season}'
-            AND et.jogos_jogados > 0
-        """
-        df = pd.read_sql(query, engine)
-
-        df['pontos_por_jogo'] = df['pontos'] / df['jogos_jogados']
-        df['assistencias_por_jogo'] = df['assistencias'] / df['jogos_jogados']
-        df['rebotes_por_jogo'] = df['rebotes'] / df['jogos_jogados']
-
-        return df
+        return fonte_temporadas.estatisticas_temporada(season)
     except Exception as e:
+        diagnostico.registrar_erro(e)
         st.error(f"Erro ao buscar estatísticas da temporada {season}: {e}")
         return pd.DataFrame()
-    finally:
-        session.close()
-        
+
 # %%
 
-st.set_page_config(layout="wide", page_title="Dashboard - NBA")
-st.markdown("""
-<div class="title-container">
-    <h1>Análise de Desempenho de Jogadores da NBA 🏀</h1>
-    <p>Este é um dashboard de análise de dados da NBA. Objetivo: explorar a evolução de jogadores e estatísticas por temporada.</p>
-</div>
-""", unsafe_allow_html=True)
+@diagnostico.medido
+def get_season_aggregates(season):
+    try:
+        return fonte_temporadas.agregados_temporada(season)
+    except Exception as e:
+        diagnostico.registrar_erro(e)
+        st.error(f"Erro ao buscar estatísticas agregadas da temporada {season}: {e}")
+        return {}
 
-st.header("Evolução de Desempenho de Jogadores entre Temporadas")
-st.markdown("Essa tabela mostra quais jogadores tiveram maior crescimento em suas estatísticas individuais (pontos, assistências e rebotes) de uma temporada para outra, destacando quem mais evoluiu em desempenho. Para cada jogador, são apresentados os dados da temporada anterior, da temporada atual em que a evolução ocorreu, e a diferença calculada dessas métricas (pontos, assistências e rebotes). Ajuda a identificar o momento de ascensão de jogadores e o impacto positivo que podem ter gerado em suas equipes, ressaltando o valor de seu desempenho. Para evitar erros na análise, somente jogadores com, no mínimo, 50 jogos disputados em ambas as temporadas foram escolhidos. ")
+@diagnostico.medido
+def get_top_players(season, metric, n):
+    try:
+        return fonte_temporadas.top_jogadores(season, metric, n)
+    except Exception as e:
+        diagnostico.registrar_erro(e)
+        st.error(f"Erro ao montar o ranking da temporada {season}: {e}")
+        return pd.DataFrame(columns=['nome_jogador', 'jogos_jogados', metric])
 
-df_evolucao = get_player_evolution_data()
+@diagnostico.medido
+def search_players(term):
+    try:
+        return busca.buscar_jogadores(term)
+    except Exception as e:
+        diagnostico.registrar_erro(e)
+        st.error(f"Erro ao buscar jogadores: {e}")
+        return []
 
-if not df_evolucao.empty:
-    st.dataframe(df_evolucao, use_container_width=True)
+@diagnostico.medido
+def get_player_career(player_id):
+    try:
+        return fonte_temporadas.carreira_jogador(player_id)
+    except Exception as e:
+        diagnostico.registrar_erro(e)
+        st.error(f"Erro ao buscar a carreira do jogador: {e}")
+        return pd.DataFrame()
 
-    fig_pontos = px.bar(
-        df_evolucao.head(10),
+@diagnostico.medido
+def get_last_games(player_id):
+    try:
+        return dados.ultimos_jogos(player_id)
+    except Exception as e:
+        diagnostico.registrar_erro(e)
+        st.error(f"Erro ao buscar os últimos jogos do jogador: {e}")
+        return pd.DataFrame()
+
+def mean_and_std(aggregates, metric):
+    # Média e desvio padrão amostral a partir de contagem, soma e soma dos quadrados
+    n = aggregates['total_linhas']
+    total = aggregates[f"soma_{metric}"]
+    total_squares = aggregates[f"soma_quadrados_{metric}"]
+    if n < 2:
+        return (total / n if n else float('nan')), float('nan')
+    variance = (total_squares - total * total / n) / (n - 1)
+    return total / n, max(variance, 0.0) ** 0.5
+
+# %%
+# Montar uma figura do plotly express custa dezenas de ms por rerun. As
+# figuras ficam em st.cache_resource, chaveadas pelos controles e pela versão
+# de carga 'temporadas' (uma carga nova gera figuras novas); os DataFrames
+# (_df...) não entram no hash. O Streamlit só lê a figura ao enviá-la.
+
+@st.cache_resource(max_entries=4)
+def build_evolution_chart(_df_evolucao, load_version):
+    return px.bar(
+        _df_evolucao.head(10),
         x='nome_jogador',
         y='diferenca_pontos',
         title='Jogadores que mais evoluíram em pontos entre duas temporadas consecutivas:',
         labels={'nome_jogador': '', 'diferenca_pontos': 'Diferença de Pontos'},
         hover_data=['temporada_atual', 'pontos_atual', 'pontos_anterior']
     )
-    st.plotly_chart(fig_pontos, use_container_width=True)
-else:
-    st.warning("Não foi possível carregar os dados de evolução dos jogadores.")
-
-st.markdown("---")
-
-st.header("Análise Detalhada por Temporada")
-
-todas_temporadas = get_all_seasons_from_db()
-if todas_temporadas:
-    selected_season = st.selectbox("Selecione a temporada:", todas_temporadas)
-else:
-    st.warning("Nenhuma temporada encontrada no banco de dados.")
-    selected_season = None
-
-if selected_season:
-    df_temporada = get_seasonal_player_stats(selected_season)
-
-    if not df_temporada.empty:
-        st.subheader(f"Melhores da Temporada ({selected_season})")
-
-        metric_choice = st.selectbox(
-            "Selecione a Métrica:",
-            ("Pontos p/ jogo", "Assistências p/ jogo", "Rebotes p/ jogo")
-        )
-
-        top_n = st.slider("Mostrar número selecionado de jogadores:", 5, 20, 10)
-
-        title_phrases = {
-            "Pontos p/ jogo": 'com mais pontos',
-            "Assistências p/ jogo": 'com mais assistências',
-            "Rebotes p/ jogo": 'com mais rebotes'
-        }
-
-        chart_title = f"Top {top_n} - Jogadores {title_phrases[metric_choice]} na temporada {selected_season}:"
-        if metric_choice == "Pontos p/ jogo":
-            df_top_players = df_temporada.sort_values(by='pontos_por_jogo', ascending=False).head(top_n)
-            y_metric = 'pontos_por_jogo'
-        elif metric_choice == "Assistências p/ jogo":
-            df_top_players = df_temporada.sort_values(by='assistencias_por_jogo', ascending=False).head(top_n)
-            y_metric = 'assistencias_por_jogo'
-        else:
-            df_top_players = df_temporada.sort_values(by='rebotes_por_jogo', ascending=False).head(top_n)
-            y_metric = 'rebotes_por_jogo'
-
-        st.dataframe(df_top_players[['nome_jogador', 'jogos_jogados', y_metric]], use_container_width=True) # Adicionado use_container_width
-
-        fig_top_players = px.bar(
-            df_top_players,
-            x='nome_jogador',
-            y=y_metric,
-            title=chart_title,
-            labels={'nome_jogador': '', y_metric: metric_choice},
-            hover_data=['jogos_jogados']
-        )
-        st.plotly_chart(fig_top_players, use_container_width=True)
-
-        st.subheader(f"Estatísticas Agregadas da Temporada {selected_season}")
-        avg_points = df_temporada['pontos_por_jogo'].mean()
-        std_dev_points = df_temporada['pontos_por_jogo'].std()
-
-        avg_assists = df_temporada['assistencias_por_jogo'].mean()
-        std_dev_assists = df_temporada['assistencias_por_jogo'].std()
-
-        avg_rebounds = df_temporada['rebotes_por_jogo'].mean()
-        std_dev_rebounds = df_temporada['rebotes_por_jogo'].std()
-
-        total_jogadores_na_temporada = df_temporada['id_jogador'].nunique()
-
-        col1, col2, col3 = st.columns(3)
-
-        with col1:
-            st.metric(label="Média de Pontos por Jogo (por jogador)", value=f"{avg_points:.2f}")
-            st.metric(label="Desvio Padrão de Pontos por Jogo (por jogador)", value=f"{std_dev_points:.2f}")
-        with col2:
-            st.metric(label="Média de Assistências por Jogo (por jogador)", value=f"{avg_assists:.2f}")
-            st.metric(label="Desvio Padrão de Assistências por Jogo (por jogador)", value=f"{std_dev_assists:.2f}")
-        with col3:
-            st.metric(label="Média de Rebotes por Jogo (por jogador)", value=f"{avg_rebounds:.2f}")
-            st.metric(label="Desvio Padrão de Rebotes por Jogo (por jogador)", value=f"{std_dev_rebounds:.2f}")
-
-        st.metric(label="Total de Jogadores com Estatísticas Válidas", value=f"{total_jogadores_na_temporada}")
-
-        with st.expander("O que é o Desvio Padrão e por que ele é importante?"):
-            st.markdown("""
-            O Desvio Padrão é uma medida estatística que indica o quanto os valores de um conjunto de dados se desviam ou se espalham em relação à média.
-
-            * **Desvio Padrão Baixo:** Significa que os pontos por jogo dos jogadores estão geralmente próximos da média. Há menos variação no desempenho.
-            * **Desvio Padrão Alto:** Significa que os pontos por jogo dos jogadores estão mais espalhados em torno da média, com uma variação maior no desempenho. Você tem jogadores que pontuam muito acima e muito abaixo da média.
-
-            Por que é importante?
-            Ele te dá uma ideia da consistência ou da variedade de desempenho na liga. Uma média alta com um desvio padrão baixo pode indicar uma liga com muitos pontuadores consistentes, enquanto uma média similar com um desvio padrão alto pode indicar alguns "superstars" e muitos jogadores com pontuação baixa.
-            """)
-
-        st.subheader(f"Relação entre Pontos e Assistências por Jogo na Temporada {selected_season}")
-        fig_scatter = px.scatter(
-            df_temporada,
-            x='pontos_por_jogo',
-            y='assistencias_por_jogo',
-            size='jogos_jogados',
-            hover_name='nome_jogador',
-            title=f'Pontos vs. Assistências por Jogo - Temporada {selected_season}',
-            labels={'pontos_por_jogo': 'Pontos por Jogo', 'assistencias_por_jogo': 'Assistências por Jogo', 'jogos_jogados': 'Jogos'},
-            height=820
-        )
-        st.plotly_chart(fig_scatter, use_container_width=True)
 
+@st.cache_resource(max_entries=256)
+def build_top_players_chart(_df_top_players, season, metric_choice, n, load_version):
+    y_metric = METRICAS_RANKING[metric_choice]['coluna']
+    return px.bar(
+        _df_top_players,
+        x='nome_jogador',
+        y=y_metric,
+        title=f"Top {n} - Jogadores {METRICAS_RANKING[metric_choice]['frase']} na temporada {season}:",
+        labels={'nome_jogador': '', y_metric: metric_choice},
+        hover_data=['jogos_jogados']
+    )
+
+@st.cache_resource(max_entries=64)
+def build_scatter_chart(_df_temporada, season, range_points, range_assists, detail_mode, load_version):
+    return dispersao.grafico_dispersao(
+        _df_temporada,
+        x='pontos_por_jogo',
+        y='assistencias_por_jogo',
+        tamanho='jogos_jogados',
+        rotulo='nome_jogador',
+        titulo=f'Pontos vs. Assistências por Jogo - Temporada {season}',
+        labels={'pontos_por_jogo': 'Pontos por Jogo', 'assistencias_por_jogo': 'Assistências por Jogo', 'jogos_jogados': 'Jogos'},
+        faixa_x=range_points,
+        faixa_y=range_assists,
+        modo=detail_mode
+    )
+
+@st.cache_resource(max_entries=64)
+def build_career_chart(_df_carreira, player_id, player_name, load_version):
+    return px.line(
+        _df_carreira,
+        x='temporada',
+        y=['pontos_por_jogo', 'assistencias_por_jogo', 'rebotes_por_jogo'],
+        markers=True,
+        title=f'Médias por jogo de {player_name} a cada temporada',
+        labels={'temporada': 'Temporada', 'value': 'Média por Jogo', 'variable': ''}
+    )
+
+# %%
+# Corpo da página. diagnostico.execucao() registra o rerun e fecha o registro
+# mesmo quando ele é interrompido (st.stop, RerunException de um widget mexido no meio).
+
+with diagnostico.execucao() as resumo_diagnostico:
+    st.header("Evolução de Desempenho de Jogadores entre Temporadas")
+    st.markdown("Essa tabela mostra quais jogadores tiveram maior crescimento em suas estatísticas individuais (pontos, assistências e rebotes) de uma temporada para outra, destacando quem mais evoluiu em desempenho. Para cada jogador, são apresentados os dados da temporada anterior, da temporada atual em que a evolução ocorreu, e a diferença calculada dessas métricas (pontos, assistências e rebotes). Ajuda a identificar o momento de ascensão de jogadores e o impacto positivo que podem ter gerado em suas equipes, ressaltando o valor de seu desempenho. Para evitar erros na análise, somente jogadores com, no mínimo, 50 jogos disputados em ambas as temporadas foram escolhidos. ")
+
+    # Módulos pesados só agora, com o título e o texto acima já na tela.
+    import pandas as pd
+    import plotly.express as px
+    from dashboard import dados
+
+    load_version = dados.versoes_carga().get('temporadas', 0) # Lida antes dos dados: no pior caso a figura é refeita à toa
+    df_evolucao = get_player_evolution_data()
+
+    if not df_evolucao.empty:
+        st.dataframe(df_evolucao, width='stretch')
+
+        fig_pontos = build_evolution_chart(df_evolucao, load_version)
+        st.plotly_chart(fig_pontos, width='stretch')
+        diagnostico.registrar_grafico('evolucao_pontos', fig_pontos)
+    else:
+        st.warning("Não foi possível carregar os dados de evolução dos jogadores.")
+
+    st.markdown("---")
+
+    st.header("Análise Detalhada por Temporada")
+
+    from dashboard import analitico, dispersao
+    from dashboard.ranking import METRICAS_RANKING
+
+    # 'memoria' responde temporada, top-N e agregados a partir do snapshot em memória; 'banco' consulta por temporada.
+    fonte_temporadas = analitico if os.getenv('DASHBOARD_MOTOR', 'memoria') == 'memoria' else dados
+
+    todas_temporadas = get_all_seasons_from_db()
+    if todas_temporadas:
+        selected_season = st.selectbox("Selecione a temporada:", todas_temporadas)
     else:
-        st.warning(f"Não há dados disponíveis para a temporada {selected_season} ou ocorreu um erro.")
-else:
-    st.info("Selecione uma temporada para ver as análises detalhadas.")
\ No newline at end of file
+        st.warning("Nenhuma temporada encontrada no banco de dados.")
+        selected_season = None
+
+    if selected_season:
+        df_temporada = get_seasonal_player_stats(selected_season)
+
+        if not df_temporada.empty:
+            st.subheader(f"Melhores da Temporada ({selected_season})")
+
+            metric_choice = st.selectbox("Selecione a Métrica:", tuple(METRICAS_RANKING))
+
+            top_n = st.slider("Mostrar número selecionado de jogadores:", 5, 20, 10)
+
+            y_metric = METRICAS_RANKING[metric_choice]['coluna']
+            df_top_players = get_top_players(selected_season, y_metric, top_n)
+
+            st.dataframe(df_top_players[['nome_jogador', 'jogos_jogados', y_metric]], width='stretch')
+
+            fig_top_players = build_top_players_chart(df_top_players, selected_season, metric_choice, top_n, load_version)
+            st.plotly_chart(fig_top_players, width='stretch')
+            diagnostico.registrar_grafico('melhores_da_temporada', fig_top_players)
+
+            st.subheader(f"Estatísticas Agregadas da Temporada {selected_season}")
+            agregados = get_season_aggregates(selected_season)
+            if agregados:
+                avg_points, std_dev_points = mean_and_std(agregados, 'pontos_por_jogo')
+                avg_assists, std_dev_assists = mean_and_std(agregados, 'assistencias_por_jogo')
+                avg_rebounds, std_dev_rebounds = mean_and_std(agregados, 'rebotes_por_jogo')
+                total_jogadores_na_temporada = agregados['total_jogadores']
+            else:
+                avg_points = df_temporada['pontos_por_jogo'].mean()
+                std_dev_points = df_temporada['pontos_por_jogo'].std()
+
+                avg_assists = df_temporada['assistencias_por_jogo'].mean()
+                std_dev_assists = df_temporada['assistencias_por_jogo'].std()
+
+                avg_rebounds = df_temporada['rebotes_por_jogo'].mean()
+                std_dev_rebounds = df_temporada['rebotes_por_jogo'].std()
+
+                total_jogadores_na_temporada = df_temporada['id_jogador'].nunique()
+
+            col1, col2, col3 = st.columns(3)
+
+            with col1:
+                st.metric(label="Média de Pontos por Jogo (por jogador)", value=f"{avg_points:.2f}")
+                st.metric(label="Desvio Padrão de Pontos por Jogo (por jogador)", value=f"{std_dev_points:.2f}")
+            with col2:
+                st.metric(label="Média de Assistências por Jogo (por jogador)", value=f"{avg_assists:.2f}")
+                st.metric(label="Desvio Padrão de Assistências por Jogo (por jogador)", value=f"{std_dev_assists:.2f}")
+            with col3:
+                st.metric(label="Média de Rebotes por Jogo (por jogador)", value=f"{avg_rebounds:.2f}")
+                st.metric(label="Desvio Padrão de Rebotes por Jogo (por jogador)", value=f"{std_dev_rebounds:.2f}")
+
+            st.metric(label="Total de Jogadores com Estatísticas Válidas", value=f"{total_jogadores_na_temporada}")
+
+            with st.expander("O que é o Desvio Padrão e por que ele é importante?"):
+                st.markdown("""
+                O Desvio Padrão é uma medida estatística que indica o quanto os valores de um conjunto de dados se desviam ou se espalham em relação à média.
+
+                * **Desvio Padrão Baixo:** Significa que os pontos por jogo dos jogadores estão geralmente próximos da média. Há menos variação no desempenho.
+                * **Desvio Padrão Alto:** Significa que os pontos por jogo dos jogadores estão mais espalhados em torno da média, com uma variação maior no desempenho. Você tem jogadores que pontuam muito acima e muito abaixo da média.
+
+                Por que é importante?
+                Ele te dá uma ideia da consistência ou da variedade de desempenho na liga. Uma média alta com um desvio padrão baixo pode indicar uma liga com muitos pontuadores consistentes, enquanto uma média similar com um desvio padrão alto pode indicar alguns "superstars" e muitos jogadores com pontuação baixa.
+                """)
+
+            st.subheader(f"Relação entre Pontos e Assistências por Jogo na Temporada {selected_season}")
+            with st.expander("Ajustar faixa e nível de detalhe"):
+                # Estreitar a faixa refaz o gráfico só com os jogadores dela; acima do limite de pontos eles são agrupados em grade.
+                max_points = float(math.ceil(df_temporada['pontos_por_jogo'].max()))
+                max_assists = float(math.ceil(df_temporada['assistencias_por_jogo'].max()))
+                range_points = st.slider("Faixa de pontos por jogo:", 0.0, max_points, (0.0, max_points))
+                range_assists = st.slider("Faixa de assistências por jogo:", 0.0, max_assists, (0.0, max_assists))
+                detail_mode = st.radio("Nível de detalhe:", dispersao.MODOS, horizontal=True,
+                                       format_func={'auto': 'Automático', 'pontos': 'Jogadores', 'grade': 'Grade'}.get)
+
+            fig_scatter, scatter_info = build_scatter_chart(
+                df_temporada, selected_season,
+                None if range_points == (0.0, max_points) else range_points,
+                None if range_assists == (0.0, max_assists) else range_assists,
+                detail_mode, load_version
+            )
+            st.plotly_chart(fig_scatter, width='stretch')
+            diagnostico.registrar_grafico('dispersao_pontos_assistencias', fig_scatter)
+            st.caption(f"{scatter_info['pontos_visiveis']} de {scatter_info['pontos_totais']} jogadores na faixa, "
+                       f"{scatter_info['marcadores']} marcadores enviados ({'grade' if scatter_info['modo'] == 'grade' else 'individuais'}).")
+
+        else:
+            st.warning(f"Não há dados disponíveis para a temporada {selected_season} ou ocorreu um erro.")
+    else:
+        st.info("Selecione uma temporada para ver as análises detalhadas.")
+
+    st.markdown("---")
+
+    st.header("Carreira de um Jogador")
+
+    from dashboard import busca
+
+    # A busca roda no índice em memória do busca.py; a carreira vem do índice por jogador do motor escolhido.
+    search_term = st.text_input("Buscar jogador pelo nome:", placeholder="Digite ao menos duas letras, ex.: LeBron")
+    if search_term:
+        found_players = search_players(search_term)
+        if found_players:
+            player_names = dict(found_players)
+            repeated_names = {name for name in player_names.values() if list(player_names.values()).count(name) > 1}
+            selected_player = st.selectbox(
+                "Jogadores encontrados:", list(player_names),
+                format_func=lambda player_id: f"{player_names[player_id]} (#{player_id})" if player_names[player_id] in repeated_names else player_names[player_id]
+            )
+            df_carreira = get_player_career(selected_player)
+
+            if not df_carreira.empty:
+                st.dataframe(
+                    df_carreira[['temporada', 'jogos_jogados', 'pontos_por_jogo', 'assistencias_por_jogo', 'rebotes_por_jogo',
+                                 'perc_arremessos_quadra', 'perc_arremessos_3pts', 'perc_lances_livres']],
+                    width='stretch', hide_index=True
+                )
+                fig_carreira = build_career_chart(df_carreira, selected_player, player_names[selected_player], load_version)
+                st.plotly_chart(fig_carreira, width='stretch')
+                diagnostico.registrar_grafico('carreira_jogador', fig_carreira)
+
+                df_ultimos_jogos = get_last_games(selected_player)
+                if not df_ultimos_jogos.empty:
+                    st.subheader("Últimos jogos")
+                    st.dataframe(df_ultimos_jogos, width='stretch', hide_index=True)
+            else:
+                st.info(f"{player_names[selected_player]} não tem temporadas com jogos registrados.")
+        else:
+            st.warning(f"Nenhum jogador encontrado para \"{search_term}\".")
+
+# %%
+
+if resumo_diagnostico and st.query_params.get('diagnostico') == '1':
+    # Painel escondido: só com DASHBOARD_DIAGNOSTICO=1 e ?diagnostico=1 na URL.
+    st.markdown("---")
+    st.header("Diagnóstico")
+    st.caption(f"Este rerun levou {resumo_diagnostico['ms']:.1f} ms até aqui "
+               f"({sum(c['ms'] for c in resumo_diagnostico['chamadas']):.1f} ms nas funções de dados).")
+    st.subheader("Funções de dados neste rerun")
+    st.dataframe(pd.DataFrame(resumo_diagnostico['chamadas']), width='stretch')
+    st.subheader("Consultas em dados.py neste rerun")
+    st.dataframe(pd.DataFrame(resumo_diagnostico['consultas']), width='stretch')
+    st.subheader("Gráficos neste rerun")
+    st.dataframe(pd.DataFrame(resumo_diagnostico['graficos']), width='stretch')
+    st.subheader(f"Funções de dados nos últimos {diagnostico.EXECUCOES_GUARDADAS} reruns")
+    st.dataframe(pd.DataFrame(diagnostico.resumo_funcoes()), width='stretch')
+    from dashboard.db_setup import metricas_pool
+    st.subheader("Cache e pool de conexões")
+    st.json({'cache': dados.metricas_cache(), 'pool': metricas_pool()}, expanded=False)
@@ -0,0 +1,133 @@
+from bisect import bisect_left
+from pathlib import Path
+import re
+import sys
+import threading
+import time
+import unicodedata
+import numpy as np
+
+# %%
+
+script_dir = Path(__file__).resolve().parent
+src_dir = script_dir.parent
+
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+from dashboard import dados
+
+# %%
+# Busca de jogadores por nome para o campo de digitação do dashboard. O índice
+# é montado em memória sobre dados.jogadores() (a tabela 'jogadores' inteira,
+# do mesmo cache do resto do app) e refeito quando uma carga nova troca esse
+# resultado, como o índice do analitico.py.
+#
+# Dois níveis, sobre o nome normalizado (minúsculas, sem acentos nem
+# pontuação):
+#  - prefixo: uma lista ordenada com o nome a partir de cada palavra ("lebron
+#    james", "james"); "jam" e "lebron j" viram uma busca binária;
+#  - trigramas: para cada trigrama, os jogadores que o têm; completa a lista
+#    quando o prefixo não basta, o que cobre erros de digitação ("jokich") e
+#    trechos do meio do nome.
+
+MINIMO_CARACTERES = 2
+LIMIAR_TRIGRAMAS = 0.5 # Fração dos trigramas da busca que o nome precisa ter
+
+_trava = threading.Lock()
+_indice = {'jogadores': None, 'ids': (), 'nomes': (), 'chaves': [], 'posicoes_chaves': [], 'comeco_chaves': [], 'trigramas': {}, 'segundos_indexacao': 0.0}
+
+# %%
+
+def normalizar(texto):
+    """Minúsculas, sem acentos, sem apóstrofos e pontos ("D'Angelo" -> "dangelo") e só letras e dígitos separados por espaço."""
+    sem_acentos = unicodedata.normalize('NFKD', str(texto)).encode('ascii', 'ignore').decode('ascii').lower()
+    return ' '.join(re.findall(r"[a-z0-9]+", re.sub(r"['.]", '', sem_acentos)))
+
+def _trigramas(texto, fim=True):
+    # Um espaço no início marca o começo do nome; no fim só para nomes completos, já que a busca pode estar pela metade.
+    texto = f" {texto} " if fim else f" {texto}"
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+def _indexar(jogadores):
+    inicio = time.perf_counter()
+    ids = tuple(int(i) for i in jogadores['id_jogador'])
+    nomes = tuple(str(n) for n in jogadores['nome_jogador'])
+
+    entradas, postagens = [], {}
+    for posicao, nome in enumerate(nomes):
+        palavras = normalizar(nome).split()
+        entradas.extend((' '.join(palavras[i:]), posicao, i == 0) for i in range(len(palavras)))
+        for trigrama in _trigramas(' '.join(palavras)):
+            postagens.setdefault(trigrama, []).append(posicao)
+    entradas.sort()
+
+    return {
+        'jogadores': jogadores,
+        'ids': ids,
+        'nomes': nomes,
+        'chaves': [chave for chave, _, _ in entradas],
+        'posicoes_chaves': [posicao for _, posicao, _ in entradas],
+        'comeco_chaves': [comeco for _, _, comeco in entradas],
+        'trigramas': {trigrama: np.array(p, dtype=np.int32) for trigrama, p in postagens.items()},
+        'segundos_indexacao': round(time.perf_counter() - inicio, 4)
+    }
+
+def _atual():
+    global _indice
+    jogadores = dados.jogadores()
+    indice = _indice
+    if jogadores is indice['jogadores']:
+        return indice
+    with _trava:
+        if jogadores is not _indice['jogadores']:
+            _indice = _indexar(jogadores)
+        return _indice
+
+def _por_prefixo(indice, termo):
+    chaves, posicoes, comecos = indice['chaves'], indice['posicoes_chaves'], indice['comeco_chaves']
+    encontrados = {}
+    i = bisect_left(chaves, termo)
+    while i < len(chaves) and chaves[i].startswith(termo):
+        # Casar no começo do nome vale mais do que casar num sobrenome.
+        encontrados[posicoes[i]] = min(encontrados.get(posicoes[i], 1), 0 if comecos[i] else 1)
+        i += 1
+    return sorted(encontrados, key=lambda p: (encontrados[p], indice['nomes'][p]))
+
+def _por_trigramas(indice, termo):
+    trigramas = _trigramas(termo, fim=False)
+    listas = [indice['trigramas'][t] for t in trigramas if t in indice['trigramas']]
+    if not listas:
+        return []
+    contagens = np.bincount(np.concatenate(listas), minlength=len(indice['ids']))
+    candidatos = np.flatnonzero(contagens >= LIMIAR_TRIGRAMAS * len(trigramas))
+    return sorted((int(p) for p in candidatos), key=lambda p: (-contagens[p], indice['nomes'][p]))
+
+# %%
+
+def buscar_jogadores(termo, limite=10):
+    """Até 'limite' jogadores cujo nome combina com o termo, como [(id_jogador, nome_jogador)].
+
+    Primeiro quem tem uma palavra do nome começando pelo termo (começo do
+    nome antes de sobrenome), depois os mais parecidos por trigramas. Termos
+    com menos de MINIMO_CARACTERES letras ou dígitos não buscam nada.
+    """
+    termo = normalizar(termo)
+    if len(termo.replace(' ', '')) < MINIMO_CARACTERES:
+        return []
+    indice = _atual()
+    posicoes = _por_prefixo(indice, termo)[:limite]
+    if len(posicoes) < limite:
+        vistos = set(posicoes)
+        posicoes += [p for p in _por_trigramas(indice, termo) if p not in vistos][:limite - len(posicoes)]
+    return [(indice['ids'][p], indice['nomes'][p]) for p in posicoes]
+
+def info_indice():
+    """Jogadores, chaves de prefixo e trigramas do índice em uso, e o custo da última indexação."""
+    indice = _atual()
+    return {
+        'jogadores': len(indice['ids']),
+        'chaves_prefixo': len(indice['chaves']),
+        'trigramas': len(indice['trigramas']),
+        'segundos_indexacao': indice['segundos_indexacao']
+    }
@@ -0,0 +1,140 @@
+from sqlalchemy import text
+
+# %%
+# Consultas usadas pelo dashboard. Ficam aqui para que o app e as checagens de
+# plano de execução (migracoes.py) usem exatamente o mesmo SQL.
+
+CONSULTA_EVOLUCAO = text("""
+SELECT
+    ev.id_jogador,
+    j.nome_jogador,
+    ev.temporada AS temporada_atual,
+    ev.jogos_jogados AS jogos_jogados_atual,
+    ev.jogos_jogados_anterior,
+    ev.pontos AS pontos_atual,
+    ev.pontos_anterior,
+    ev.diferenca_pontos,
+    ev.assistencias AS assistencias_atual,
+    ev.assistencias_anterior,
+    ev.diferenca_assistencias,
+    ev.rebotes AS rebotes_atual,
+    ev.rebotes_anterior,
+    ev.diferenca_rebotes
+FROM
+    evolucao_temporada ev
+JOIN
+    jogadores j ON ev.id_jogador = j.id_jogador
+WHERE
+    ev.minimo_jogos = 1
+    AND (ev.diferenca_pontos > 0 OR ev.diferenca_assistencias > 0 OR ev.diferenca_rebotes > 0)
+ORDER BY
+    ev.diferenca_pontos DESC, ev.diferenca_assistencias DESC, ev.diferenca_rebotes DESC
+LIMIT 20
+""")
+
+CONSULTA_TEMPORADAS = text("""
+SELECT DISTINCT temporada
+FROM estatisticas_temporada
+ORDER BY temporada DESC
+""")
+
+CONSULTA_ESTATISTICAS_TEMPORADA = text("""
+SELECT
+    j.id_jogador,
+    j.nome_jogador,
+    et.temporada,
+    et.jogos_jogados,
+    et.pontos,
+    et.assistencias,
+    et.rebotes,
+    et.perc_arremessos_quadra,
+    et.perc_arremessos_3pts,
+    et.perc_lances_livres
+FROM
+    estatisticas_temporada et
+JOIN
+    jogadores j ON et.id_jogador = j.id_jogador
+WHERE
+    et.temporada = :temporada
+    AND et.jogos_jogados > 0
+""")
+
+# Todas as temporadas de uma vez, ordenadas por temporada: base do motor em memória (analitico.py).
+CONSULTA_SNAPSHOT_ESTATISTICAS = text("""
+SELECT
+    j.id_jogador,
+    j.nome_jogador,
+    et.temporada,
+    et.jogos_jogados,
+    et.pontos,
+    et.assistencias,
+    et.rebotes,
+    et.perc_arremessos_quadra,
+    et.perc_arremessos_3pts,
+    et.perc_lances_livres
+FROM
+    estatisticas_temporada et
+JOIN
+    jogadores j ON et.id_jogador = j.id_jogador
+WHERE
+    et.jogos_jogados > 0
+ORDER BY
+    et.temporada, j.id_jogador
+""")
+
+# Lista completa de jogadores para o índice de busca por nome (busca.py); a tabela é pequena e lida de uma vez.
+CONSULTA_JOGADORES = text("""
+SELECT id_jogador, nome_jogador
+FROM jogadores
+""")
+
+# Carreira de um jogador: busca pelo prefixo id_jogador do índice ix_estatisticas_jogador_temporada_metricas.
+CONSULTA_CARREIRA_JOGADOR = text("""
+SELECT
+    j.id_jogador,
+    j.nome_jogador,
+    et.temporada,
+    et.jogos_jogados,
+    et.pontos,
+    et.assistencias,
+    et.rebotes,
+    et.perc_arremessos_quadra,
+    et.perc_arremessos_3pts,
+    et.perc_lances_livres
+FROM
+    estatisticas_temporada et
+JOIN
+    jogadores j ON et.id_jogador = j.id_jogador
+WHERE
+    et.id_jogador = :id_jogador
+    AND et.jogos_jogados > 0
+ORDER BY
+    et.temporada
+""")
+
+CONSULTA_AGREGADOS_TEMPORADA = text("""
+SELECT *
+FROM agregados_temporada ag
+WHERE ag.temporada = :temporada
+""")
+
+CONSULTA_ULTIMOS_JOGOS = text("""
+SELECT
+    ej.data_jogo,
+    ej.temporada,
+    ej.adversario,
+    ej.mandante,
+    ej.vitoria,
+    ej.minutos,
+    ej.pontos,
+    ej.rebotes,
+    ej.assistencias,
+    ej.saldo_pontos
+FROM
+    estatisticas_jogo ej
+WHERE
+    ej.id_jogador = :id_jogador
+ORDER BY
+    ej.data_jogo DESC
+LIMIT :limite
+""")
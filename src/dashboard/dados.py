@@ -0,0 +1,411 @@
+from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
+from collections import OrderedDict
+from pathlib import Path
+import contextvars
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# %%
+
+script_dir = Path(__file__).resolve().parent
+src_dir = script_dir.parent
+project_root_dir = src_dir.parent
+
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+from dashboard.db_setup import conectar, VersaoCarga
+from dashboard.ranking import top_n
+from dashboard.consultas import CONSULTA_EVOLUCAO, CONSULTA_TEMPORADAS, CONSULTA_ESTATISTICAS_TEMPORADA, CONSULTA_SNAPSHOT_ESTATISTICAS, CONSULTA_AGREGADOS_TEMPORADA, CONSULTA_ULTIMOS_JOGOS, CONSULTA_JOGADORES, CONSULTA_CARREIRA_JOGADOR
+
+# %%
+# Camada de acesso a dados do dashboard. Todas as consultas usam os text() de
+# consultas.py com parâmetros ligados (:temporada, :id_jogador), então o SQL
+# enviado é sempre o mesmo e o SQLAlchemy reaproveita a compilação.
+#
+# O cache tem dois níveis, ambos chaveados por consulta + parâmetros + versão
+# de carga (tabela 'versoes_carga', ver materializacao.registrar_versao_carga):
+#   - memória: LRU do processo, compartilhado entre as sessões do Streamlit e
+#     limitado em bytes (DASHBOARD_CACHE_MB);
+#   - disco: um arquivo Arrow por entrada em data/cache/dashboard/, lido por
+#     outras réplicas e pelo próprio processo depois de reiniciar, limitado a
+#     DASHBOARD_CACHE_DISCO_MB (os arquivos mais antigos saem primeiro).
+# As entradas expiram por TTL e as de um conjunto ('temporadas', 'jogos') são
+# descartadas, nos dois níveis, quando o ETL publica uma nova versão dele.
+#
+# Os resultados devolvidos são compartilhados entre sessões: quem chama não
+# deve alterá-los no lugar.
+
+CACHE_TTL = float(os.getenv('DASHBOARD_CACHE_TTL', 600)) # segundos
+INTERVALO_VERSAO = float(os.getenv('DASHBOARD_INTERVALO_VERSAO', 5)) # segundos entre leituras de 'versoes_carga'
+CACHE_MEMORIA_BYTES = int(float(os.getenv('DASHBOARD_CACHE_MB', 256)) * 1024 ** 2)
+CACHE_DISCO_BYTES = int(float(os.getenv('DASHBOARD_CACHE_DISCO_MB', 1024)) * 1024 ** 2)
+CACHE_DISCO = os.getenv('DASHBOARD_CACHE_DISCO', '1') == '1'
+DIRETORIO_CACHE = Path(os.getenv('DASHBOARD_CACHE_DIR', project_root_dir / 'data' / 'cache' / 'dashboard'))
+
+_trava = threading.Lock()
+_memoria = OrderedDict() # (nome, parametros) -> (conjunto, versao, expira_em, bytes, resultado), do menos ao mais recente
+_versoes = {'valores': {}, 'lido_em': None}
+_rastro = contextvars.ContextVar('rastro_consultas', default=None) # Lista da execução sendo diagnosticada (diagnostico.py)
+_metricas = {
+    'acertos_memoria': 0, 'acertos_disco': 0, 'faltas': 0, 'expiradas': 0, 'invalidadas': 0,
+    'despejadas_memoria': 0, 'despejadas_disco': 0, 'bytes_memoria': 0, 'consultas': {}
+}
+
+# %%
+
+def versoes_carga(forcar=False):
+    """Retorna {conjunto: versao} de 'versoes_carga', relido no máximo a cada INTERVALO_VERSAO segundos.
+
+    Quando a versão de um conjunto muda, as entradas desse conjunto são
+    descartadas na hora, da memória e do disco.
+    """
+    agora = time.monotonic()
+    with _trava:
+        if not forcar and _versoes['lido_em'] is not None and agora - _versoes['lido_em'] < INTERVALO_VERSAO:
+            return _versoes['valores']
+
+    tabela = VersaoCarga.__table__
+    try:
+        with conectar() as conn:
+            valores = dict(conn.execute(select(tabela.c.conjunto, tabela.c.versao)).all())
+    except DBAPIError:
+        valores = {} # Banco anterior ao marcador: vale só o TTL
+
+    with _trava:
+        alterados = {c for c in set(valores) | set(_versoes['valores']) if valores.get(c) != _versoes['valores'].get(c)}
+        if alterados and _versoes['lido_em'] is not None:
+            _descartar(lambda conjunto, versao: conjunto in alterados)
+        _versoes.update(valores=valores, lido_em=agora)
+    if alterados:
+        _limpar_disco(lambda conjunto, versao: conjunto in alterados and versao != valores.get(conjunto, 0))
+    return valores
+
+def _descartar(condicao):
+    chaves = [chave for chave, entrada in _memoria.items() if condicao(entrada[0], entrada[1])]
+    for chave in chaves:
+        _metricas['bytes_memoria'] -= _memoria.pop(chave)[3]
+    _metricas['invalidadas'] += len(chaves)
+
+def invalidar_cache(conjunto=None):
+    """Descarta o cache inteiro ou só as consultas de um conjunto ('temporadas', 'jogos'), na memória e no disco."""
+    with _trava:
+        _descartar(lambda c, versao: conjunto is None or c == conjunto)
+        _versoes['lido_em'] = None
+    _limpar_disco(lambda c, versao: conjunto is None or c == conjunto)
+
+# %%
+
+def _tamanho(resultado):
+    if isinstance(resultado, pd.DataFrame):
+        return int(resultado.memory_usage(index=True, deep=True).sum())
+    itens = resultado.values() if isinstance(resultado, dict) else resultado
+    return sys.getsizeof(resultado) + sum(sys.getsizeof(item) for item in itens)
+
+def _guardar_na_memoria(chave, conjunto, versao, expira_em, resultado):
+    tamanho = _tamanho(resultado)
+    if tamanho > CACHE_MEMORIA_BYTES:
+        return
+    anterior = _memoria.pop(chave, None)
+    if anterior:
+        _metricas['bytes_memoria'] -= anterior[3]
+    _memoria[chave] = (conjunto, versao, expira_em, tamanho, resultado)
+    _metricas['bytes_memoria'] += tamanho
+    while _metricas['bytes_memoria'] > CACHE_MEMORIA_BYTES:
+        _, despejada = _memoria.popitem(last=False)
+        _metricas['bytes_memoria'] -= despejada[3]
+        _metricas['despejadas_memoria'] += 1
+
+# %%
+
+# Entra no nome dos arquivos: mudar o SQL de uma consulta não reaproveita resultados gravados pela versão anterior.
+_ASSINATURA_CONSULTAS = hashlib.sha256(''.join(str(consulta) for consulta in (
+    CONSULTA_EVOLUCAO, CONSULTA_TEMPORADAS, CONSULTA_ESTATISTICAS_TEMPORADA, CONSULTA_SNAPSHOT_ESTATISTICAS,
+    CONSULTA_AGREGADOS_TEMPORADA, CONSULTA_ULTIMOS_JOGOS, CONSULTA_JOGADORES, CONSULTA_CARREIRA_JOGADOR
+)).encode()).hexdigest()
+
+def _arquivo_cache(chave, conjunto, versao):
+    resumo = hashlib.sha256(repr((_ASSINATURA_CONSULTAS, chave)).encode()).hexdigest()[:24]
+    return DIRETORIO_CACHE / f"{conjunto}-v{versao}-{resumo}.arrow"
+
+def _versao_do_arquivo(arquivo):
+    conjunto, versao, _ = arquivo.stem.rsplit('-', 2)
+    return conjunto, int(versao[1:])
+
+def _para_arrow(resultado):
+    # Tuplas viram uma coluna e dicts uma linha; o tipo original vai nos metadados do arquivo.
+    if isinstance(resultado, pd.DataFrame):
+        tipo, df = 'tabela', resultado
+    elif isinstance(resultado, dict):
+        tipo, df = 'linha', pd.DataFrame([resultado])
+    else:
+        tipo, df = 'valores', pd.DataFrame({'valor': list(resultado)})
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    return tabela.replace_schema_metadata({**(tabela.schema.metadata or {}), b'tipo_resultado': tipo.encode()})
+
+def _de_arrow(tabela):
+    tipo = tabela.schema.metadata.get(b'tipo_resultado', b'tabela').decode()
+    df = tabela.to_pandas()
+    if tipo == 'linha':
+        return df.iloc[0].to_dict() if len(df) else {}
+    if tipo == 'valores':
+        return tuple(df['valor'].tolist())
+    return df
+
+def _ler_do_disco(chave, conjunto, versao):
+    """Retorna (resultado, segundos de TTL restantes) ou (None, 0) se não houver arquivo válido."""
+    if not CACHE_DISCO:
+        return None, 0
+    arquivo = _arquivo_cache(chave, conjunto, versao)
+    try:
+        restante = CACHE_TTL - (time.time() - arquivo.stat().st_mtime)
+        if restante <= 0:
+            return None, 0
+        return _de_arrow(feather.read_table(arquivo)), restante
+    except (OSError, pa.ArrowInvalid):
+        return None, 0
+
+def _gravar_no_disco(chave, conjunto, versao, resultado):
+    if not CACHE_DISCO:
+        return
+    arquivo = _arquivo_cache(chave, conjunto, versao)
+    try:
+        DIRETORIO_CACHE.mkdir(parents=True, exist_ok=True)
+        temporario = arquivo.with_name(f"{arquivo.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        feather.write_feather(_para_arrow(resultado), temporario, compression='uncompressed')
+        os.replace(temporario, arquivo) # Outras réplicas nunca veem um arquivo pela metade
+    except (OSError, pa.ArrowException) as e:
+        print(f"Cache em disco indisponível para '{chave[0]}': {e}")
+        return
+    _aplicar_limite_disco()
+
+def _arquivos_disco():
+    if not DIRETORIO_CACHE.exists():
+        return []
+    arquivos = []
+    for arquivo in DIRETORIO_CACHE.glob('*.arrow'):
+        try:
+            info = arquivo.stat()
+        except FileNotFoundError:
+            continue # Removido por outra réplica
+        arquivos.append((info.st_mtime, info.st_size, arquivo))
+    return arquivos
+
+def _limpar_disco(condicao):
+    if not CACHE_DISCO:
+        return
+    for _, _, arquivo in _arquivos_disco():
+        if condicao(*_versao_do_arquivo(arquivo)):
+            arquivo.unlink(missing_ok=True)
+
+def _aplicar_limite_disco():
+    arquivos = sorted(_arquivos_disco())
+    total = sum(tamanho for _, tamanho, _ in arquivos)
+    despejados = 0
+    for _, tamanho, arquivo in arquivos:
+        if total <= CACHE_DISCO_BYTES:
+            break
+        arquivo.unlink(missing_ok=True)
+        total -= tamanho
+        despejados += 1
+    if despejados:
+        with _trava:
+            _metricas['despejadas_disco'] += despejados
+
+# %%
+
+def _registrar_execucao(nome, milissegundos, linhas):
+    m = _metricas['consultas'].setdefault(nome, {'execucoes': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'linhas': 0})
+    m['execucoes'] += 1
+    m['total_ms'] += milissegundos
+    m['max_ms'] = max(m['max_ms'], milissegundos)
+    m['linhas'] += linhas
+
+def _linhas(resultado):
+    return int(bool(resultado)) if isinstance(resultado, dict) else len(resultado)
+
+def rastrear_consultas(destino):
+    """Passa a acrescentar em 'destino' um dict por consulta feita neste contexto (thread da sessão).
+
+    Cada dict traz a consulta, de onde veio o resultado ('memoria', 'disco'
+    ou 'banco'), o tempo, as linhas e, nas idas ao banco, uma estimativa dos
+    bytes recebidos (tamanho Arrow do resultado). Retorna o token para
+    parar_rastreio.
+    """
+    return _rastro.set(destino)
+
+def parar_rastreio(token):
+    _rastro.reset(token)
+
+def _rastrear(nome, origem, inicio, resultado):
+    destino = _rastro.get()
+    if destino is None:
+        return
+    destino.append({
+        'consulta': nome,
+        'origem': origem,
+        'ms': round((time.perf_counter() - inicio) * 1000, 3),
+        'linhas': _linhas(resultado),
+        'bytes_banco': _para_arrow(resultado).nbytes if origem == 'banco' else 0
+    })
+
+def _consultar(nome, conjunto, parametros, executar):
+    inicio = time.perf_counter()
+    versao = versoes_carga().get(conjunto, 0)
+    chave = (nome, tuple(sorted(parametros.items())))
+    agora = time.monotonic()
+    with _trava:
+        entrada = _memoria.get(chave)
+        if entrada and entrada[1] == versao and entrada[2] > agora:
+            _memoria.move_to_end(chave)
+            _metricas['acertos_memoria'] += 1
+            resultado = entrada[4]
+        else:
+            resultado = None
+            if entrada:
+                _metricas['expiradas'] += 1
+    if resultado is not None:
+        _rastrear(nome, 'memoria', inicio, resultado)
+        return resultado
+
+    resultado, restante = _ler_do_disco(chave, conjunto, versao)
+    if resultado is not None:
+        with _trava:
+            _metricas['acertos_disco'] += 1
+            _guardar_na_memoria(chave, conjunto, versao, agora + restante, resultado)
+        _rastrear(nome, 'disco', inicio, resultado)
+        return resultado
+
+    inicio_banco = time.perf_counter()
+    with conectar() as conn:
+        resultado = executar(conn)
+    milissegundos = (time.perf_counter() - inicio_banco) * 1000
+
+    with _trava:
+        _metricas['faltas'] += 1
+        _registrar_execucao(nome, milissegundos, _linhas(resultado))
+        _guardar_na_memoria(chave, conjunto, versao, time.monotonic() + CACHE_TTL, resultado)
+    _rastrear(nome, 'banco', inicio, resultado)
+    _gravar_no_disco(chave, conjunto, versao, resultado)
+    return resultado
+
+def metricas_cache():
+    """Retorna acertos por nível, faltas, taxa de acerto, invalidações, despejos, ocupação e a latência de cada consulta executada no banco."""
+    arquivos = _arquivos_disco() if CACHE_DISCO else []
+    with _trava:
+        acertos = _metricas['acertos_memoria'] + _metricas['acertos_disco']
+        faltas = _metricas['faltas']
+        consultas = {
+            nome: {**m, 'media_ms': round(m['total_ms'] / m['execucoes'], 3), 'total_ms': round(m['total_ms'], 3), 'max_ms': round(m['max_ms'], 3)}
+            for nome, m in _metricas['consultas'].items()
+        }
+        return {
+            'acertos_memoria': _metricas['acertos_memoria'],
+            'acertos_disco': _metricas['acertos_disco'],
+            'faltas': faltas,
+            'taxa_acerto': round(acertos / (acertos + faltas), 4) if acertos + faltas else 0.0,
+            'expiradas': _metricas['expiradas'],
+            'invalidadas': _metricas['invalidadas'],
+            'despejadas_memoria': _metricas['despejadas_memoria'],
+            'despejadas_disco': _metricas['despejadas_disco'],
+            'entradas_memoria': len(_memoria),
+            'bytes_memoria': _metricas['bytes_memoria'],
+            'entradas_disco': len(arquivos),
+            'bytes_disco': sum(tamanho for _, tamanho, _ in arquivos),
+            'versoes': dict(_versoes['valores']),
+            'consultas': consultas
+        }
+
+# %%
+
+def evolucao_jogadores():
+    return _consultar('evolucao', 'temporadas', {}, lambda conn: pd.read_sql(CONSULTA_EVOLUCAO, conn))
+
+def temporadas():
+    return _consultar('temporadas', 'temporadas', {}, lambda conn: tuple(linha[0] for linha in conn.execute(CONSULTA_TEMPORADAS)))
+
+COLUNAS_PERCENTUAIS = ['perc_arremessos_quadra', 'perc_arremessos_3pts', 'perc_lances_livres']
+
+def _medias_por_jogo(df):
+    # No MySQL as colunas DECIMAL chegam como objetos Decimal.
+    df[COLUNAS_PERCENTUAIS] = df[COLUNAS_PERCENTUAIS].astype('float32')
+    df['pontos_por_jogo'] = df['pontos'] / df['jogos_jogados']
+    df['assistencias_por_jogo'] = df['assistencias'] / df['jogos_jogados']
+    df['rebotes_por_jogo'] = df['rebotes'] / df['jogos_jogados']
+    return df
+
+def estatisticas_temporada(temporada):
+    """Estatísticas dos jogadores na temporada, com as médias por jogo já calculadas."""
+    return _consultar(
+        'estatisticas_temporada', 'temporadas', {'temporada': temporada},
+        lambda conn: _medias_por_jogo(pd.read_sql(CONSULTA_ESTATISTICAS_TEMPORADA, conn, params={'temporada': temporada}))
+    )
+
+def _top_materializado(temporada, metrica, n):
+    # Melhores de uma média por jogo já guardados em 'agregados_temporada' (materializacao.py), ou None
+    # quando a métrica não está lá ou a lista guardada é menor que n sem cobrir a temporada inteira.
+    linha = agregados_temporada(temporada)
+    lista = linha.get(f"top_{metrica}")
+    if lista is None:
+        return None
+    melhores = json.loads(lista)
+    if len(melhores) < n and len(melhores) < linha['total_linhas']:
+        return None
+    df = pd.DataFrame(melhores[:n], columns=['id_jogador', 'nome_jogador', 'jogos_jogados', 'valor'])
+    return df.rename(columns={'valor': metrica})
+
+def top_jogadores(temporada, metrica, n):
+    """Os n jogadores com maior 'metrica' na temporada.
+
+    Pontos, assistências e rebotes por jogo saem da lista pré-calculada da
+    linha de 'agregados_temporada'; as demais métricas (e n maior que a
+    lista) fazem a seleção parcial sobre estatisticas_temporada em cache.
+    """
+    melhores = _top_materializado(temporada, metrica, n)
+    if melhores is not None:
+        return melhores
+    return top_n(estatisticas_temporada(temporada), metrica, n)
+
+# Tipos do snapshot: contagens de uma temporada cabem em int32 e 'temporada' vira category.
+TIPOS_SNAPSHOT = {'id_jogador': 'int32', 'temporada': 'category', 'jogos_jogados': 'int32', 'pontos': 'int32', 'assistencias': 'int32', 'rebotes': 'int32'}
+
+def snapshot_estatisticas():
+    """Todas as linhas de 'estatisticas_temporada' com jogos, tipadas, ordenadas por temporada e com as médias por jogo."""
+    return _consultar(
+        'snapshot_estatisticas', 'temporadas', {},
+        lambda conn: _medias_por_jogo(pd.read_sql(CONSULTA_SNAPSHOT_ESTATISTICAS, conn).astype(TIPOS_SNAPSHOT))
+    )
+
+def jogadores():
+    """Id e nome de todos os jogadores, base do índice de busca (busca.py)."""
+    return _consultar(
+        'jogadores', 'temporadas', {},
+        lambda conn: pd.read_sql(CONSULTA_JOGADORES, conn).astype({'id_jogador': 'int32'})
+    )
+
+def carreira_jogador(id_jogador):
+    """Temporadas com jogos de um jogador, em ordem cronológica, com as mesmas colunas de estatisticas_temporada."""
+    return _consultar(
+        'carreira_jogador', 'temporadas', {'id_jogador': int(id_jogador)},
+        lambda conn: _medias_por_jogo(pd.read_sql(CONSULTA_CARREIRA_JOGADOR, conn, params={'id_jogador': int(id_jogador)}))
+    )
+
+def agregados_temporada(temporada):
+    def executar(conn):
+        linha = conn.execute(CONSULTA_AGREGADOS_TEMPORADA, {'temporada': temporada}).mappings().first()
+        return dict(linha) if linha else {}
+    return dict(_consultar('agregados_temporada', 'temporadas', {'temporada': temporada}, executar))
+
+def ultimos_jogos(id_jogador, limite=10):
+    return _consultar(
+        'ultimos_jogos', 'jogos', {'id_jogador': int(id_jogador), 'limite': int(limite)},
+        lambda conn: pd.read_sql(CONSULTA_ULTIMOS_JOGOS, conn, params={'id_jogador': int(id_jogador), 'limite': int(limite)})
+    )
@@ -1,10 +1,13 @@
-
-from sqlalchemy import create_engine, Column, Integer, String, DECIMAL, ForeignKey, text
-from sqlalchemy.orm import sessionmaker, relationship, declarative_base
+from sqlalchemy import create_engine, event, Column, Integer, SmallInteger, String, DECIMAL, Boolean, Float, Date, DateTime, Text, ForeignKey, UniqueConstraint, Index, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import relationship, declarative_base, sessionmaker
+from sqlalchemy.pool import QueuePool
+from contextlib import contextmanager
 from dotenv import load_dotenv 
 from pathlib import Path
 import os
-import streamlit as st 
+import threading
+import time
 # %%
 
 dotenv_path = Path(__file__).resolve().parent.parent.parent / '.env'
@@ -14,9 +17,15 @@ DB_HOST = os.getenv('DB_HOST')
 DB_NAME = os.getenv('DB_NAME')
 DB_USER = os.getenv('DB_USER')
 DB_PASSWORD = os.getenv('DB_PASSWORD')
+DATABASE_URL = os.getenv('DATABASE_URL') # Opcional: sobrescreve o MySQL (ex.: sqlite:///nba.db para testes locais)
+DB_LOCAL_INFILE = os.getenv('DB_LOCAL_INFILE', '0') == '1'
 
-if not all([DB_HOST, DB_NAME, DB_USER, DB_PASSWORD]):
-    raise ValueError("Erro: Variáveis de ambiente do banco de dados não carregadas. Verifique o arquivo .env e o caminho.")
+# Pool de conexões: sessões simultâneas do dashboard e threads do ETL compartilham o mesmo engine.
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800)) # segundos; abaixo do wait_timeout do MySQL
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', '1') == '1'
 
 Base = declarative_base()
 
@@ -37,18 +46,207 @@ class EstatisticaTemporada(Base):
     pontos = Column(Integer, nullable=False)
     assistencias = Column(Integer, nullable=False)
     rebotes = Column(Integer, nullable=False)
-    perc_arremessos_quadra = Column(DECIMAL(5,3), nullable=False)
-    perc_arremessos_3pts = Column(DECIMAL(5,3), nullable=False)
-    perc_lances_livres = Column(DECIMAL(5,3), nullable=False)
+    # Percentuais podem ser nulos: a API devolve FG3_PCT nulo antes de 1979-80, quando não havia linha de 3 pontos.
+    perc_arremessos_quadra = Column(DECIMAL(5,3))
+    perc_arremessos_3pts = Column(DECIMAL(5,3))
+    perc_lances_livres = Column(DECIMAL(5,3))
     jogador = relationship("Jogador", back_populates="estatisticas")
+    __table_args__ = (
+        UniqueConstraint('id_jogador', 'temporada', 'id_time', name='uq_estatistica_jogador_temporada_time'),
+        # Filtro por temporada (get_seasonal_player_stats) e lista de temporadas distintas
+        Index('ix_estatisticas_temporada_jogos', 'temporada', 'jogos_jogados'),
+        # Janela PARTITION BY id_jogador ORDER BY temporada (get_player_evolution_data), só com leitura do índice
+        Index('ix_estatisticas_jogador_temporada_metricas', 'id_jogador', 'temporada', 'jogos_jogados', 'pontos', 'assistencias', 'rebotes'),
+    )
+
+class EvolucaoTemporada(Base):
+    # Tabela derivada de estatisticas_temporada, reconstruída pelo ETL (etl/materializacao.py).
+    # Uma linha por jogador e temporada que tem temporada anterior, com as diferenças já calculadas.
+    # Sem chave estrangeira para não prender 'jogadores' durante a troca de tabelas da carga.
+    __tablename__ = 'evolucao_temporada'
+    id_jogador = Column(Integer, primary_key=True)
+    temporada = Column(String(10), primary_key=True)
+    temporada_anterior = Column(String(10), nullable=False)
+    jogos_jogados = Column(Integer, nullable=False)
+    jogos_jogados_anterior = Column(Integer, nullable=False)
+    pontos = Column(Integer, nullable=False)
+    pontos_anterior = Column(Integer, nullable=False)
+    diferenca_pontos = Column(Integer, nullable=False)
+    assistencias = Column(Integer, nullable=False)
+    assistencias_anterior = Column(Integer, nullable=False)
+    diferenca_assistencias = Column(Integer, nullable=False)
+    rebotes = Column(Integer, nullable=False)
+    rebotes_anterior = Column(Integer, nullable=False)
+    diferenca_rebotes = Column(Integer, nullable=False)
+    minimo_jogos = Column(Boolean, nullable=False) # 50+ jogos nas duas temporadas
+    __table_args__ = (
+        # Leitura ordenada do ranking de evolução (get_player_evolution_data)
+        Index('ix_evolucao_ranking', 'minimo_jogos', 'diferenca_pontos', 'diferenca_assistencias', 'diferenca_rebotes'),
+        Index('ix_evolucao_temporada_anterior', 'temporada_anterior'),
+    )
+
+class AgregadoTemporada(Base):
+    # Resumo por temporada das métricas por jogo, reconstruído pelo ETL (etl/materializacao.py).
+    # Guarda contagem, soma e soma dos quadrados para derivar média e desvio padrão,
+    # e os melhores jogadores de cada métrica como JSON.
+    __tablename__ = 'agregados_temporada'
+    temporada = Column(String(10), primary_key=True)
+    total_linhas = Column(Integer, nullable=False)
+    total_jogadores = Column(Integer, nullable=False)
+    soma_pontos_por_jogo = Column(Float, nullable=False)
+    soma_quadrados_pontos_por_jogo = Column(Float, nullable=False)
+    soma_assistencias_por_jogo = Column(Float, nullable=False)
+    soma_quadrados_assistencias_por_jogo = Column(Float, nullable=False)
+    soma_rebotes_por_jogo = Column(Float, nullable=False)
+    soma_quadrados_rebotes_por_jogo = Column(Float, nullable=False)
+    top_pontos_por_jogo = Column(Text, nullable=False)
+    top_assistencias_por_jogo = Column(Text, nullable=False)
+    top_rebotes_por_jogo = Column(Text, nullable=False)
+
+class EstatisticaJogo(Base):
+    # Game log: uma linha por jogador e jogo, carregada por etl/jogos.py uma temporada por vez.
+    # A chave primária (id_jogador, data_jogo, id_jogo) é a ordem física da tabela no InnoDB
+    # (e no SQLite, sem rowid), então "últimos N jogos do jogador X" lê um trecho contíguo.
+    # Sem chave estrangeira, como em evolucao_temporada, para não prender 'jogadores' na troca.
+    __tablename__ = 'estatisticas_jogo'
+    id_jogador = Column(Integer, primary_key=True)
+    data_jogo = Column(Date, primary_key=True)
+    id_jogo = Column(Integer, primary_key=True)
+    temporada = Column(String(10), nullable=False)
+    id_time = Column(Integer, nullable=False)
+    adversario = Column(String(5), nullable=False)
+    mandante = Column(Boolean, nullable=False)
+    vitoria = Column(Boolean, nullable=False)
+    minutos = Column(Float, nullable=False)
+    pontos = Column(SmallInteger, nullable=False)
+    rebotes = Column(SmallInteger, nullable=False)
+    assistencias = Column(SmallInteger, nullable=False)
+    roubos = Column(SmallInteger, nullable=False)
+    tocos = Column(SmallInteger, nullable=False)
+    erros = Column(SmallInteger, nullable=False)
+    arremessos_convertidos = Column(SmallInteger, nullable=False)
+    arremessos_tentados = Column(SmallInteger, nullable=False)
+    arremessos_3pts_convertidos = Column(SmallInteger, nullable=False)
+    arremessos_3pts_tentados = Column(SmallInteger, nullable=False)
+    lances_livres_convertidos = Column(SmallInteger, nullable=False)
+    lances_livres_tentados = Column(SmallInteger, nullable=False)
+    saldo_pontos = Column(SmallInteger, nullable=False)
+    __table_args__ = (
+        # Substituição de uma temporada inteira na carga
+        Index('ix_estatisticas_jogo_temporada', 'temporada'),
+        {'sqlite_with_rowid': False},
+    )
+
+class VersaoCarga(Base):
+    # Marcador de publicação: o ETL incrementa 'versao' do conjunto ('temporadas', 'jogos')
+    # ao fim de cada carga, e o dashboard descarta o cache das consultas daquele conjunto.
+    __tablename__ = 'versoes_carga'
+    conjunto = Column(String(20), primary_key=True)
+    versao = Column(Integer, nullable=False)
+    atualizado_em = Column(DateTime, nullable=False)
+
+# %%
+
+_engine = None
+_trava_engine = threading.Lock()
+_trava_metricas = threading.Lock()
+_metricas = {
+    'checkouts': 0, 'conexoes_abertas': 0, 'invalidadas': 0, 'em_uso': 0, 'pico_em_uso': 0,
+    'conexoes_medidas': 0, 'espera_total_ms': 0.0, 'espera_maxima_ms': 0.0
+}
+_sessoes = None
+
+def _registrar_eventos(pool):
+    @event.listens_for(pool, 'connect')
+    def _ao_conectar(dbapi_connection, connection_record):
+        with _trava_metricas:
+            _metricas['conexoes_abertas'] += 1
+
+    @event.listens_for(pool, 'checkout')
+    def _ao_retirar(dbapi_connection, connection_record, connection_proxy):
+        with _trava_metricas:
+            _metricas['checkouts'] += 1
+            _metricas['em_uso'] += 1
+            _metricas['pico_em_uso'] = max(_metricas['pico_em_uso'], _metricas['em_uso'])
+
+    @event.listens_for(pool, 'checkin')
+    def _ao_devolver(dbapi_connection, connection_record):
+        with _trava_metricas:
+            _metricas['em_uso'] = max(0, _metricas['em_uso'] - 1)
+
+    @event.listens_for(pool, 'invalidate')
+    def _ao_invalidar(dbapi_connection, connection_record, exception):
+        with _trava_metricas:
+            _metricas['invalidadas'] += 1
+
+def _opcoes_engine(url):
+    opcoes = {'pool_pre_ping': DB_POOL_PRE_PING, 'pool_recycle': DB_POOL_RECYCLE}
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return opcoes # SQLite em memória usa um pool próprio, de uma conexão por thread
+    opcoes.update({
+        'poolclass': QueuePool, 'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW, 'pool_timeout': DB_POOL_TIMEOUT
+    })
+    if DB_LOCAL_INFILE and url.get_backend_name() == 'mysql':
+        opcoes['connect_args'] = {'local_infile': True}
+    return opcoes
+
+def obter_engine():
+    """Retorna o engine compartilhado, criando-o no primeiro uso.
+
+    Nenhuma conexão é aberta aqui: o pool abre conexões sob demanda e, com
+    pre-ping, descarta as que o servidor fechou antes de entregá-las.
+    """
+    global _engine
+    if _engine is not None:
+        return _engine
+    with _trava_engine:
+        if _engine is None:
+            if not DATABASE_URL and not all([DB_HOST, DB_NAME, DB_USER, DB_PASSWORD]):
+                raise ValueError("Erro: Variáveis de ambiente do banco de dados não carregadas. Verifique o arquivo .env e o caminho.")
+            url = make_url(DATABASE_URL or f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}")
+            engine_criado = create_engine(url, **_opcoes_engine(url))
+            _registrar_eventos(engine_criado.pool)
+            _engine = engine_criado
+            print(f"Engine criado para '{_engine.url.render_as_string(hide_password=True)}' via SQLAlchemy (Módulo db_setup).")
+    return _engine
+
+@contextmanager
+def conectar():
+    """Conexão do engine compartilhado, medindo quanto levou para obtê-la.
+
+    O tempo medido vai do pedido até a conexão chegar: fila do pool, abertura
+    de conexão nova e pre-ping. É a espera que metricas_pool() reporta, então
+    só conta para quem conecta por aqui (o dashboard, via dados.py).
+    """
+    engine_atual = obter_engine()
+    inicio = time.perf_counter()
+    with engine_atual.connect() as conn:
+        espera_ms = (time.perf_counter() - inicio) * 1000
+        with _trava_metricas:
+            _metricas['espera_total_ms'] += espera_ms
+            _metricas['espera_maxima_ms'] = max(_metricas['espera_maxima_ms'], espera_ms)
+            _metricas['conexoes_medidas'] += 1
+        yield conn
 
-try:
-    SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
-    with engine.connect() as connection:
-        pass 
+def metricas_pool():
+    """Retorna contadores do pool: checkouts, conexões abertas, uso atual e de pico, e espera por conexão."""
+    with _trava_metricas:
+        metricas = dict(_metricas)
+    medidas = metricas['conexoes_medidas']
+    metricas['espera_media_ms'] = round(metricas['espera_total_ms'] / medidas, 3) if medidas else 0.0
+    metricas['espera_total_ms'] = round(metricas['espera_total_ms'], 3)
+    metricas['espera_maxima_ms'] = round(metricas['espera_maxima_ms'], 3)
+    metricas['status'] = _engine.pool.status() if _engine is not None else 'engine ainda não criado'
+    return metricas
 
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    print(f"Conectado ao servidor MySQL em '{DB_HOST}' via SQLAlchemy (Módulo db_setup).")
-except Exception as e:
-    raise ConnectionError(f"Erro CRÍTICO ao conectar ao banco de dados no módulo db_setup: {e}")
\ No newline at end of file
+def __getattr__(nome):
+    # Compatibilidade: 'from dashboard.db_setup import engine' (ou SessionLocal) continua funcionando e cria o engine só nesse momento.
+    global _sessoes
+    if nome == 'engine':
+        return obter_engine()
+    if nome == 'SessionLocal':
+        if _sessoes is None:
+            _sessoes = sessionmaker(autocommit=False, autoflush=False, bind=obter_engine())
+        return _sessoes
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
@@ -0,0 +1,307 @@
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import functools
+import json
+import math
+import os
+import statistics
+import sys
+import threading
+import time
+
+# %%
+
+script_dir = Path(__file__).resolve().parent
+src_dir = script_dir.parent
+
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+# %%
+# Instrumentação opcional do dashboard (DASHBOARD_DIAGNOSTICO=1). Em cada
+# rerun do app.py, cada função de dados decorada com @medido registra
+# latência, linhas devolvidas, erro engolido pelo st.error e as consultas que
+# fez em dados.py: de onde veio cada resultado (cache em memória, em disco
+# ou banco) e uma estimativa dos bytes recebidos do banco. Os gráficos
+# registrados entram com o tamanho do JSON enviado ao navegador.
+#
+# Saídas: o painel escondido do app (?diagnostico=1 na URL), uma linha JSON
+# por rerun em DASHBOARD_DIAGNOSTICO_LOG e os contadores acumulados no
+# formato texto do Prometheus, num arquivo (DASHBOARD_DIAGNOSTICO_PROM, para
+# o textfile collector do node_exporter) e/ou em /metrics na porta
+# DASHBOARD_DIAGNOSTICO_PORTA, só em 127.0.0.1 a menos que
+# DASHBOARD_DIAGNOSTICO_HOST diga outro endereço. Desligado, @medido devolve a própria função
+# e as demais chamadas retornam sem fazer nada.
+
+ATIVO = os.getenv('DASHBOARD_DIAGNOSTICO', '0') == '1'
+ARQUIVO_LOG = os.getenv('DASHBOARD_DIAGNOSTICO_LOG')
+ARQUIVO_PROMETHEUS = os.getenv('DASHBOARD_DIAGNOSTICO_PROM')
+PORTA_PROMETHEUS = int(os.getenv('DASHBOARD_DIAGNOSTICO_PORTA', 0))
+HOST_PROMETHEUS = os.getenv('DASHBOARD_DIAGNOSTICO_HOST', '127.0.0.1') # '0.0.0.0' expõe o /metrics na rede
+EXECUCOES_GUARDADAS = 200 # Reruns recentes usados nos percentis do painel
+LIMITES_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_execucao = ContextVar('execucao_diagnosticada', default=None) # Rerun em andamento na thread da sessão
+_trava = threading.Lock()
+_recentes = deque(maxlen=EXECUCOES_GUARDADAS)
+_acumulado = {'execucoes': 0, 'execucao': None, 'funcoes': {}, 'consultas': {}, 'graficos': {}}
+_servidor = {'iniciado': False}
+
+# %%
+
+def _histograma():
+    return {'baldes': [0] * len(LIMITES_SEGUNDOS), 'soma': 0.0, 'contagem': 0}
+
+def _observar(histograma, segundos):
+    for i, limite in enumerate(LIMITES_SEGUNDOS):
+        if segundos <= limite:
+            histograma['baldes'][i] += 1
+    histograma['soma'] += segundos
+    histograma['contagem'] += 1
+
+def _linhas(resultado):
+    if resultado is None:
+        return 0
+    return int(bool(resultado)) if isinstance(resultado, dict) else len(resultado)
+
+# %%
+
+def iniciar_execucao():
+    """Abre o registro do rerun atual; o app.py usa execucao(), que também o fecha."""
+    if not ATIVO:
+        return
+    from dashboard import dados # Aqui e não no topo: desligado, o módulo não puxa pandas nem SQLAlchemy
+
+    _iniciar_servidor()
+    execucao = {
+        'inicio': datetime.now().isoformat(timespec='seconds'), 'relogio': time.perf_counter(),
+        'chamadas': [], 'consultas': [], 'graficos': [], 'aberta': None
+    }
+    execucao['token'] = dados.rastrear_consultas(execucao['consultas'])
+    _execucao.set(execucao)
+
+def medido(funcao):
+    """Decorador das funções de dados do app: registra latência, linhas, erro e as consultas feitas durante a chamada."""
+    if not ATIVO:
+        return funcao
+
+    @functools.wraps(funcao)
+    def medida(*args, **kwargs):
+        execucao = _execucao.get()
+        if execucao is None:
+            return funcao(*args, **kwargs)
+        chamada = {'funcao': funcao.__name__, 'erro': None}
+        anterior, execucao['aberta'] = execucao['aberta'], chamada
+        primeira_consulta = len(execucao['consultas'])
+        resultado = None
+        inicio = time.perf_counter()
+        try:
+            resultado = funcao(*args, **kwargs)
+            return resultado
+        except Exception as e:
+            chamada['erro'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            consultas = execucao['consultas'][primeira_consulta:]
+            chamada.update({
+                'ms': round((time.perf_counter() - inicio) * 1000, 3),
+                'linhas': _linhas(resultado),
+                'consultas': len(consultas),
+                'acertos_cache': sum(c['origem'] != 'banco' for c in consultas),
+                'faltas_cache': sum(c['origem'] == 'banco' for c in consultas),
+                'bytes_banco': sum(c['bytes_banco'] for c in consultas)
+            })
+            execucao['aberta'] = anterior
+            execucao['chamadas'].append(chamada)
+    return medida
+
+def registrar_erro(erro):
+    """Marca a chamada em andamento com o erro que a função vai mostrar com st.error em vez de propagar."""
+    execucao = _execucao.get()
+    if execucao is not None and execucao['aberta'] is not None:
+        execucao['aberta']['erro'] = f"{type(erro).__name__}: {erro}"
+
+def registrar_grafico(nome, figura):
+    """Registra o tamanho do JSON da figura plotly que vai para o navegador."""
+    execucao = _execucao.get()
+    if execucao is None:
+        return
+    inicio = time.perf_counter()
+    tamanho = len(figura.to_json())
+    execucao['graficos'].append({
+        'grafico': nome, 'bytes': tamanho, 'marcadores': sum(len(trace.x) for trace in figura.data if trace.x is not None),
+        'ms_serializacao': round((time.perf_counter() - inicio) * 1000, 3)
+    })
+
+def finalizar_execucao():
+    """Fecha o rerun atual, acumula os contadores e grava as saídas configuradas; retorna o resumo do rerun (ou None)."""
+    execucao = _execucao.get()
+    if execucao is None:
+        return None
+    _execucao.set(None)
+    from dashboard import dados
+    dados.parar_rastreio(execucao.pop('token'))
+    resumo = {
+        'inicio': execucao['inicio'],
+        'ms': round((time.perf_counter() - execucao['relogio']) * 1000, 3),
+        'chamadas': execucao['chamadas'],
+        'consultas': execucao['consultas'],
+        'graficos': execucao['graficos']
+    }
+
+    with _trava:
+        _recentes.append(resumo)
+        _acumulado['execucoes'] += 1
+        if _acumulado['execucao'] is None:
+            _acumulado['execucao'] = _histograma()
+        _observar(_acumulado['execucao'], resumo['ms'] / 1000)
+        for chamada in resumo['chamadas']:
+            f = _acumulado['funcoes'].setdefault(chamada['funcao'], {'tempo': _histograma(), 'erros': 0, 'linhas': 0, 'bytes_banco': 0})
+            _observar(f['tempo'], chamada['ms'] / 1000)
+            f['erros'] += chamada['erro'] is not None
+            f['linhas'] += chamada['linhas']
+            f['bytes_banco'] += chamada['bytes_banco']
+        for consulta in resumo['consultas']:
+            chave = (consulta['consulta'], consulta['origem'])
+            _acumulado['consultas'][chave] = _acumulado['consultas'].get(chave, 0) + 1
+        for grafico in resumo['graficos']:
+            g = _acumulado['graficos'].setdefault(grafico['grafico'], {'renderizacoes': 0, 'bytes': 0})
+            g['renderizacoes'] += 1
+            g['bytes'] += grafico['bytes']
+
+    if ARQUIVO_LOG:
+        Path(ARQUIVO_LOG).parent.mkdir(parents=True, exist_ok=True)
+        with open(ARQUIVO_LOG, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(json.dumps(resumo, ensure_ascii=False, default=str) + '\n')
+    if ARQUIVO_PROMETHEUS:
+        destino = Path(ARQUIVO_PROMETHEUS)
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        temporario = destino.with_name(f"{destino.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        temporario.write_text(texto_prometheus(), encoding='utf-8')
+        os.replace(temporario, destino) # O coletor nunca lê um arquivo pela metade
+    return resumo
+
+@contextmanager
+def execucao():
+    """Registra o corpo do bloco 'with' como um rerun: iniciar_execucao na entrada, finalizar_execucao na saída.
+
+    A saída roda mesmo quando o rerun é interrompido (st.stop, RerunException
+    de um widget mexido no meio). O dict devolvido recebe o resumo do rerun ao
+    fim do bloco e fica vazio com o diagnóstico desligado.
+    """
+    resumo = {}
+    iniciar_execucao()
+    try:
+        yield resumo
+    finally:
+        resumo.update(finalizar_execucao() or {})
+
+# %%
+
+def resumo_funcoes():
+    """Por função, nos reruns recentes: chamadas, p50/p95/máximo em ms, fração do tempo dos reruns, faltas de cache e bytes do banco."""
+    with _trava:
+        recentes = list(_recentes)
+    total_ms = sum(r['ms'] for r in recentes)
+    por_funcao = {}
+    for resumo in recentes:
+        for chamada in resumo['chamadas']:
+            por_funcao.setdefault(chamada['funcao'], []).append(chamada)
+    linhas = []
+    for nome, chamadas in por_funcao.items():
+        tempos = sorted(c['ms'] for c in chamadas)
+        linhas.append({
+            'funcao': nome,
+            'chamadas': len(chamadas),
+            'p50_ms': round(statistics.median(tempos), 3),
+            'p95_ms': round(tempos[math.ceil(len(tempos) * 0.95) - 1], 3),
+            'max_ms': tempos[-1],
+            'fracao_do_rerun': round(sum(tempos) / total_ms, 4) if total_ms else 0.0,
+            'faltas_cache': sum(c['faltas_cache'] for c in chamadas),
+            'bytes_banco': sum(c['bytes_banco'] for c in chamadas),
+            'erros': sum(c['erro'] is not None for c in chamadas)
+        })
+    return sorted(linhas, key=lambda linha: linha['fracao_do_rerun'], reverse=True)
+
+def _rotulos(**rotulos):
+    return ','.join(f'{nome}="{str(valor)}"' for nome, valor in rotulos.items())
+
+def _linhas_histograma(metrica, histograma, **rotulos):
+    prefixo = f"{_rotulos(**rotulos)}," if rotulos else ''
+    linhas = [f'{metrica}_bucket{{{prefixo}le="{limite}"}} {n}' for limite, n in zip(LIMITES_SEGUNDOS, histograma['baldes'])]
+    linhas.append(f'{metrica}_bucket{{{prefixo}le="+Inf"}} {histograma["contagem"]}')
+    sufixo = f"{{{_rotulos(**rotulos)}}}" if rotulos else ''
+    linhas.append(f"{metrica}_sum{sufixo} {histograma['soma']:.6f}")
+    linhas.append(f"{metrica}_count{sufixo} {histograma['contagem']}")
+    return linhas
+
+def texto_prometheus():
+    """Contadores acumulados desde o início do processo no formato de exposição em texto do Prometheus."""
+    with _trava:
+        linhas = [
+            '# HELP dashboard_execucoes_total Reruns do app.py diagnosticados.',
+            '# TYPE dashboard_execucoes_total counter',
+            f"dashboard_execucoes_total {_acumulado['execucoes']}",
+            '# HELP dashboard_execucao_segundos Duração de cada rerun do app.py.',
+            '# TYPE dashboard_execucao_segundos histogram',
+            *_linhas_histograma('dashboard_execucao_segundos', _acumulado['execucao'] or _histograma()),
+            '# HELP dashboard_funcao_segundos Latência das funções de dados do app.py.',
+            '# TYPE dashboard_funcao_segundos histogram'
+        ]
+        for nome, f in sorted(_acumulado['funcoes'].items()):
+            linhas.extend(_linhas_histograma('dashboard_funcao_segundos', f['tempo'], funcao=nome))
+        for metrica, campo, descricao in (
+            ('dashboard_funcao_erros_total', 'erros', 'Erros mostrados com st.error pelas funções de dados.'),
+            ('dashboard_funcao_linhas_total', 'linhas', 'Linhas devolvidas pelas funções de dados.'),
+            ('dashboard_funcao_bytes_banco_total', 'bytes_banco', 'Bytes recebidos do banco (estimativa pelo tamanho Arrow do resultado).')
+        ):
+            linhas += [f"# HELP {metrica} {descricao}", f"# TYPE {metrica} counter"]
+            linhas += [f"{metrica}{{{_rotulos(funcao=nome)}}} {f[campo]}" for nome, f in sorted(_acumulado['funcoes'].items())]
+        linhas += ['# HELP dashboard_consultas_total Consultas de dados.py por origem do resultado (memoria, disco ou banco).',
+                   '# TYPE dashboard_consultas_total counter']
+        linhas += [f"dashboard_consultas_total{{{_rotulos(consulta=consulta, origem=origem)}}} {n}"
+                   for (consulta, origem), n in sorted(_acumulado['consultas'].items())]
+        linhas += ['# HELP dashboard_grafico_bytes_total Bytes de JSON das figuras enviadas ao navegador.',
+                   '# TYPE dashboard_grafico_bytes_total counter']
+        linhas += [f"dashboard_grafico_bytes_total{{{_rotulos(grafico=nome)}}} {g['bytes']}" for nome, g in sorted(_acumulado['graficos'].items())]
+        linhas += ['# HELP dashboard_grafico_renderizacoes_total Figuras enviadas ao navegador.',
+                   '# TYPE dashboard_grafico_renderizacoes_total counter']
+        linhas += [f"dashboard_grafico_renderizacoes_total{{{_rotulos(grafico=nome)}}} {g['renderizacoes']}" for nome, g in sorted(_acumulado['graficos'].items())]
+    return '\n'.join(linhas) + '\n'
+
+# %%
+
+class _ManipuladorMetricas(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        corpo = texto_prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass # Sem uma linha no terminal a cada coleta
+
+def _iniciar_servidor():
+    """Sobe, uma vez por processo, o /metrics em HOST_PROMETHEUS:PORTA_PROMETHEUS numa thread daemon."""
+    if not PORTA_PROMETHEUS or _servidor['iniciado']:
+        return
+    with _trava:
+        if _servidor['iniciado']:
+            return
+        _servidor['iniciado'] = True
+        try:
+            servidor = ThreadingHTTPServer((HOST_PROMETHEUS, PORTA_PROMETHEUS), _ManipuladorMetricas)
+        except OSError as e:
+            print(f"Não foi possível abrir /metrics em {HOST_PROMETHEUS}:{PORTA_PROMETHEUS}: {e}")
+            return
+        threading.Thread(target=servidor.serve_forever, name='diagnostico-metrics', daemon=True).start()
+        print(f"Métricas do dashboard em http://{HOST_PROMETHEUS}:{PORTA_PROMETHEUS}/metrics")
@@ -0,0 +1,89 @@
+import os
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+# %%
+# Gráfico de dispersão com nível de detalhe decidido no servidor. Com poucos
+# pontos na faixa visível, cada jogador vira um marcador (WebGL a partir de
+# LIMITE_SVG, como o plotly faria). Acima de LIMITE_PONTOS os pontos são
+# agregados numa grade BINS x BINS: vai para o navegador um marcador por
+# célula ocupada, com tamanho e cor pela contagem, mais os DESTAQUES jogadores
+# extremos de cada eixo com nome. Estreitar a faixa (os controles de zoom do
+# dashboard) refaz o gráfico só com os pontos dela, voltando a mostrar
+# jogadores individuais quando cabem no limite.
+
+LIMITE_SVG = int(os.getenv('DASHBOARD_LIMITE_SVG', 1000))
+LIMITE_PONTOS = int(os.getenv('DASHBOARD_LIMITE_PONTOS', 5000))
+BINS = int(os.getenv('DASHBOARD_BINS_DISPERSAO', 60))
+DESTAQUES = 25
+MODOS = ('auto', 'pontos', 'grade')
+
+# %%
+
+def filtrar_faixa(df, x, y, faixa_x=None, faixa_y=None):
+    """Linhas de df dentro das faixas [min, max] de x e y (None = sem limite)."""
+    mascara = np.ones(len(df), dtype=bool)
+    for coluna, faixa in ((x, faixa_x), (y, faixa_y)):
+        if faixa is not None:
+            valores = df[coluna].to_numpy()
+            mascara &= (valores >= faixa[0]) & (valores <= faixa[1])
+    return df if mascara.all() else df[mascara]
+
+def _grade(df, x, y, tamanho, rotulo, labels):
+    contagem, bordas_x, bordas_y = np.histogram2d(df[x].to_numpy(), df[y].to_numpy(), bins=BINS)
+    soma_tamanho, _, _ = np.histogram2d(df[x].to_numpy(), df[y].to_numpy(), bins=[bordas_x, bordas_y], weights=df[tamanho].to_numpy())
+    ix, iy = np.nonzero(contagem)
+    n = contagem[ix, iy]
+    centros_x = ((bordas_x[:-1] + bordas_x[1:]) / 2)[ix]
+    centros_y = ((bordas_y[:-1] + bordas_y[1:]) / 2)[iy]
+    media_tamanho = soma_tamanho[ix, iy] / n
+
+    fig = go.Figure(go.Scattergl(
+        x=centros_x.astype('float32'), y=centros_y.astype('float32'), mode='markers', name='Jogadores agrupados',
+        marker={'size': (4 + 3 * np.sqrt(n)).astype('float32'), 'color': n.astype('int32'), 'colorscale': 'Blues',
+                'showscale': True, 'colorbar': {'title': 'Jogadores'}, 'opacity': 0.7},
+        customdata=np.column_stack([n, media_tamanho]).astype('float32'),
+        hovertemplate=(f"{labels.get(x, x)}: %{{x:.1f}}<br>{labels.get(y, y)}: %{{y:.1f}}<br>"
+                       f"%{{customdata[0]:.0f}} jogadores<br>{labels.get(tamanho, tamanho)} (média): %{{customdata[1]:.0f}}<extra></extra>")
+    ))
+
+    indices = pd.Index(df[x].nlargest(DESTAQUES).index).union(df[y].nlargest(DESTAQUES).index)
+    destaques = df.loc[indices]
+    fig.add_trace(go.Scattergl(
+        x=destaques[x].astype('float32'), y=destaques[y].astype('float32'), mode='markers', name='Destaques',
+        marker={'size': 7, 'color': '#d62728'}, text=destaques[rotulo],
+        hovertemplate=f"%{{text}}<br>{labels.get(x, x)}: %{{x:.2f}}<br>{labels.get(y, y)}: %{{y:.2f}}<extra></extra>"
+    ))
+    return fig, len(ix) + len(destaques)
+
+def grafico_dispersao(df, x, y, tamanho, rotulo, titulo, labels, faixa_x=None, faixa_y=None, modo='auto', height=820):
+    """Monta o scatter de x contra y só com a faixa visível, no nível de detalhe adequado.
+
+    'modo' é 'auto' (jogadores individuais até LIMITE_PONTOS, grade acima),
+    'pontos' ou 'grade'. Retorna (figura, dict com o modo usado, pontos no
+    total, pontos na faixa e marcadores enviados ao navegador).
+    """
+    if modo not in MODOS:
+        raise ValueError(f"Modo de dispersão desconhecido: '{modo}'. Use um de {MODOS}.")
+    visiveis = filtrar_faixa(df, x, y, faixa_x, faixa_y)
+    if modo == 'auto':
+        modo = 'pontos' if len(visiveis) <= LIMITE_PONTOS else 'grade'
+
+    if modo == 'grade' and len(visiveis):
+        fig, marcadores = _grade(visiveis, x, y, tamanho, rotulo, labels)
+        fig.update_layout(title=titulo, height=height, xaxis_title=labels.get(x, x), yaxis_title=labels.get(y, y))
+    else:
+        modo = 'pontos'
+        fig = px.scatter(
+            visiveis, x=x, y=y, size=tamanho, hover_name=rotulo, title=titulo, labels=labels, height=height,
+            render_mode='webgl' if len(visiveis) > LIMITE_SVG else 'svg'
+        )
+        marcadores = len(visiveis)
+
+    if faixa_x is not None:
+        fig.update_xaxes(range=list(faixa_x))
+    if faixa_y is not None:
+        fig.update_yaxes(range=list(faixa_y))
+    return fig, {'modo': modo, 'pontos_totais': len(df), 'pontos_visiveis': len(visiveis), 'marcadores': marcadores}
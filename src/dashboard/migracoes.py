@@ -0,0 +1,154 @@
+from sqlalchemy import inspect, text, MetaData
+from sqlalchemy.schema import AddConstraint
+from pathlib import Path
+import argparse
+import sys
+
+# %%
+
+script_dir = Path(__file__).resolve().parent
+src_dir = script_dir.parent
+
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+from dashboard.db_setup import obter_engine, Base, EstatisticaTemporada, EvolucaoTemporada, AgregadoTemporada, EstatisticaJogo
+from dashboard.consultas import CONSULTA_EVOLUCAO, CONSULTA_TEMPORADAS, CONSULTA_ESTATISTICAS_TEMPORADA, CONSULTA_AGREGADOS_TEMPORADA, CONSULTA_ULTIMOS_JOGOS, CONSULTA_CARREIRA_JOGADOR
+
+# %%
+
+# Tabelas (e os aliases usados em consultas.py) que nunca devem ser varridas por inteiro
+ALIASES_VERIFICADOS = (
+    'et', EstatisticaTemporada.__tablename__,
+    'ev', EvolucaoTemporada.__tablename__,
+    'ag', AgregadoTemporada.__tablename__,
+    'ej', EstatisticaJogo.__tablename__
+)
+
+# %%
+
+def _colunas_a_liberar(conn, tabela):
+    """Colunas que o modelo declara anuláveis e que o banco ainda tem como NOT NULL."""
+    no_banco = {coluna['name']: coluna['nullable'] for coluna in inspect(conn).get_columns(tabela.name)}
+    return [c for c in tabela.columns if c.nullable and not c.primary_key and no_banco.get(c.name) is False]
+
+def _liberar_nulos(conn, tabela, colunas):
+    if conn.dialect.name != 'sqlite':
+        for coluna in colunas:
+            if conn.dialect.name == 'mysql':
+                conn.execute(text(f"ALTER TABLE {tabela.name} MODIFY {coluna.name} {coluna.type.compile(dialect=conn.dialect)} NULL"))
+            else:
+                conn.execute(text(f"ALTER TABLE {tabela.name} ALTER COLUMN {coluna.name} DROP NOT NULL"))
+        return
+
+    # O SQLite não altera a nulidade de uma coluna: a tabela é recriada pelo modelo, com os
+    # dados copiados, e os índices (nomes globais no SQLite) são criados depois, pelo modelo.
+    metadata = MetaData()
+    for fk in tabela.foreign_keys:
+        fk.column.table.to_metadata(metadata)
+    temporaria = tabela.to_metadata(metadata, name=f"{tabela.name}_migracao")
+    temporaria.indexes.clear()
+    temporaria.create(conn)
+    colunas_copiadas = ', '.join(c['name'] for c in inspect(conn).get_columns(tabela.name) if c['name'] in temporaria.c)
+    conn.execute(text(f"INSERT INTO {temporaria.name} ({colunas_copiadas}) SELECT {colunas_copiadas} FROM {tabela.name}"))
+    conn.execute(text(f"DROP TABLE {tabela.name}"))
+    conn.execute(text(f"ALTER TABLE {temporaria.name} RENAME TO {tabela.name}"))
+
+def aplicar_migracoes(engine_destino=None):
+    """Cria em um banco existente as tabelas, chaves únicas e índices declarados nos modelos que ainda faltam.
+
+    Também remove o NOT NULL de colunas que o modelo passou a aceitar nulas
+    (os percentuais de 'estatisticas_temporada'). É idempotente: compara o
+    que existe no banco (via inspector) com o Base.metadata e só emite o DDL
+    que falta. Retorna os nomes criados ou alterados.
+    """
+    engine_destino = engine_destino or obter_engine()
+    criados = []
+    Base.metadata.create_all(engine_destino)
+
+    with engine_destino.begin() as conn:
+        for tabela in Base.metadata.sorted_tables:
+            colunas = _colunas_a_liberar(conn, tabela)
+            if colunas:
+                _liberar_nulos(conn, tabela, colunas)
+                criados.extend(f"{tabela.name}.{c.name} NULL" for c in colunas)
+
+    with engine_destino.begin() as conn:
+        inspetor = inspect(conn)
+        for tabela in Base.metadata.sorted_tables:
+            existentes = {idx['name'] for idx in inspetor.get_indexes(tabela.name)}
+            existentes |= {uc['name'] for uc in inspetor.get_unique_constraints(tabela.name)}
+
+            for restricao in tabela.constraints:
+                if restricao.__visit_name__ != 'unique_constraint' or restricao.name in existentes:
+                    continue
+                if conn.dialect.name == 'sqlite':
+                    # O SQLite não aceita ALTER TABLE ADD CONSTRAINT; um índice único tem o mesmo efeito.
+                    colunas = ', '.join(c.name for c in restricao.columns)
+                    conn.execute(text(f"CREATE UNIQUE INDEX {restricao.name} ON {tabela.name} ({colunas})"))
+                else:
+                    conn.execute(AddConstraint(restricao))
+                criados.append(restricao.name)
+
+            for indice in tabela.indexes:
+                if indice.name not in existentes:
+                    indice.create(conn)
+                    criados.append(indice.name)
+    return criados
+
+# %%
+
+def _plano(conn, consulta, parametros):
+    if conn.dialect.name == 'sqlite':
+        return [dict(linha._mapping) for linha in conn.execute(text(f"EXPLAIN QUERY PLAN {consulta.text}"), parametros)]
+    return [dict(linha._mapping) for linha in conn.execute(text(f"EXPLAIN {consulta.text}"), parametros)]
+
+def _varredura_completa(conn, linha):
+    if conn.dialect.name == 'sqlite':
+        detalhe = linha['detail']
+        return any(detalhe.startswith(f"SCAN {alias}") for alias in ALIASES_VERIFICADOS) and 'USING' not in detalhe
+    return linha.get('table') in ALIASES_VERIFICADOS and linha.get('type') == 'ALL'
+
+def verificar_uso_de_indices(engine_destino=None, temporada=None):
+    """Roda EXPLAIN nas consultas do dashboard e aponta as que varrem uma tabela de ALIASES_VERIFICADOS sem índice.
+
+    Retorna um dict {nome_da_consulta: [linhas do plano com varredura completa]};
+    vazio significa que todas as consultas usam índice.
+    """
+    engine_destino = engine_destino or obter_engine()
+    problemas = {}
+    with engine_destino.connect() as conn:
+        if temporada is None:
+            temporada = conn.execute(CONSULTA_TEMPORADAS).scalar() or ''
+        consultas = {
+            'get_player_evolution_data': (CONSULTA_EVOLUCAO, {}),
+            'get_all_seasons_from_db': (CONSULTA_TEMPORADAS, {}),
+            'get_seasonal_player_stats': (CONSULTA_ESTATISTICAS_TEMPORADA, {'temporada': temporada}),
+            'get_season_aggregates': (CONSULTA_AGREGADOS_TEMPORADA, {'temporada': temporada}),
+            'ultimos_jogos': (CONSULTA_ULTIMOS_JOGOS, {'id_jogador': 0, 'limite': 10}),
+            'get_player_career': (CONSULTA_CARREIRA_JOGADOR, {'id_jogador': 0})
+        }
+        for nome, (consulta, parametros) in consultas.items():
+            plano = _plano(conn, consulta, parametros)
+            varreduras = [linha for linha in plano if _varredura_completa(conn, linha)]
+            if varreduras:
+                problemas[nome] = varreduras
+    return problemas
+
+# %%
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aplica os índices do esquema e confere os planos das consultas do dashboard.")
+    parser.add_argument('--somente-verificar', action='store_true', help="Não aplica migrações, só roda o EXPLAIN.")
+    args = parser.parse_args()
+
+    if not args.somente_verificar:
+        criados = aplicar_migracoes()
+        print(f"Migrações aplicadas: {', '.join(criados)}" if criados else "Esquema já está atualizado.")
+
+    problemas = verificar_uso_de_indices()
+    if problemas:
+        for nome, linhas in problemas.items():
+            print(f"Consulta '{nome}' faz varredura completa: {linhas}")
+        sys.exit(1)
+    print("Todas as consultas do dashboard usam índice.")
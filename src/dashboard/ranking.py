@@ -0,0 +1,72 @@
+import numpy as np
+
+# %%
+# Métricas que podem ser ranqueadas em "Melhores da Temporada". Para uma
+# métrica nova basta a coluna existir nas estatísticas da temporada
+# (consultas.py) e uma entrada aqui: o selectbox, o título do gráfico e os
+# índices de ranking do motor em memória (analitico.py) saem desta tabela.
+# Percentuais só valem para quem jogou 'minimo_jogos', senão o topo fica com
+# quem acertou o único arremesso que tentou.
+
+MINIMO_JOGOS_PERCENTUAIS = 50
+
+METRICAS_RANKING = {
+    "Pontos p/ jogo": {'coluna': 'pontos_por_jogo', 'frase': 'com mais pontos'},
+    "Assistências p/ jogo": {'coluna': 'assistencias_por_jogo', 'frase': 'com mais assistências'},
+    "Rebotes p/ jogo": {'coluna': 'rebotes_por_jogo', 'frase': 'com mais rebotes'},
+    "% de arremessos de quadra": {
+        'coluna': 'perc_arremessos_quadra', 'frase': 'com melhor aproveitamento nos arremessos de quadra',
+        'minimo_jogos': MINIMO_JOGOS_PERCENTUAIS
+    },
+    "% de arremessos de 3 pontos": {
+        'coluna': 'perc_arremessos_3pts', 'frase': 'com melhor aproveitamento nos arremessos de 3 pontos',
+        'minimo_jogos': MINIMO_JOGOS_PERCENTUAIS
+    },
+    "% de lances livres": {
+        'coluna': 'perc_lances_livres', 'frase': 'com melhor aproveitamento nos lances livres',
+        'minimo_jogos': MINIMO_JOGOS_PERCENTUAIS
+    },
+}
+MINIMO_JOGOS_POR_COLUNA = {m['coluna']: m.get('minimo_jogos', 0) for m in METRICAS_RANKING.values()}
+
+# %%
+
+def ordem_decrescente(df, coluna):
+    """Posições (relativas a df) das linhas elegíveis, da maior para a menor 'coluna'.
+
+    Ficam de fora valores nulos e, nas métricas com mínimo, quem jogou menos
+    jogos. Empates mantêm a ordem de df, como em nlargest(keep='first').
+    """
+    valores = df[coluna].to_numpy(dtype='float64')
+    elegiveis = ~np.isnan(valores)
+    minimo = MINIMO_JOGOS_POR_COLUNA.get(coluna, 0)
+    if minimo:
+        elegiveis &= df['jogos_jogados'].to_numpy() >= minimo
+    posicoes = np.flatnonzero(elegiveis)
+    return posicoes[np.argsort(-valores[posicoes], kind='stable')].astype(np.int32)
+
+def indexar(df, fatias):
+    """Pré-calcula a ordem de cada métrica de METRICAS_RANKING em cada temporada.
+
+    'fatias' mapeia temporada -> (inicio, fim) em df; o resultado mapeia
+    (temporada, coluna) -> posições absolutas em df, já ordenadas.
+    """
+    colunas = [coluna for coluna in MINIMO_JOGOS_POR_COLUNA if coluna in df.columns]
+    return {
+        (temporada, coluna): inicio + ordem_decrescente(df.iloc[inicio:fim], coluna)
+        for temporada, (inicio, fim) in fatias.items()
+        for coluna in colunas
+    }
+
+def top_n(df, coluna, n):
+    """Top-N sem índice pré-calculado: seleção parcial (nlargest) nas linhas elegíveis de df.
+
+    Como em ordem_decrescente, valores nulos (ex.: % de 3 pontos antes de
+    1979-80) ficam de fora; nlargest os devolveria quando n passa das linhas
+    com valor.
+    """
+    minimo = MINIMO_JOGOS_POR_COLUNA.get(coluna, 0)
+    elegiveis = df[df[coluna].notna()]
+    if minimo:
+        elegiveis = elegiveis[elegiveis['jogos_jogados'] >= minimo]
+    return elegiveis.nlargest(n, coluna)
@@ -0,0 +1,215 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+import pandas as pd
+from dotenv import load_dotenv
+
+script_dir = Path(__file__).resolve().parent
+src_dir = script_dir.parent
+project_root_dir = src_dir.parent
+
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+dotenv_path = project_root_dir / '.env'
+load_dotenv(dotenv_path)
+
+from etl.extract import (
+    extrair_estatisticas_concorrente, obter_todos_os_jogadores, playercareerstats,
+    MAX_EM_VOO, REQUISICOES_POR_SEGUNDO, MAX_TENTATIVAS, JOGADORES_POR_LOTE
+)
+from etl.staging import ler_staging, salvar_staging, FORMATO_STAGING, FORMATOS
+
+DIRETORIO_BACKFILL = project_root_dir / 'data' / 'raw' / 'backfill'
+ARQUIVO_PROGRESSO = 'progresso.json'
+
+# %%
+
+def _assinatura(lista_de_jogadores, jogadores_por_lote):
+    """Identifica a lista de jogadores e o tamanho de lote de um backfill; um checkpoint só é retomado com a mesma assinatura."""
+    ids = ','.join(str(jogador['id']) for jogador in lista_de_jogadores)
+    return hashlib.sha256(f"{jogadores_por_lote}:{ids}".encode('utf-8')).hexdigest()
+
+def _caminho_lote(diretorio, numero):
+    return Path(diretorio) / 'lotes' / f"lote_{numero:05d}"
+
+def ler_progresso(diretorio=DIRETORIO_BACKFILL):
+    """Retorna o checkpoint salvo em 'diretorio', ou None se não houver."""
+    try:
+        with open(Path(diretorio) / ARQUIVO_PROGRESSO, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _salvar_progresso(diretorio, progresso):
+    caminho = Path(diretorio) / ARQUIVO_PROGRESSO
+    temporario = caminho.with_suffix('.tmp')
+    progresso['atualizado_em'] = time.time()
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(progresso, f, indent=2)
+    os.replace(temporario, caminho)
+
+def _formatar_duracao(segundos):
+    segundos = int(segundos)
+    return f"{segundos // 3600:02d}:{segundos % 3600 // 60:02d}:{segundos % 60:02d}"
+
+# %%
+
+def executar_backfill(lista_de_jogadores, diretorio=DIRETORIO_BACKFILL, jogadores_por_lote=JOGADORES_POR_LOTE,
+                      formato=FORMATO_STAGING, limite_lotes=None, reiniciar=False, **opcoes_extracao):
+    """Extrai 'lista_de_jogadores' em lotes, gravando cada lote e um checkpoint em 'diretorio'.
+
+    Cada lote concluído vira um arquivo em 'diretorio/lotes' e só depois entra
+    em 'progresso.json' (gravado de forma atômica), então uma execução
+    interrompida retoma do primeiro lote não concluído. Jogadores que
+    falharam em todas as tentativas ficam no checkpoint e são tentados de
+    novo no fim de cada execução. 'limite_lotes' encerra a execução depois
+    de N lotes, para dividir o backfill em várias rodadas.
+
+    Retorna o checkpoint atualizado.
+    """
+    diretorio = Path(diretorio)
+    assinatura = _assinatura(lista_de_jogadores, jogadores_por_lote)
+    progresso = None if reiniciar else ler_progresso(diretorio)
+    if progresso is not None and progresso['assinatura'] != assinatura:
+        raise ValueError(
+            f"O checkpoint em '{diretorio}' é de outra lista de jogadores ou outro tamanho de lote. "
+            "Use reiniciar=True (--reiniciar) para começar de novo."
+        )
+    if progresso is None:
+        if diretorio.exists():
+            shutil.rmtree(diretorio)
+        (diretorio / 'lotes').mkdir(parents=True)
+        progresso = {
+            'assinatura': assinatura,
+            'total_jogadores': len(lista_de_jogadores),
+            'jogadores_por_lote': jogadores_por_lote,
+            'formato': formato,
+            'lotes_concluidos': [],
+            'ids_com_falha': [],
+            'chamadas_api': 0,
+            'retentativas': 0,
+            'iniciado_em': time.time()
+        }
+        _salvar_progresso(diretorio, progresso)
+
+    total_lotes = (len(lista_de_jogadores) + jogadores_por_lote - 1) // jogadores_por_lote
+    concluidos = set(progresso['lotes_concluidos'])
+    pendentes = [numero for numero in range(1, total_lotes + 1) if numero not in concluidos]
+    if limite_lotes is not None:
+        pendentes = pendentes[:limite_lotes]
+    jogadores_pendentes = sum(
+        len(lista_de_jogadores[(numero - 1) * jogadores_por_lote:numero * jogadores_por_lote])
+        for numero in range(1, total_lotes + 1) if numero not in concluidos
+    )
+    print(f"Backfill: {len(concluidos)}/{total_lotes} lotes já concluídos, {len(pendentes)} a processar nesta execução.")
+
+    inicio = time.perf_counter()
+    processados = 0
+    for numero in pendentes:
+        lote = lista_de_jogadores[(numero - 1) * jogadores_por_lote:numero * jogadores_por_lote]
+        df_lote, metricas = extrair_estatisticas_concorrente(lote, **opcoes_extracao)
+        if not df_lote.empty:
+            salvar_staging(df_lote, _caminho_lote(diretorio, numero), formato=progresso['formato'])
+
+        progresso['lotes_concluidos'].append(numero)
+        progresso['ids_com_falha'] = sorted(set(progresso['ids_com_falha']) | set(metricas['ids_com_falha']))
+        progresso['chamadas_api'] += metricas['chamadas_api']
+        progresso['retentativas'] += metricas['retentativas']
+        _salvar_progresso(diretorio, progresso)
+
+        processados += len(lote)
+        jogadores_pendentes -= len(lote)
+        decorrido = time.perf_counter() - inicio
+        por_minuto = processados / decorrido * 60 if decorrido else 0.0
+        eta = jogadores_pendentes / por_minuto * 60 if por_minuto else 0.0
+        print(f"Lote {numero}/{total_lotes} salvo: {len(progresso['lotes_concluidos'])}/{total_lotes} lotes, "
+              f"{por_minuto:.0f} jogadores/min, ETA {_formatar_duracao(eta)}, "
+              f"{len(progresso['ids_com_falha'])} jogadores com falha até agora.")
+
+    if progresso['ids_com_falha'] and not jogadores_pendentes:
+        _repescar_falhas(diretorio, progresso, lista_de_jogadores, opcoes_extracao)
+    return progresso
+
+def _repescar_falhas(diretorio, progresso, lista_de_jogadores, opcoes_extracao):
+    """Tenta de novo os jogadores que falharam e grava os recuperados num lote extra."""
+    com_falha = set(progresso['ids_com_falha'])
+    jogadores = [jogador for jogador in lista_de_jogadores if jogador['id'] in com_falha]
+    print(f"\nTentando de novo {len(jogadores)} jogadores com falha...")
+    df_lote, metricas = extrair_estatisticas_concorrente(jogadores, **opcoes_extracao)
+    if not df_lote.empty:
+        numero = len(list((Path(diretorio) / 'lotes').glob('repescagem_*'))) + 1
+        salvar_staging(df_lote, Path(diretorio) / 'lotes' / f"repescagem_{numero:03d}", formato=progresso['formato'])
+    progresso['ids_com_falha'] = sorted(metricas['ids_com_falha'])
+    progresso['chamadas_api'] += metricas['chamadas_api']
+    progresso['retentativas'] += metricas['retentativas']
+    _salvar_progresso(diretorio, progresso)
+    print(f"{len(jogadores) - len(progresso['ids_com_falha'])} recuperados, {len(progresso['ids_com_falha'])} ainda com falha.")
+
+def consolidar_backfill(diretorio=DIRETORIO_BACKFILL, destino=None, formato=FORMATO_STAGING):
+    """Junta os lotes do backfill no staging bruto lido por transform.py e retorna o caminho gravado."""
+    destino = destino or project_root_dir / 'data' / 'raw' / 'nba_stats_brutas'
+    arquivos = sorted({
+        arquivo.with_suffix('') for arquivo in (Path(diretorio) / 'lotes').iterdir()
+        if not arquivo.name.endswith('.tmp')
+    })
+    lotes = [ler_staging(arquivo) for arquivo in arquivos]
+    lotes = [df for df in lotes if not df.empty]
+    if not lotes:
+        return None
+    return salvar_staging(pd.concat(lotes, ignore_index=True), destino, formato=formato, coluna_particao='SEASON_ID')
+
+# %%
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill histórico: extrai todos os jogadores da NBA em lotes com checkpoint, retomando de onde parou.")
+    parser.add_argument('--jogadores-por-lote', type=int, default=JOGADORES_POR_LOTE, help="Jogadores por lote (e por checkpoint).")
+    parser.add_argument('--limite-lotes', type=int, default=None, help="Processa no máximo N lotes nesta execução.")
+    parser.add_argument('--reiniciar', action='store_true', help="Descarta o checkpoint e começa do primeiro lote.")
+    parser.add_argument('--max-em-voo', type=int, default=MAX_EM_VOO, help="Máximo de requisições simultâneas.")
+    parser.add_argument('--taxa', type=float, default=REQUISICOES_POR_SEGUNDO, help="Requisições por segundo.")
+    parser.add_argument('--tentativas', type=int, default=MAX_TENTATIVAS, help="Tentativas por jogador.")
+    parser.add_argument('--formato', choices=FORMATOS, default=FORMATO_STAGING, help="Formato dos lotes e do staging bruto final.")
+    parser.add_argument('--simulado', action='store_true', help="Usa o endpoint local simulado (500 jogadores ativos e 4.500 históricos) em vez da API da NBA.")
+    parser.add_argument('--taxa-falha', type=float, default=0.1, help="Fração de chamadas que falham no endpoint simulado.")
+    args = parser.parse_args()
+
+    endpoint = playercareerstats.PlayerCareerStats
+    if args.simulado:
+        from etl.endpoint_simulado import criar_endpoint_simulado, obter_jogadores_simulados, obter_jogadores_historicos_simulados
+        endpoint = criar_endpoint_simulado(taxa_falha=args.taxa_falha)
+        lista_de_jogadores = obter_jogadores_historicos_simulados(4500) + obter_jogadores_simulados(500)
+    else:
+        lista_de_jogadores = obter_todos_os_jogadores(historicos=True)
+    print(f"Total de jogadores históricos: {len(lista_de_jogadores)}")
+
+    try:
+        progresso = executar_backfill(
+            lista_de_jogadores,
+            jogadores_por_lote=args.jogadores_por_lote,
+            formato=args.formato,
+            limite_lotes=args.limite_lotes,
+            reiniciar=args.reiniciar,
+            endpoint=endpoint,
+            max_em_voo=args.max_em_voo,
+            requisicoes_por_segundo=args.taxa,
+            max_tentativas=args.tentativas
+        )
+    except ValueError as e:
+        print(f"Erro: {e}")
+        sys.exit(1)
+
+    total_lotes = (progresso['total_jogadores'] + progresso['jogadores_por_lote'] - 1) // progresso['jogadores_por_lote']
+    if len(progresso['lotes_concluidos']) < total_lotes:
+        print(f"\nBackfill parcial: {len(progresso['lotes_concluidos'])}/{total_lotes} lotes. Rode de novo para continuar.")
+    else:
+        caminho = consolidar_backfill(formato=args.formato)
+        print(f"\nBackfill completo: {progresso['chamadas_api']} chamadas, {progresso['retentativas']} retentativas, "
+              f"{len(progresso['ids_com_falha'])} jogadores sem dados. Staging bruto salvo em '{caminho}'.")
+
+    print("\nBackfill concluído.")
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date
+from io import StringIO
+from pathlib import Path
+import pandas as pd
+
+# %%
+
+TTL_SEGUNDOS = float(os.getenv('ETL_CACHE_TTL', 12 * 3600))
+TTL_HISTORICO_SEGUNDOS = float(os.getenv('ETL_CACHE_TTL_HISTORICO', 7 * 24 * 3600))
+
+# %%
+
+def temporada_atual(hoje=None):
+    """Retorna o SEASON_ID da temporada corrente ('2024-25'); a temporada vira em outubro."""
+    hoje = hoje or date.today()
+    ano_inicio = hoje.year if hoje.month >= 10 else hoje.year - 1
+    return f"{ano_inicio}-{(ano_inicio + 1) % 100:02d}"
+
+# %%
+
+class CacheRespostas:
+    """Cache em disco das respostas do PlayerCareerStats, uma entrada JSON por player_id.
+
+    Cada entrada guarda o momento da busca, o hash do conteúdo, as temporadas
+    presentes e os jogos do jogador na temporada atual, o que permite decidir
+    se o jogador precisa ser buscado de novo e, quando buscado, se a resposta
+    mudou. Em modo incremental o sinal de mudança é 'jogos_temporada'
+    ({player_id: jogos}, do game log da liga, ver extract.jogos_por_jogador):
+    só quem jogou desde a última busca é rebuscado; os demais, inclusive
+    aposentados, só depois de 'ttl_historico' (correções de estatística).
+    Os contadores
+    (acertos, faltas, bytes economizados, respostas inalteradas) valem para
+    a instância, ou seja, para uma execução.
+    """
+
+    def __init__(self, diretorio, ttl=TTL_SEGUNDOS, ttl_historico=TTL_HISTORICO_SEGUNDOS, temporada=None):
+        self.diretorio = Path(diretorio)
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.ttl_historico = ttl_historico
+        self.temporada = temporada or temporada_atual()
+        self.jogos_temporada = None
+        self.acertos = 0
+        self.faltas = 0
+        self.bytes_economizados = 0
+        self.inalterados = 0
+        self.alterados = 0
+        self._trava = threading.Lock()
+
+    def _caminho(self, player_id):
+        return self.diretorio / f"{player_id}.json"
+
+    def _ler_entrada(self, player_id):
+        caminho = self._caminho(player_id)
+        try:
+            with open(caminho, encoding='utf-8') as f:
+                entrada = json.load(f)
+            entrada['bytes'] = caminho.stat().st_size
+            return entrada
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def precisa_atualizar(self, entrada, incremental=False, player_id=None):
+        if entrada is None:
+            return True
+        idade = time.time() - entrada['buscado_em']
+        if not incremental:
+            return idade > self.ttl
+        if self.jogos_temporada is not None:
+            # Entradas antigas, sem 'jogos_temporada_atual', são rebuscadas uma vez.
+            if entrada.get('jogos_temporada_atual') != self.jogos_temporada.get(player_id, 0):
+                return True
+            return idade > self.ttl_historico
+        # Sem o game log da liga: quem não tem linha da temporada atual espera o TTL longo.
+        if self.temporada not in entrada['temporadas']:
+            return idade > self.ttl_historico
+        return idade > self.ttl
+
+    def obter(self, player_id, incremental=False):
+        """Retorna o DataFrame em cache se ele ainda for válido, senão None."""
+        entrada = self._ler_entrada(player_id)
+        if self.precisa_atualizar(entrada, incremental, player_id):
+            with self._trava:
+                self.faltas += 1
+            return None
+        with self._trava:
+            self.acertos += 1
+            self.bytes_economizados += entrada['bytes']
+        return pd.read_json(StringIO(entrada['dados']), orient='split', dtype=False)
+
+    def salvar(self, player_id, df):
+        """Grava a resposta e retorna True se o conteúdo mudou em relação à entrada anterior."""
+        dados = df.to_json(orient='split', index=False)
+        hash_conteudo = hashlib.sha256(dados.encode('utf-8')).hexdigest()
+        anterior = self._ler_entrada(player_id)
+        alterado = anterior is None or anterior['hash'] != hash_conteudo
+
+        entrada = {
+            'player_id': player_id,
+            'buscado_em': time.time(),
+            'hash': hash_conteudo,
+            'temporadas': sorted(df['SEASON_ID'].astype(str).unique().tolist()) if 'SEASON_ID' in df.columns else [],
+            'jogos_temporada_atual': self._jogos_na_temporada(df),
+            'dados': dados
+        }
+        caminho = self._caminho(player_id)
+        temporario = caminho.with_suffix('.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(entrada, f)
+        os.replace(temporario, caminho)
+
+        with self._trava:
+            if alterado:
+                self.alterados += 1
+            else:
+                self.inalterados += 1
+        return alterado
+
+    def _jogos_na_temporada(self, df):
+        # Com troca de time, a linha 'TOT' (TEAM_ID 0) já é a soma das linhas por time.
+        if 'SEASON_ID' not in df.columns or 'GP' not in df.columns:
+            return 0
+        linhas = df[df['SEASON_ID'].astype(str) == self.temporada]
+        if 'TEAM_ID' in linhas.columns and (linhas['TEAM_ID'] == 0).any():
+            linhas = linhas[linhas['TEAM_ID'] == 0]
+        return int(pd.to_numeric(linhas['GP'], errors='coerce').fillna(0).sum())
+
+    def resumo(self):
+        consultas = self.acertos + self.faltas
+        return {
+            'acertos': self.acertos,
+            'faltas': self.faltas,
+            'taxa_acerto': round(self.acertos / consultas, 3) if consultas else 0.0,
+            'bytes_economizados': self.bytes_economizados,
+            'respostas_alteradas': self.alterados,
+            'respostas_inalteradas': self.inalterados
+        }
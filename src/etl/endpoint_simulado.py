@@ -0,0 +1,312 @@
+import random
+import threading
+import time
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+
+# %%
+
+COLUNAS_CARREIRA = [
+    'PLAYER_ID', 'SEASON_ID', 'LEAGUE_ID', 'TEAM_ID', 'TEAM_ABBREVIATION', 'PLAYER_AGE',
+    'GP', 'GS', 'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT',
+    'FTM', 'FTA', 'FT_PCT', 'OREB', 'DREB', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS'
+]
+
+TIMES = [
+    (1610612737, 'ATL'), (1610612738, 'BOS'), (1610612739, 'CLE'), (1610612740, 'NOP'),
+    (1610612741, 'CHI'), (1610612742, 'DAL'), (1610612743, 'DEN'), (1610612744, 'GSW'),
+    (1610612745, 'HOU'), (1610612746, 'LAC'), (1610612747, 'LAL'), (1610612748, 'MIA'),
+    (1610612749, 'MIL'), (1610612750, 'MIN'), (1610612751, 'BKN'), (1610612752, 'NYK'),
+    (1610612753, 'ORL'), (1610612754, 'IND'), (1610612755, 'PHI'), (1610612756, 'PHX'),
+    (1610612757, 'POR'), (1610612758, 'SAC'), (1610612759, 'SAS'), (1610612760, 'OKC'),
+    (1610612761, 'TOR'), (1610612762, 'UTA'), (1610612763, 'MEM'), (1610612764, 'WAS'),
+    (1610612765, 'DET'), (1610612766, 'CHA')
+]
+
+COLUNAS_JOGOS = [
+    'SEASON_YEAR', 'PLAYER_ID', 'PLAYER_NAME', 'TEAM_ID', 'TEAM_ABBREVIATION', 'GAME_ID', 'GAME_DATE',
+    'MATCHUP', 'WL', 'MIN', 'FGM', 'FGA', 'FG_PCT', 'FG3M', 'FG3A', 'FG3_PCT', 'FTM', 'FTA', 'FT_PCT',
+    'OREB', 'DREB', 'REB', 'AST', 'TOV', 'STL', 'BLK', 'PF', 'PTS', 'PLUS_MINUS'
+]
+
+JOGADORES_ATIVOS = 500 # Tamanho aproximado da liga ativa, base da escala de gerar_liga_sintetica
+ANO_LINHA_3PTS = 1979 # Antes de 1979-80 não havia linha de 3 pontos: a API devolve FG3M, FG3A e FG3_PCT nulos
+ID_INICIAL_HISTORICOS = 76000 # Ids abaixo de ID_INICIAL_ATIVOS são de jogadores já aposentados
+ID_INICIAL_ATIVOS = 1627000
+
+COLUNAS_SOMAVEIS = [
+    'GP', 'GS', 'MIN', 'FGM', 'FGA', 'FG3M', 'FG3A', 'FTM', 'FTA',
+    'OREB', 'DREB', 'REB', 'AST', 'STL', 'BLK', 'TOV', 'PF', 'PTS'
+]
+
+# %%
+
+class FalhaSimulada(Exception):
+    pass
+
+# %%
+
+def _linha_temporada(rng, player_id, ano, idade, id_time, sigla_time, jogos):
+    fga = int(jogos * rng.uniform(3, 20))
+    fgm = int(fga * rng.uniform(0.38, 0.58))
+    fg3a = int(fga * rng.uniform(0.0, 0.45))
+    fg3m = int(fg3a * rng.uniform(0.25, 0.42))
+    if ano < ANO_LINHA_3PTS:
+        fg3a = fg3m = None
+    fta = int(jogos * rng.uniform(0.5, 7))
+    ftm = int(fta * rng.uniform(0.6, 0.92))
+    oreb = int(jogos * rng.uniform(0.2, 3))
+    dreb = int(jogos * rng.uniform(1, 8))
+    return {
+        'PLAYER_ID': player_id,
+        'SEASON_ID': f"{ano}-{(ano + 1) % 100:02d}",
+        'LEAGUE_ID': '00',
+        'TEAM_ID': id_time,
+        'TEAM_ABBREVIATION': sigla_time,
+        'PLAYER_AGE': float(idade),
+        'GP': jogos,
+        'GS': int(jogos * rng.uniform(0, 1)),
+        'MIN': float(jogos * rng.uniform(8, 36)),
+        'FGM': fgm,
+        'FGA': fga,
+        'FG_PCT': _percentual(fgm, fga),
+        'FG3M': fg3m,
+        'FG3A': fg3a,
+        'FG3_PCT': _percentual(fg3m, fg3a),
+        'FTM': ftm,
+        'FTA': fta,
+        'FT_PCT': _percentual(ftm, fta),
+        'OREB': oreb,
+        'DREB': dreb,
+        'REB': oreb + dreb,
+        'AST': int(jogos * rng.uniform(0.3, 9)),
+        'STL': int(jogos * rng.uniform(0.2, 2)),
+        'BLK': int(jogos * rng.uniform(0, 2)),
+        'TOV': int(jogos * rng.uniform(0.3, 4)),
+        'PF': int(jogos * rng.uniform(0.8, 3.5)),
+        'PTS': 2 * fgm + (fg3m or 0) + ftm
+    }
+
+def _percentual(feitos, tentados):
+    if tentados is None:
+        return None
+    return round(feitos / tentados, 3) if tentados else 0.0
+
+def _ultima_temporada(player_id):
+    """Ano de início da última temporada do jogador: a atual para os ativos, entre 1955 e 2005 para os históricos."""
+    if player_id >= ID_INICIAL_ATIVOS:
+        return 2024
+    return random.Random(-int(player_id)).randint(1955, 2005)
+
+def _linhas_carreira(player_id, temporada_final):
+    rng = random.Random(int(player_id))
+    n_temporadas = rng.randint(1, 16)
+    inicio = temporada_final - n_temporadas + 1
+    idade = rng.randint(19, 23)
+    id_time, sigla_time = rng.choice(TIMES)
+
+    linhas = []
+    for ano in range(inicio, temporada_final + 1):
+        if rng.random() < 0.12:
+            outro_time = rng.choice(TIMES)
+            jogos_a = rng.randint(5, 45)
+            jogos_b = rng.randint(5, 82 - jogos_a)
+            linha_a = _linha_temporada(rng, player_id, ano, idade, id_time, sigla_time, jogos_a)
+            linha_b = _linha_temporada(rng, player_id, ano, idade, outro_time[0], outro_time[1], jogos_b)
+            total = dict(linha_a)
+            for col in COLUNAS_SOMAVEIS:
+                total[col] = None if linha_a[col] is None else linha_a[col] + linha_b[col]
+            total.update({'TEAM_ID': 0, 'TEAM_ABBREVIATION': 'TOT'})
+            for pct, feitos, tentados in (('FG_PCT', 'FGM', 'FGA'), ('FG3_PCT', 'FG3M', 'FG3A'), ('FT_PCT', 'FTM', 'FTA')):
+                total[pct] = _percentual(total[feitos], total[tentados])
+            linhas.extend([linha_a, linha_b, total])
+            id_time, sigla_time = outro_time
+        else:
+            linhas.append(_linha_temporada(rng, player_id, ano, idade, id_time, sigla_time, rng.randint(1, 82)))
+        idade += 1
+    return linhas
+
+def gerar_carreira_sintetica(player_id, temporada_final=None):
+    """Gera a tabela de carreira de um jogador no formato do PlayerCareerStats.
+
+    A geração é determinística por player_id. Temporadas em que o jogador foi
+    trocado geram uma linha por time mais a linha agregada 'TOT' (TEAM_ID 0),
+    como faz a API real. Sem 'temporada_final', a carreira de um jogador
+    histórico (id abaixo de ID_INICIAL_ATIVOS) termina entre 1955 e 2005, e
+    temporadas anteriores a 1979-80 vêm com FG3M, FG3A e FG3_PCT nulos.
+    """
+    return pd.DataFrame(_linhas_carreira(player_id, temporada_final or _ultima_temporada(player_id)), columns=COLUNAS_CARREIRA)
+
+def gerar_liga_sintetica(escala=1, temporada_final=None, jogadores=None):
+    """Gera o staging bruto (PlayerCareerStats + PLAYER_NAME) de JOGADORES_ATIVOS * escala jogadores simulados.
+
+    Cada jogador tem as mesmas linhas que o endpoint simulado devolveria para
+    ele, então o resultado é determinístico e uma escala menor é sempre um
+    subconjunto de uma maior. Escala 1 é a liga ativa; 100 passa do tamanho
+    de todos os jogadores da história da NBA. Com 'jogadores' (ex.: de
+    obter_jogadores_historicos_simulados), gera só as carreiras da lista.
+    """
+    linhas = []
+    nomes = []
+    if jogadores is None:
+        jogadores = obter_jogadores_simulados(max(1, round(JOGADORES_ATIVOS * escala)))
+    for jogador in jogadores:
+        carreira = _linhas_carreira(jogador['id'], temporada_final or _ultima_temporada(jogador['id']))
+        linhas.extend(carreira)
+        nomes.extend([jogador['full_name']] * len(carreira))
+    df = pd.DataFrame(linhas, columns=COLUNAS_CARREIRA)
+    df['PLAYER_NAME'] = nomes
+    return df
+
+# %%
+
+def criar_endpoint_simulado(latencia_min=0.05, latencia_max=0.25, taxa_falha=0.1, semente=None):
+    """Cria um substituto local para playercareerstats.PlayerCareerStats.
+
+    O objeto retornado aceita a mesma chamada do endpoint real
+    (PlayerCareerStats(player_id=...)), dorme uma latência aleatória e lança
+    FalhaSimulada numa fração 'taxa_falha' das chamadas. O atributo
+    'chamadas' conta quantas requisições foram feitas.
+    """
+    rng = random.Random(semente)
+    trava = threading.Lock()
+
+    class PlayerCareerStatsSimulado:
+        chamadas = 0
+
+        def __init__(self, player_id, timeout=30, **kwargs):
+            with trava:
+                PlayerCareerStatsSimulado.chamadas += 1
+                latencia = rng.uniform(latencia_min, latencia_max)
+                falhou = rng.random() < taxa_falha
+            time.sleep(latencia)
+            if falhou:
+                raise FalhaSimulada(f"Falha simulada para o jogador ID {player_id}")
+            self.player_id = player_id
+
+        def get_data_frames(self):
+            return [gerar_carreira_sintetica(self.player_id)]
+
+    return PlayerCareerStatsSimulado
+
+def _calendario_time(ano, indice_time):
+    """82 jogos de um time na temporada: datas, ids de jogo, adversários e mando, determinísticos."""
+    rng = np.random.default_rng(ano * 100 + indice_time)
+    dias = np.sort(rng.choice(175, size=82, replace=False))
+    datas = [date(ano, 10, 22) + timedelta(days=int(d)) for d in dias]
+    ids_jogo = [f"002{ano % 100:02d}{indice_time * 82 + k + 1:05d}" for k in range(82)]
+    adversarios = [TIMES[(indice_time + int(d)) % len(TIMES)][1] for d in rng.integers(1, len(TIMES), size=82)]
+    mandante = rng.random(82) < 0.5
+    return datas, ids_jogo, adversarios, mandante
+
+def gerar_jogos_sinteticos(temporada, jogadores):
+    """Gera o game log da temporada no formato do PlayerGameLogs para a lista de jogadores.
+
+    Cada linha de time da carreira sintética (gerar_carreira_sintetica) vira
+    'GP' jogos no calendário do time, com médias próximas às da temporada.
+    """
+    ano = int(temporada[:4])
+    indices_time = {id_time: i for i, (id_time, _) in enumerate(TIMES)}
+    calendarios = {}
+    partes = []
+    for jogador in jogadores:
+        carreira = gerar_carreira_sintetica(jogador['id'])
+        linhas = carreira[(carreira['SEASON_ID'] == temporada) & (carreira['TEAM_ID'] != 0)]
+        for linha in linhas.itertuples(index=False):
+            indice_time = indices_time[linha.TEAM_ID]
+            if indice_time not in calendarios:
+                calendarios[indice_time] = _calendario_time(ano, indice_time)
+            datas, ids_jogo, adversarios, mandante = calendarios[indice_time]
+            rng = np.random.default_rng([jogador['id'], ano, indice_time])
+            jogos = np.sort(rng.choice(82, size=linha.GP, replace=False))
+            n = len(jogos)
+
+            def por_jogo(total):
+                return rng.poisson(total / n, size=n)
+
+            sem_3pts = pd.isna(linha.FG3A)
+            fga, fta = por_jogo(linha.FGA), por_jogo(linha.FTA)
+            fg3a = np.zeros(n, dtype=int) if sem_3pts else por_jogo(linha.FG3A)
+            fgm = np.minimum(fga, por_jogo(linha.FGM))
+            fg3a = np.minimum(fg3a, fga)
+            fg3m = np.zeros(n, dtype=int) if sem_3pts else np.minimum(np.minimum(fg3a, fgm), por_jogo(linha.FG3M))
+            ftm = np.minimum(fta, por_jogo(linha.FTM))
+            oreb, dreb = por_jogo(linha.OREB), por_jogo(linha.DREB)
+            mais_menos = rng.integers(-25, 26, size=n)
+            partes.append(pd.DataFrame({
+                'SEASON_YEAR': temporada,
+                'PLAYER_ID': jogador['id'],
+                'PLAYER_NAME': jogador['full_name'],
+                'TEAM_ID': linha.TEAM_ID,
+                'TEAM_ABBREVIATION': linha.TEAM_ABBREVIATION,
+                'GAME_ID': [ids_jogo[k] for k in jogos],
+                'GAME_DATE': [f"{datas[k].isoformat()}T00:00:00" for k in jogos],
+                'MATCHUP': [
+                    f"{linha.TEAM_ABBREVIATION} {'vs.' if mandante[k] else '@'} {adversarios[k]}" for k in jogos
+                ],
+                'WL': np.where(mais_menos > 0, 'W', 'L'),
+                'MIN': np.round(rng.uniform(0.5, 2.0, size=n) * linha.MIN / n, 2),
+                'FGM': fgm, 'FGA': fga,
+                'FG_PCT': np.round(np.divide(fgm, fga, out=np.zeros(n), where=fga > 0), 3),
+                'FG3M': None if sem_3pts else fg3m, 'FG3A': None if sem_3pts else fg3a,
+                'FG3_PCT': None if sem_3pts else np.round(np.divide(fg3m, fg3a, out=np.zeros(n), where=fg3a > 0), 3),
+                'FTM': ftm, 'FTA': fta,
+                'FT_PCT': np.round(np.divide(ftm, fta, out=np.zeros(n), where=fta > 0), 3),
+                'OREB': oreb, 'DREB': dreb, 'REB': oreb + dreb,
+                'AST': por_jogo(linha.AST), 'TOV': por_jogo(linha.TOV), 'STL': por_jogo(linha.STL),
+                'BLK': por_jogo(linha.BLK), 'PF': por_jogo(linha.PF),
+                'PTS': 2 * fgm + fg3m + ftm,
+                'PLUS_MINUS': mais_menos
+            }))
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_JOGOS)
+    return pd.concat(partes, ignore_index=True)[COLUNAS_JOGOS]
+
+def criar_endpoint_jogos_simulado(jogadores=None, latencia_min=0.05, latencia_max=0.25, taxa_falha=0.1, semente=None):
+    """Cria um substituto local para playergamelogs.PlayerGameLogs.
+
+    Aceita a mesma chamada do endpoint real (PlayerGameLogs(season_nullable=...))
+    e devolve o game log da temporada inteira para 'jogadores' (por padrão
+    os de obter_jogadores_simulados), com a mesma latência e falhas
+    injetadas de criar_endpoint_simulado.
+    """
+    jogadores = jogadores if jogadores is not None else obter_jogadores_simulados()
+    rng = random.Random(semente)
+    trava = threading.Lock()
+
+    class PlayerGameLogsSimulado:
+        chamadas = 0
+
+        def __init__(self, season_nullable='', timeout=30, **kwargs):
+            with trava:
+                PlayerGameLogsSimulado.chamadas += 1
+                latencia = rng.uniform(latencia_min, latencia_max)
+                falhou = rng.random() < taxa_falha
+            time.sleep(latencia)
+            if falhou:
+                raise FalhaSimulada(f"Falha simulada para a temporada {season_nullable}")
+            self.temporada = season_nullable
+
+        def get_data_frames(self):
+            return [gerar_jogos_sinteticos(self.temporada, jogadores)]
+
+    return PlayerGameLogsSimulado
+
+def obter_jogadores_simulados(quantidade=500, id_inicial=ID_INICIAL_ATIVOS):
+    return [
+        {'id': id_inicial + i, 'full_name': f"Jogador Simulado {i + 1}", 'is_active': id_inicial >= ID_INICIAL_ATIVOS}
+        for i in range(quantidade)
+    ]
+
+def obter_todos_os_jogadores_simulados(historicos=False):
+    """Equivalente simulado de extract.obter_todos_os_jogadores: a liga ativa e, com 'historicos', 4.500 aposentados."""
+    ativos = obter_jogadores_simulados(JOGADORES_ATIVOS)
+    return obter_jogadores_historicos_simulados(4500) + ativos if historicos else ativos
+
+def obter_jogadores_historicos_simulados(quantidade=4500):
+    """Jogadores aposentados simulados, com carreiras entre 1940 e 2005 (ver gerar_carreira_sintetica)."""
+    return [
+        {'id': ID_INICIAL_HISTORICOS + i, 'full_name': f"Jogador Histórico {i + 1}", 'is_active': False}
+        for i in range(quantidade)
+    ]
@@ -1,60 +1,252 @@
 import pandas as pd
 from nba_api.stats.static import players
-from nba_api.stats.endpoints import playercareerstats
+from nba_api.stats.endpoints import playercareerstats, playergamelogs
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import argparse
+import os
+import random
+import threading
 import time
 from pathlib import Path
 from dotenv import load_dotenv 
+import sys
 
-dotenv_path = Path(__file__).resolve().parent.parent.parent / '.env'
+script_dir = Path(__file__).resolve().parent
+src_dir = script_dir.parent
+project_root_dir = src_dir.parent
+
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+dotenv_path = project_root_dir / '.env'
 load_dotenv(dotenv_path)
 
+from etl.cache_respostas import CacheRespostas
+from etl.staging import salvar_staging, FORMATO_STAGING, FORMATOS
+
+MAX_EM_VOO = int(os.getenv('ETL_MAX_EM_VOO', 4))
+REQUISICOES_POR_SEGUNDO = float(os.getenv('ETL_REQUISICOES_POR_SEGUNDO', 3))
+MAX_TENTATIVAS = int(os.getenv('ETL_MAX_TENTATIVAS', 4))
+BACKOFF_BASE = float(os.getenv('ETL_BACKOFF_BASE', 0.5))
+BACKOFF_MAXIMO = float(os.getenv('ETL_BACKOFF_MAXIMO', 10))
+JOGADORES_POR_LOTE = int(os.getenv('ETL_JOGADORES_POR_LOTE', 100))
+
 # %%
 
-def obter_todos_os_jogadores():
+def obter_todos_os_jogadores(historicos=False):
+    if historicos:
+        return players.get_players()
     all_players = players.get_active_players()
     return all_players
 
 # %%
 
-def obter_estatisticas_carreira_jogador(player_id):
-    try:
-        career_stats = playercareerstats.PlayerCareerStats(player_id=player_id)
-        df_stats = career_stats.get_data_frames()[0]
-        return df_stats
-    except Exception as e:
-        print(f"Erro ao obter estatísticas para o jogador ID {player_id}: {e}")
-        return pd.DataFrame()
+class LimitadorDeTaxa:
+    """Token bucket compartilhado entre as threads de extração.
+
+    Libera no máximo 'taxa_por_segundo' requisições por segundo em regime,
+    permitindo rajadas de até 'capacidade' requisições.
+    """
+
+    def __init__(self, taxa_por_segundo, capacidade=None):
+        self.taxa_por_segundo = taxa_por_segundo
+        self.capacidade = capacidade if capacidade is not None else max(1.0, taxa_por_segundo)
+        self._tokens = self.capacidade
+        self._ultima_reposicao = time.monotonic()
+        self._trava = threading.Lock()
+
+    def adquirir(self):
+        while True:
+            with self._trava:
+                agora = time.monotonic()
+                self._tokens = min(self.capacidade, self._tokens + (agora - self._ultima_reposicao) * self.taxa_por_segundo)
+                self._ultima_reposicao = agora
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                espera = (1 - self._tokens) / self.taxa_por_segundo
+            time.sleep(espera)
+
+def chamar_com_retry(chamada, limitador, descricao, max_tentativas=MAX_TENTATIVAS,
+                     backoff_base=BACKOFF_BASE, backoff_maximo=BACKOFF_MAXIMO):
+    """Executa 'chamada()' respeitando o limitador e refazendo a chamada em caso de falha.
+
+    O intervalo entre tentativas usa backoff exponencial com jitter completo.
+    Retorna (DataFrame, número de tentativas). Se todas as tentativas falharem
+    o DataFrame é None; uma resposta válida sem linhas volta como DataFrame
+    vazio e não é refeita. 'descricao' identifica a chamada na mensagem de erro.
+    """
+    for tentativa in range(1, max_tentativas + 1):
+        limitador.adquirir()
+        try:
+            return chamada(), tentativa
+        except Exception as e:
+            if tentativa == max_tentativas:
+                print(f"Erro ao obter estatísticas para {descricao} após {tentativa} tentativas: {e}")
+                return None, tentativa
+            time.sleep(random.uniform(0, min(backoff_maximo, backoff_base * 2 ** (tentativa - 1))))
+
+def obter_estatisticas_com_retry(player_id, limitador, endpoint=playercareerstats.PlayerCareerStats,
+                                 max_tentativas=MAX_TENTATIVAS, backoff_base=BACKOFF_BASE, backoff_maximo=BACKOFF_MAXIMO):
+    """Busca a carreira de um jogador com chamar_com_retry."""
+    return chamar_com_retry(
+        lambda: endpoint(player_id=player_id).get_data_frames()[0],
+        limitador, f"o jogador ID {player_id}", max_tentativas, backoff_base, backoff_maximo
+    )
+
+def jogos_por_jogador(temporada, limitador, endpoint=playergamelogs.PlayerGameLogs, max_tentativas=MAX_TENTATIVAS, metricas=None):
+    """Jogos de cada jogador na temporada regular, {player_id: jogos}, a partir do game log da liga (uma chamada).
+
+    É o sinal de mudança do modo incremental: um jogador cujo número de jogos
+    não mudou desde a última busca tem a mesma carreira. Retorna None se a
+    chamada falhar. 'metricas', se informado, acumula as chamadas e
+    retentativas do game log em 'chamadas_api' e 'retentativas'.
+    """
+    df, tentativas = chamar_com_retry(
+        lambda: endpoint(season_nullable=temporada, season_type_nullable='Regular Season').get_data_frames()[0],
+        limitador, f"o game log da temporada {temporada}", max_tentativas
+    )
+    if metricas is not None:
+        metricas['chamadas_api'] = metricas.get('chamadas_api', 0) + tentativas
+        metricas['retentativas'] = metricas.get('retentativas', 0) + tentativas - 1
+    if df is None:
+        return None
+    if df.empty:
+        return {}
+    return {int(player_id): int(jogos) for player_id, jogos in df.groupby('PLAYER_ID').size().items()}
+
+def extrair_estatisticas_concorrente(lista_de_jogadores, endpoint=playercareerstats.PlayerCareerStats,
+                                     max_em_voo=MAX_EM_VOO, requisicoes_por_segundo=REQUISICOES_POR_SEGUNDO,
+                                     max_tentativas=MAX_TENTATIVAS, cache=None, incremental=False,
+                                     endpoint_jogos=playergamelogs.PlayerGameLogs):
+    """Extrai as carreiras de vários jogadores com concorrência limitada.
+
+    No máximo 'max_em_voo' requisições ficam abertas ao mesmo tempo e o ritmo
+    total é limitado por um token bucket. Com um CacheRespostas, jogadores com
+    entrada válida não são buscados na API. Em modo incremental, o game log da
+    temporada atual ('endpoint_jogos', buscado uma vez por cache e contado
+    em 'chamadas_api') diz quem jogou desde a última busca, e só esses são
+    rebuscados.
+    Jogadores que responderam sem nenhuma temporada contam em 'sem_dados';
+    só os que esgotaram as tentativas entram em 'falhas' e 'ids_com_falha'.
+    O progresso é impresso a cada ~10% dos jogadores buscados.
+    O DataFrame resultante mantém a ordem de 'lista_de_jogadores'.
+    """
+    limitador = LimitadorDeTaxa(requisicoes_por_segundo)
+    resultados = {}
+    metricas = {'jogadores': len(lista_de_jogadores), 'chamadas_api': 0, 'retentativas': 0, 'falhas': 0, 'sem_dados': 0, 'ids_com_falha': []}
+    inicio = time.perf_counter()
+
+    if incremental and cache is not None and cache.jogos_temporada is None:
+        cache.jogos_temporada = jogos_por_jogador(cache.temporada, limitador, endpoint_jogos, max_tentativas, metricas)
+        if cache.jogos_temporada is None:
+            print("Game log da temporada indisponível; o modo incremental usa só a idade das entradas do cache.")
+
+    pendentes = []
+    for i, jogador in enumerate(lista_de_jogadores):
+        stats_df = cache.obter(jogador['id'], incremental) if cache is not None else None
+        if stats_df is None:
+            pendentes.append((i, jogador))
+        elif stats_df.empty:
+            metricas['sem_dados'] += 1
+        else:
+            stats_df['PLAYER_NAME'] = jogador['full_name']
+            resultados[i] = stats_df
+
+    intervalo_progresso = max(1, len(pendentes) // 10)
+
+    with ThreadPoolExecutor(max_workers=max_em_voo) as executor:
+        futuros = {
+            executor.submit(obter_estatisticas_com_retry, jogador['id'], limitador, endpoint, max_tentativas): (i, jogador)
+            for i, jogador in pendentes
+        }
+        for concluidos, futuro in enumerate(as_completed(futuros), start=1):
+            i, jogador = futuros[futuro]
+            stats_df, tentativas = futuro.result()
+            metricas['chamadas_api'] += tentativas
+            metricas['retentativas'] += tentativas - 1
+            if stats_df is None:
+                metricas['falhas'] += 1
+                metricas['ids_com_falha'].append(jogador['id'])
+            else:
+                if cache is not None:
+                    cache.salvar(jogador['id'], stats_df)
+                if stats_df.empty:
+                    metricas['sem_dados'] += 1
+                else:
+                    stats_df['PLAYER_NAME'] = jogador['full_name']
+                    resultados[i] = stats_df
+            if concluidos % intervalo_progresso == 0 or concluidos == len(pendentes):
+                print(f"Processados {concluidos}/{len(pendentes)} jogadores ({metricas['falhas']} com falha).")
+
+    metricas['segundos'] = round(time.perf_counter() - inicio, 2)
+    print(f"\nExtração concluída em {metricas['segundos']}s: {metricas['chamadas_api']} chamadas, "
+          f"{metricas['retentativas']} retentativas, {metricas['falhas']} jogadores com falha, "
+          f"{metricas['sem_dados']} sem estatísticas.")
+    if cache is not None:
+        metricas['cache'] = cache.resumo()
+        print(f"Cache: {metricas['cache']['acertos']} acertos, {metricas['cache']['faltas']} faltas, "
+              f"{metricas['cache']['bytes_economizados']} bytes economizados, "
+              f"{metricas['cache']['respostas_inalteradas']} respostas inalteradas.")
+
+    if not resultados:
+        return pd.DataFrame(), metricas
+    return pd.concat([resultados[i] for i in sorted(resultados)], ignore_index=True), metricas
+
+# %%
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrai as estatísticas de carreira dos jogadores ativos da NBA.")
+    parser.add_argument('--max-em-voo', type=int, default=MAX_EM_VOO, help="Máximo de requisições simultâneas.")
+    parser.add_argument('--taxa', type=float, default=REQUISICOES_POR_SEGUNDO, help="Requisições por segundo.")
+    parser.add_argument('--tentativas', type=int, default=MAX_TENTATIVAS, help="Tentativas por jogador.")
+    parser.add_argument('--cache', action='store_true', help="Reaproveita respostas em cache dentro do TTL.")
+    parser.add_argument('--incremental', action='store_true', help="Só rebusca quem jogou na temporada atual desde a última busca, segundo o game log da liga; os demais após ETL_CACHE_TTL_HISTORICO (implica --cache).")
+    parser.add_argument('--formato', choices=FORMATOS, default=FORMATO_STAGING, help="Formato do arquivo de staging bruto.")
+    parser.add_argument('--simulado', action='store_true', help="Usa o endpoint local simulado em vez da API da NBA.")
+    parser.add_argument('--historicos', action='store_true', help="Extrai todos os jogadores da história da NBA, não só os ativos.")
+    args = parser.parse_args()
+
+    endpoint = playercareerstats.PlayerCareerStats
+    endpoint_jogos = playergamelogs.PlayerGameLogs
     print("Iniciando a extração de jogadores da NBA")
-    lista_de_jogadores = obter_todos_os_jogadores()
+    if args.simulado:
+        from etl.endpoint_simulado import criar_endpoint_simulado, criar_endpoint_jogos_simulado, obter_todos_os_jogadores_simulados
+        endpoint = criar_endpoint_simulado()
+        lista_de_jogadores = obter_todos_os_jogadores_simulados(args.historicos)
+        endpoint_jogos = criar_endpoint_jogos_simulado(lista_de_jogadores)
+    else:
+        lista_de_jogadores = obter_todos_os_jogadores(args.historicos)
+
+    cache = None
+    if args.cache or args.incremental:
+        cache = CacheRespostas(project_root_dir / 'data' / 'cache' / 'carreira')
 
     if lista_de_jogadores:
         print(f"Total de jogadores ativos encontrados: {len(lista_de_jogadores)}")
         print(f"\nExtraindo estatísticas para todos os {len(lista_de_jogadores)} jogadores.")
-        jogadores_selecionados = lista_de_jogadores
-
-        todas_estatisticas = []
-        for i, jogador in enumerate(jogadores_selecionados):
-            player_id = jogador['id']
-            player_name = jogador['full_name']
-            print(f"Processando jogador {i+1}/{len(jogadores_selecionados)}: {player_name} (ID: {player_id})")
-
-            stats_df = obter_estatisticas_carreira_jogador(player_id)
-            if not stats_df.empty:
-                stats_df['PLAYER_NAME'] = player_name
-                todas_estatisticas.append(stats_df)
 
-            time.sleep(0.3)
+        df_final_estatisticas, _ = extrair_estatisticas_concorrente(
+            lista_de_jogadores,
+            endpoint=endpoint,
+            max_em_voo=args.max_em_voo,
+            requisicoes_por_segundo=args.taxa,
+            max_tentativas=args.tentativas,
+            cache=cache,
+            incremental=args.incremental,
+            endpoint_jogos=endpoint_jogos
+        )
 
-        if todas_estatisticas:
-            df_final_estatisticas = pd.concat(todas_estatisticas, ignore_index=True)
+        if not df_final_estatisticas.empty:
             print("\nPrimeiras 5 linhas do DataFrame final de estatísticas:")
             print(df_final_estatisticas.head())
 
-            output_path_raw = Path(__file__).resolve().parent.parent.parent / 'data' / 'raw' / 'nba_stats_brutas.csv'
-            output_path_raw.parent.mkdir(parents=True, exist_ok=True) 
-            df_final_estatisticas.to_csv(output_path_raw, index=False)
+            output_path_raw = salvar_staging(
+                df_final_estatisticas,
+                project_root_dir / 'data' / 'raw' / 'nba_stats_brutas',
+                formato=args.formato,
+                coluna_particao='SEASON_ID'
+            )
             print(f"\nDados de estatísticas salvos em '{output_path_raw}'")
         else:
             print("Nenhuma estatística de jogador foi extraída com sucesso.")
@@ -0,0 +1,211 @@
+import pandas as pd
+from nba_api.stats.endpoints import playergamelogs
+from sqlalchemy import delete
+from pathlib import Path
+from dotenv import load_dotenv
+import argparse
+import sys
+import time
+
+# %%
+
+script_dir = Path(__file__).resolve().parent
+src_dir = script_dir.parent
+project_root_dir = src_dir.parent
+
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+dotenv_path = project_root_dir / '.env'
+load_dotenv(dotenv_path)
+
+from etl.cache_respostas import temporada_atual
+from etl.extract import LimitadorDeTaxa, chamar_com_retry, REQUISICOES_POR_SEGUNDO, MAX_TENTATIVAS
+from etl.staging import salvar_staging
+
+CAMINHO_JOGOS_BRUTOS = project_root_dir / 'data' / 'raw' / 'jogos_brutos'
+CAMINHO_JOGOS = project_root_dir / 'data' / 'processed' / 'jogos'
+
+# %%
+
+NOVOS_NOMES_JOGOS = {
+    'SEASON_YEAR': 'temporada',
+    'PLAYER_ID': 'id_jogador',
+    'TEAM_ID': 'id_time',
+    'GAME_ID': 'id_jogo',
+    'GAME_DATE': 'data_jogo',
+    'MATCHUP': 'confronto',
+    'WL': 'resultado',
+    'MIN': 'minutos',
+    'PTS': 'pontos',
+    'REB': 'rebotes',
+    'AST': 'assistencias',
+    'STL': 'roubos',
+    'BLK': 'tocos',
+    'TOV': 'erros',
+    'FGM': 'arremessos_convertidos',
+    'FGA': 'arremessos_tentados',
+    'FG3M': 'arremessos_3pts_convertidos',
+    'FG3A': 'arremessos_3pts_tentados',
+    'FTM': 'lances_livres_convertidos',
+    'FTA': 'lances_livres_tentados',
+    'PLUS_MINUS': 'saldo_pontos'
+}
+COLUNAS_JOGOS_ORIGINAIS = list(NOVOS_NOMES_JOGOS)
+
+COLUNAS_CONTAGEM_JOGO = [
+    'pontos', 'rebotes', 'assistencias', 'roubos', 'tocos', 'erros',
+    'arremessos_convertidos', 'arremessos_tentados', 'arremessos_3pts_convertidos', 'arremessos_3pts_tentados',
+    'lances_livres_convertidos', 'lances_livres_tentados', 'saldo_pontos'
+]
+
+# Estatísticas de um jogo cabem em int16; ids em int32 (GAME_ID '0022400001' vira 22400001).
+TIPOS_JOGOS = {
+    'id_jogador': 'int32',
+    'data_jogo': 'datetime64[s]',
+    'id_jogo': 'int32',
+    'temporada': 'category',
+    'id_time': 'int32',
+    'adversario': 'category',
+    'mandante': 'bool',
+    'vitoria': 'bool',
+    'minutos': 'float32',
+    **{col: 'int16' for col in COLUNAS_CONTAGEM_JOGO}
+}
+COLUNAS_JOGOS = list(TIPOS_JOGOS)
+
+# %%
+
+def extrair_jogos_temporada(temporada, limitador, endpoint=playergamelogs.PlayerGameLogs, max_tentativas=MAX_TENTATIVAS):
+    """Busca o game log da temporada regular da liga inteira numa única chamada.
+
+    Retorna (DataFrame com as colunas de COLUNAS_JOGOS_ORIGINAIS, tentativas).
+    """
+    df, tentativas = chamar_com_retry(
+        lambda: endpoint(season_nullable=temporada, season_type_nullable='Regular Season').get_data_frames()[0],
+        limitador, f"a temporada {temporada}", max_tentativas
+    )
+    if df is None:
+        return pd.DataFrame(columns=COLUNAS_JOGOS_ORIGINAIS), tentativas
+    return df[[col for col in COLUNAS_JOGOS_ORIGINAIS if col in df.columns]], tentativas
+
+def transformar_jogos(df_bruto):
+    """Renomeia, tipa e deduplica o game log bruto.
+
+    Deriva 'adversario' e 'mandante' de MATCHUP ('BOS vs. MIA' / 'BOS @ MIA')
+    e 'vitoria' de WL. O resultado fica ordenado por
+    (id_jogador, data_jogo, id_jogo), a mesma ordem da chave primária.
+    """
+    if df_bruto.empty:
+        return pd.DataFrame(columns=COLUNAS_JOGOS)
+
+    df = df_bruto.rename(columns=NOVOS_NOMES_JOGOS)
+    df = df.dropna(subset=['id_jogador', 'id_jogo', 'data_jogo'])
+    df['data_jogo'] = pd.to_datetime(df['data_jogo']).dt.normalize()
+    df['id_jogo'] = pd.to_numeric(df['id_jogo'])
+    df['adversario'] = df['confronto'].str[-3:]
+    df['mandante'] = df['confronto'].str.contains(' vs. ', regex=False)
+    df['vitoria'] = df['resultado'] == 'W'
+    df['minutos'] = pd.to_numeric(df['minutos'], errors='coerce').fillna(0)
+    df[COLUNAS_CONTAGEM_JOGO] = df[COLUNAS_CONTAGEM_JOGO].apply(pd.to_numeric, errors='coerce').fillna(0)
+
+    df = df[COLUNAS_JOGOS].astype(TIPOS_JOGOS)
+    df = df.drop_duplicates(subset=['id_jogador', 'id_jogo'])
+    return df.sort_values(['id_jogador', 'data_jogo', 'id_jogo']).reset_index(drop=True)
+
+def carregar_jogos(df, engine_destino=None, tamanho_lote=None):
+    """Substitui em 'estatisticas_jogo' as temporadas presentes no DataFrame.
+
+    Cada temporada é apagada e regravada numa única transação, então quem lê
+    vê a temporada antiga ou a nova, nunca uma mistura; a mesma transação
+    incrementa a versão de carga 'jogos'. Retorna o número de linhas gravadas.
+    """
+    from dashboard.db_setup import obter_engine, EstatisticaJogo, VersaoCarga
+    from etl.load import inserir_em_lotes, para_registros, TAMANHO_LOTE
+    from etl.materializacao import registrar_versao_carga
+
+    engine_destino = engine_destino or obter_engine()
+    tamanho_lote = tamanho_lote or TAMANHO_LOTE
+    tabela = EstatisticaJogo.__table__
+    tabela.create(engine_destino, checkfirst=True)
+    VersaoCarga.__table__.create(engine_destino, checkfirst=True)
+
+    linhas = 0
+    for temporada, grupo in df.groupby('temporada', observed=True, sort=True):
+        registros = para_registros(grupo.assign(data_jogo=grupo['data_jogo'].dt.date), COLUNAS_JOGOS)
+        with engine_destino.begin() as conn:
+            conn.execute(delete(tabela).where(tabela.c.temporada == str(temporada)))
+            linhas += inserir_em_lotes(conn, tabela, registros, tamanho_lote)
+            registrar_versao_carga(conn, 'jogos')
+    return linhas
+
+# %%
+
+def atualizar_jogos(temporadas, endpoint=playergamelogs.PlayerGameLogs, requisicoes_por_segundo=REQUISICOES_POR_SEGUNDO,
+                    max_tentativas=MAX_TENTATIVAS, engine_destino=None, carregar=True):
+    """Extrai, transforma e carrega o game log das temporadas informadas, uma temporada por vez.
+
+    Os dados brutos e transformados vão para Parquet particionado por
+    temporada ('data/raw/jogos_brutos', 'data/processed/jogos'); só as
+    partições das temporadas processadas são regravadas. Com 'carregar',
+    cada temporada também substitui a sua parte de 'estatisticas_jogo'.
+    Retorna um dict de métricas por temporada.
+    """
+    limitador = LimitadorDeTaxa(requisicoes_por_segundo)
+    metricas = {}
+    for temporada in temporadas:
+        inicio = time.perf_counter()
+        df_bruto, tentativas = extrair_jogos_temporada(temporada, limitador, endpoint, max_tentativas)
+        if df_bruto.empty:
+            print(f"Temporada {temporada}: nenhum jogo extraído.")
+            continue
+        salvar_staging(df_bruto, CAMINHO_JOGOS_BRUTOS, formato='parquet', coluna_particao='SEASON_YEAR', substituir_particoes=True)
+
+        df_jogos = transformar_jogos(df_bruto)
+        destino = salvar_staging(df_jogos, CAMINHO_JOGOS, formato='parquet', coluna_particao='temporada', substituir_particoes=True)
+        bytes_parquet = sum(arquivo.stat().st_size for arquivo in (destino / f"temporada={temporada}").glob('*.parquet'))
+
+        linhas_carregadas = carregar_jogos(df_jogos, engine_destino) if carregar else 0
+        metricas[temporada] = {
+            'tentativas': tentativas,
+            'linhas_brutas': len(df_bruto),
+            'linhas': len(df_jogos),
+            'memoria_bruta_mb': round(df_bruto.memory_usage(deep=True).sum() / 1024 ** 2, 2),
+            'memoria_mb': round(df_jogos.memory_usage(deep=True).sum() / 1024 ** 2, 2),
+            'bytes_parquet': bytes_parquet,
+            'linhas_carregadas': linhas_carregadas,
+            'segundos': round(time.perf_counter() - inicio, 2)
+        }
+        m = metricas[temporada]
+        print(f"Temporada {temporada}: {m['linhas']} jogos, {m['memoria_bruta_mb']} MB brutos -> {m['memoria_mb']} MB tipados, "
+              f"{m['bytes_parquet'] / 1024 ** 2:.2f} MB em Parquet, {m['linhas_carregadas']} linhas carregadas em {m['segundos']}s.")
+    return metricas
+
+# %%
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrai, transforma e carrega o game log (estatísticas por jogo) por temporada.")
+    parser.add_argument('--temporadas', nargs='+', default=None, help="Temporadas no formato 2024-25 (padrão: a temporada atual).")
+    parser.add_argument('--taxa', type=float, default=REQUISICOES_POR_SEGUNDO, help="Requisições por segundo.")
+    parser.add_argument('--tentativas', type=int, default=MAX_TENTATIVAS, help="Tentativas por temporada.")
+    parser.add_argument('--sem-carga', action='store_true', help="Só grava o Parquet, sem carregar no banco.")
+    parser.add_argument('--simulado', action='store_true', help="Usa o endpoint local simulado em vez da API da NBA.")
+    args = parser.parse_args()
+
+    endpoint = playergamelogs.PlayerGameLogs
+    temporadas = args.temporadas
+    if args.simulado:
+        from etl.endpoint_simulado import criar_endpoint_jogos_simulado
+        endpoint = criar_endpoint_jogos_simulado()
+        temporadas = temporadas or ['2024-25']
+    temporadas = temporadas or [temporada_atual()]
+
+    print(f"Atualizando o game log de {len(temporadas)} temporada(s): {', '.join(temporadas)}")
+    atualizar_jogos(
+        temporadas,
+        endpoint=endpoint,
+        requisicoes_por_segundo=args.taxa,
+        max_tentativas=args.tentativas,
+        carregar=not args.sem_carga
+    )
+    print("\nProcesso do game log concluído.")
@@ -1,9 +1,15 @@
 import pandas as pd
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import text
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy import text, insert, delete, select, MetaData, Table, Column, Index, ForeignKeyConstraint, UniqueConstraint
 from pathlib import Path
 from dotenv import load_dotenv
+import argparse
+import os
 import sys
+import tempfile
+import time
 
 # %%
 
@@ -17,89 +23,478 @@ if str(src_dir) not in sys.path:
 dotenv_path = project_root_dir / '.env'
 load_dotenv(dotenv_path)
 
-from dashboard.db_setup import engine, SessionLocal, Jogador, EstatisticaTemporada
+from dashboard.db_setup import obter_engine, Base, Jogador, EstatisticaTemporada, EvolucaoTemporada, AgregadoTemporada, DB_LOCAL_INFILE
+from etl.staging import ler_staging
+from etl.materializacao import materializar_derivadas, registrar_versao_carga
+
+TAMANHO_LOTE = int(os.getenv('ETL_TAMANHO_LOTE', 5000))
+MODOS_CARGA = ('substituir', 'troca', 'incremental')
+DIALETOS_UPSERT = ('mysql', 'sqlite') # Bancos com upsert nativo, exigido pelo modo 'incremental'
+# 'troca' é opt-in: cria, renomeia e apaga tabelas, o que pede CREATE, DROP e ALTER ao usuário do banco.
+MODO_CARGA = os.getenv('ETL_MODO_CARGA', 'substituir')
+SUFIXO_SOMBRA = '_novo'
+SUFIXO_ANTIGO = '_antigo'
 
 # %%
 
-def carregar_para_mysql(df):
-    if df.empty:
-        print("DataFrame vazio, sem dados para carregar.")
+COLUNAS_JOGADORES = ['id_jogador', 'nome_jogador']
+COLUNAS_ESTATISTICAS = [
+    'id_jogador', 'temporada', 'id_time', 'sigla_time', 'jogos_jogados',
+    'pontos', 'assistencias', 'rebotes',
+    'perc_arremessos_quadra', 'perc_arremessos_3pts', 'perc_lances_livres'
+]
+COLUNAS_TEXTO = ['nome_jogador', 'temporada', 'sigla_time']
+CHAVE_ESTATISTICA = ['id_jogador', 'temporada', 'id_time']
+
+# %%
+
+def _limpar_tabelas(conn):
+    if conn.dialect.name == 'mysql':
+        conn.execute(text("SET FOREIGN_KEY_CHECKS = 0;"))
+        conn.execute(text(f"TRUNCATE TABLE {EstatisticaTemporada.__tablename__};"))
+        conn.execute(text(f"TRUNCATE TABLE {Jogador.__tablename__};"))
+        conn.execute(text("SET FOREIGN_KEY_CHECKS = 1;"))
+    else:
+        conn.execute(delete(EstatisticaTemporada.__table__))
+        conn.execute(delete(Jogador.__table__))
+
+def para_registros(df, colunas):
+    """Converte as colunas do DataFrame em dicts com tipos Python nativos e None no lugar de NaN."""
+    df_colunas = df[colunas].astype(object)
+    return df_colunas.where(df[colunas].notna(), None).to_dict('records')
+
+def inserir_em_lotes(conn, tabela, registros, tamanho_lote):
+    """Insere 'registros' (de para_registros) em 'tabela' com um executemany a cada 'tamanho_lote' linhas; retorna o total."""
+    for inicio in range(0, len(registros), tamanho_lote):
+        conn.execute(insert(tabela), registros[inicio:inicio + tamanho_lote])
+    return len(registros)
+
+def _local_infile_disponivel(conn):
+    if conn.dialect.name != 'mysql':
+        return False
+    try:
+        valor = conn.execute(text("SHOW GLOBAL VARIABLES LIKE 'local_infile'")).fetchone()
+        return valor is not None and str(valor[1]).upper() in ('ON', '1')
+    except Exception:
+        return False
+
+def _carregar_via_infile(conn, tabela, df, colunas):
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8', newline='') as arquivo:
+        df[colunas].to_csv(arquivo, index=False, header=False, na_rep='\\N', lineterminator='\n')
+        caminho = arquivo.name
+    try:
+        conn.execute(
+            text(
+                f"LOAD DATA LOCAL INFILE :caminho INTO TABLE {tabela.name} "
+                "CHARACTER SET utf8mb4 FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+                f"LINES TERMINATED BY '\\n' ({', '.join(colunas)})"
+            ),
+            {'caminho': caminho}
+        )
+    finally:
+        os.remove(caminho)
+    return len(df)
+
+def _modo_insercao(conn, tamanho_lote, usar_infile):
+    infile = usar_infile and DB_LOCAL_INFILE and _local_infile_disponivel(conn)
+    return infile, 'LOAD DATA LOCAL INFILE' if infile else f"insert em lotes de {tamanho_lote}"
+
+def _inserir_lote(conn, tabela_jogadores, tabela_estatisticas, df, tamanho_lote, infile, ids_carregados):
+    df_jogadores = df[COLUNAS_JOGADORES].drop_duplicates(subset='id_jogador', keep='last')
+    df_jogadores = df_jogadores[~df_jogadores['id_jogador'].isin(ids_carregados)]
+    ids_carregados.update(int(i) for i in df_jogadores['id_jogador'])
+
+    if infile:
+        jogadores = _carregar_via_infile(conn, tabela_jogadores, df_jogadores, COLUNAS_JOGADORES)
+        estatisticas = _carregar_via_infile(conn, tabela_estatisticas, df, COLUNAS_ESTATISTICAS)
+    else:
+        jogadores = inserir_em_lotes(conn, tabela_jogadores, para_registros(df_jogadores, COLUNAS_JOGADORES), tamanho_lote)
+        estatisticas = inserir_em_lotes(conn, tabela_estatisticas, para_registros(df, COLUNAS_ESTATISTICAS), tamanho_lote)
+    return jogadores, estatisticas
+
+def _inserir_dados(engine_destino, tabela_jogadores, tabela_estatisticas, lotes, tamanho_lote, usar_infile):
+    """Insere cada DataFrame de 'lotes' em sua própria transação.
+
+    Só um lote fica em memória por vez. Um jogador que aparece em mais de um
+    lote é inserido em 'tabela_jogadores' apenas na primeira vez.
+    """
+    with engine_destino.connect() as conn:
+        infile, metodo = _modo_insercao(conn, tamanho_lote, usar_infile)
+    print(f"\nCarregando dados para as tabelas '{tabela_jogadores.name}' e '{tabela_estatisticas.name}' ({metodo})...")
+
+    ids_carregados = set()
+    total_lotes = total_jogadores = total_estatisticas = 0
+    for df in lotes:
+        if df.empty:
+            continue
+        with engine_destino.begin() as conn:
+            jogadores, estatisticas = _inserir_lote(
+                conn, tabela_jogadores, tabela_estatisticas, df, tamanho_lote, infile, ids_carregados
+            )
+        total_lotes += 1
+        total_jogadores += jogadores
+        total_estatisticas += estatisticas
+
+    print(f"Total de {total_jogadores} jogadores inseridos em '{tabela_jogadores.name}'.")
+    print(f"Total de {total_estatisticas} estatísticas inseridas em '{tabela_estatisticas.name}'.")
+    return {'metodo': metodo, 'lotes': total_lotes, 'linhas': total_jogadores + total_estatisticas}
+
+# %%
+
+def _copiar_tabela(tabela, metadata, nome, renomear_referencias, com_indices=True):
+    """Cria em 'metadata' uma cópia de 'tabela' chamada 'nome', com as mesmas colunas, chaves e índices.
+
+    Chaves estrangeiras para tabelas em 'renomear_referencias' passam a apontar
+    para o novo nome.
+    """
+    colunas = [
+        Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable, autoincrement=c.autoincrement)
+        for c in tabela.columns
+    ]
+    restricoes = [
+        ForeignKeyConstraint(
+            [fk.parent.name],
+            [f"{renomear_referencias.get(fk.column.table.name, fk.column.table.name)}.{fk.column.name}"]
+        )
+        for fk in tabela.foreign_keys
+    ]
+    restricoes += [
+        UniqueConstraint(*[c.name for c in uc.columns], name=uc.name)
+        for uc in tabela.constraints if isinstance(uc, UniqueConstraint)
+    ]
+    copia = Table(nome, metadata, *colunas, *restricoes)
+
+    if com_indices:
+        for idx in tabela.indexes:
+            Index(idx.name, *[copia.c[c.name] for c in idx.columns], unique=idx.unique)
+    return copia
+
+def _remover_tabelas(conn, nomes):
+    for nome in nomes:
+        conn.execute(text(f"DROP TABLE IF EXISTS {nome}"))
+
+def _trocar_tabelas(conn, tabelas):
+    """Renomeia atomicamente cada tabela ativa para '<nome>_antigo' e a sombra correspondente para o nome ativo.
+
+    'tabelas' são as tabelas do modelo, na ordem em que as antigas podem ser
+    removidas (dependentes primeiro).
+    """
+    if conn.dialect.name == 'mysql':
+        renomeacoes = [f"{t.name} TO {t.name}{SUFIXO_ANTIGO}" for t in tabelas]
+        renomeacoes += [f"{t.name}{SUFIXO_SOMBRA} TO {t.name}" for t in tabelas]
+        conn.execute(text(f"RENAME TABLE {', '.join(renomeacoes)}"))
         return
 
-    session = SessionLocal()
+    # No SQLite o DDL é transacional, mas o pysqlite não abre transação antes de
+    # DDL; o BEGIN explícito faz o commit publicar todas as renomeações de uma vez.
+    if not conn.connection.dbapi_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN")
+    for t in tabelas:
+        conn.execute(text(f"ALTER TABLE {t.name} RENAME TO {t.name}{SUFIXO_ANTIGO}"))
+    for t in tabelas:
+        conn.execute(text(f"ALTER TABLE {t.name}{SUFIXO_SOMBRA} RENAME TO {t.name}"))
+    # Nomes de índice são globais no SQLite e não podem ser renomeados: as
+    # sombras nascem sem índices, que são criados com os nomes do modelo
+    # depois que as tabelas antigas (donas desses nomes) são removidas.
+    _remover_tabelas(conn, [f"{t.name}{SUFIXO_ANTIGO}" for t in tabelas])
+    for t in tabelas:
+        for idx in t.indexes:
+            idx.create(conn)
+
+def _carregar_com_troca(engine_destino, lotes, tamanho_lote, usar_infile):
+    # Tabelas trocadas juntas, dependentes primeiro: as derivadas também ganham sombras,
+    # para que a troca publique dados e tabelas derivadas de uma vez.
+    tabelas = [EvolucaoTemporada.__table__, AgregadoTemporada.__table__, EstatisticaTemporada.__table__, Jogador.__table__]
+    sombras = [f"{t.name}{SUFIXO_SOMBRA}" for t in tabelas]
+    antigas = [f"{t.name}{SUFIXO_ANTIGO}" for t in tabelas]
+
+    with engine_destino.begin() as conn:
+        _remover_tabelas(conn, sombras + antigas)
+        com_indices = conn.dialect.name == 'mysql'
+        metadata_sombra = MetaData()
+        copias = [
+            _copiar_tabela(t, metadata_sombra, sombra, {Jogador.__tablename__: f"{Jogador.__tablename__}{SUFIXO_SOMBRA}"}, com_indices)
+            for t, sombra in zip(tabelas, sombras)
+        ]
+        metadata_sombra.create_all(conn)
+    tabela_estatisticas, tabela_jogadores = copias[2], copias[3]
+    print(f"Tabelas sombra criadas: {', '.join(sombras)}.")
+
     try:
-        session.execute(text("SET FOREIGN_KEY_CHECKS = 0;"))
-        session.execute(text(f"TRUNCATE TABLE {EstatisticaTemporada.__tablename__};"))
-        session.execute(text(f"TRUNCATE TABLE {Jogador.__tablename__};"))
-        session.execute(text("SET FOREIGN_KEY_CHECKS = 1;"))
-        session.commit()
-        print("Tabelas limpas com sucesso.")
-    except Exception as e:
-        session.rollback()
-        print(f"Erro ao limpar tabelas: {e}")
-
-    print("\nCarregando dados para a tabela 'jogadores'...")
-    df_jogadores = df[['id_jogador', 'nome_jogador']].drop_duplicates().copy()
-
-    jogadores_processados = 0
-    for index, row in df_jogadores.iterrows():
-        jogador = Jogador(id_jogador=row['id_jogador'], nome_jogador=row['nome_jogador'])
-        try:
-            session.merge(jogador)
-            jogadores_processados += 1
-        except IntegrityError:
-            session.rollback()
-            print(f"Erro de integridade ao adicionar jogador {row['nome_jogador']}.")
-            
-    session.commit()
-    print(f"Total de {jogadores_processados} jogadores processados (inseridos/atualizados) em 'jogadores'.")
-    print("\nCarregando dados para a tabela 'estatisticas_temporada'...")
-    estatisticas_para_adicionar = []
-    for index, row in df.iterrows():
-        stat = EstatisticaTemporada(
-            id_jogador=row['id_jogador'],
-            temporada=row['temporada'],
-            id_time=row['id_time'],
-            sigla_time=row['sigla_time'],
-            jogos_jogados=row['jogos_jogados'],
-            pontos=row['pontos'],
-            assistencias=row['assistencias'],
-            rebotes=row['rebotes'],
-            perc_arremessos_quadra=row['perc_arremessos_quadra'],
-            perc_arremessos_3pts=row['perc_arremessos_3pts'],
-            perc_lances_livres=row['perc_lances_livres']
+        resultado = _inserir_dados(engine_destino, tabela_jogadores, tabela_estatisticas, lotes, tamanho_lote, usar_infile)
+        if resultado['linhas']:
+            with engine_destino.begin() as conn:
+                resultado.update(materializar_derivadas(conn, sufixo=SUFIXO_SOMBRA))
+    except Exception:
+        with engine_destino.begin() as conn:
+            _remover_tabelas(conn, sombras)
+        raise
+    if not resultado['linhas']:
+        # Publicar sombras vazias apagaria os dados ativos.
+        with engine_destino.begin() as conn:
+            _remover_tabelas(conn, sombras)
+        print("Nenhuma linha recebida; as tabelas ativas foram mantidas.")
+        return resultado
+
+    # No SQLite a troca e a versão são uma só transação. No MySQL o RENAME TABLE
+    # faz commit implícito: a versão é publicada logo depois e, se isso falhar,
+    # a exceção sobe e a carga é reportada como falha.
+    with engine_destino.begin() as conn:
+        _trocar_tabelas(conn, tabelas)
+        resultado['versao_carga'] = registrar_versao_carga(conn, 'temporadas')
+    print(f"Tabelas sombra publicadas com troca atômica (versão de carga {resultado['versao_carga']}).")
+
+    with engine_destino.begin() as conn:
+        _remover_tabelas(conn, antigas)
+    return resultado
+
+def _carregar_substituindo(engine_destino, lotes, tamanho_lote, usar_infile):
+    with engine_destino.begin() as conn:
+        _limpar_tabelas(conn)
+    print("Tabelas limpas com sucesso.")
+
+    resultado = _inserir_dados(engine_destino, Jogador.__table__, EstatisticaTemporada.__table__, lotes, tamanho_lote, usar_infile)
+    # Este modo já deixa as tabelas vazias durante a carga; as derivadas e a versão saem juntas no fim.
+    with engine_destino.begin() as conn:
+        resultado.update(materializar_derivadas(conn))
+        resultado['versao_carga'] = registrar_versao_carga(conn, 'temporadas')
+    return resultado
+
+# %%
+
+def _normalizar_para_hash(df, colunas):
+    normalizado = pd.DataFrame(index=df.index)
+    for col in colunas:
+        if col in COLUNAS_TEXTO:
+            normalizado[col] = df[col].fillna('').astype(str)
+        else:
+            normalizado[col] = pd.to_numeric(df[col].astype(float), errors='coerce').round(3)
+    return pd.util.hash_pandas_object(normalizado, index=False)
+
+def _ler_atuais(conn, tabela, colunas, ids_jogadores):
+    """Lê as linhas atuais dos jogadores informados, em blocos para não estourar o limite de parâmetros."""
+    ids = sorted(int(i) for i in ids_jogadores)
+    blocos = [
+        pd.read_sql(select(*[tabela.c[c] for c in colunas]).where(tabela.c.id_jogador.in_(ids[i:i + 1000])), conn)
+        for i in range(0, len(ids), 1000)
+    ]
+    blocos = [b for b in blocos if not b.empty]
+    return pd.concat(blocos, ignore_index=True) if blocos else pd.DataFrame(columns=colunas)
+
+def _upsert_em_lotes(conn, tabela, registros, chaves, tamanho_lote):
+    if conn.dialect.name == 'mysql':
+        instrucao = mysql_insert(tabela)
+        instrucao = instrucao.on_duplicate_key_update({
+            c.name: instrucao.inserted[c.name] for c in tabela.columns if c.name in registros[0] and c.name not in chaves
+        })
+    elif conn.dialect.name == 'sqlite':
+        instrucao = sqlite_insert(tabela)
+        instrucao = instrucao.on_conflict_do_update(
+            index_elements=chaves,
+            set_={c.name: instrucao.excluded[c.name] for c in tabela.columns if c.name in registros[0] and c.name not in chaves}
         )
-        estatisticas_para_adicionar.append(stat)
-    
+    else:
+        raise ValueError(f"Upsert não suportado para o banco '{conn.dialect.name}'. Use um de {DIALETOS_UPSERT}.")
+
+    for inicio in range(0, len(registros), tamanho_lote):
+        conn.execute(instrucao, registros[inicio:inicio + tamanho_lote])
+    return len(registros)
+
+def _diferenca(df_novo, df_atual, chaves, colunas):
+    """Compara por hash de conteúdo e separa as linhas novas, alteradas, removidas e inalteradas."""
+    novo = df_novo[colunas].copy()
+    atual = df_atual.copy()
+    novo['_hash'] = _normalizar_para_hash(novo, colunas).values
+    atual['_hash'] = _normalizar_para_hash(atual, colunas).values if not atual.empty else pd.Series(dtype='uint64')
+
+    cruzado = novo.merge(atual[chaves + ['_hash']], on=chaves, how='outer', suffixes=('', '_atual'), indicator=True)
+    inseridas = cruzado[cruzado['_merge'] == 'left_only']
+    comuns = cruzado[cruzado['_merge'] == 'both']
+    atualizadas = comuns[comuns['_hash'] != comuns['_hash_atual']]
+    removidas = cruzado[cruzado['_merge'] == 'right_only']
+    return inseridas[colunas], atualizadas[colunas], removidas[chaves], len(comuns) - len(atualizadas)
+
+def _carregar_lote_incremental(engine_destino, df, tamanho_lote):
+    tabela_jogadores = Jogador.__table__
+    tabela_estatisticas = EstatisticaTemporada.__table__
+    ids_jogadores = df['id_jogador'].unique()
+    df_jogadores = df[COLUNAS_JOGADORES].drop_duplicates(subset='id_jogador', keep='last')
+    relatorio = {}
+
+    with engine_destino.begin() as conn:
+        atuais_jogadores = _ler_atuais(conn, tabela_jogadores, COLUNAS_JOGADORES, ids_jogadores)
+        novos, alterados, _, inalterados = _diferenca(df_jogadores, atuais_jogadores, ['id_jogador'], COLUNAS_JOGADORES)
+        pendentes = pd.concat([novos, alterados], ignore_index=True)
+        if not pendentes.empty:
+            _upsert_em_lotes(conn, tabela_jogadores, para_registros(pendentes, COLUNAS_JOGADORES), ['id_jogador'], tamanho_lote)
+        relatorio['jogadores'] = {'inseridas': len(novos), 'atualizadas': len(alterados), 'ignoradas': inalterados}
+
+        atuais = _ler_atuais(conn, tabela_estatisticas, COLUNAS_ESTATISTICAS, ids_jogadores)
+        inseridas, atualizadas, removidas, inalteradas = _diferenca(df, atuais, CHAVE_ESTATISTICA, COLUNAS_ESTATISTICAS)
+        pendentes = pd.concat([inseridas, atualizadas], ignore_index=True)
+        if not pendentes.empty:
+            _upsert_em_lotes(conn, tabela_estatisticas, para_registros(pendentes, COLUNAS_ESTATISTICAS), CHAVE_ESTATISTICA, tamanho_lote)
+        for chave in removidas.itertuples(index=False):
+            conn.execute(delete(tabela_estatisticas).where(
+                tabela_estatisticas.c.id_jogador == int(chave.id_jogador),
+                tabela_estatisticas.c.temporada == chave.temporada,
+                tabela_estatisticas.c.id_time == int(chave.id_time)
+            ))
+        relatorio['estatisticas'] = {
+            'inseridas': len(inseridas), 'atualizadas': len(atualizadas),
+            'removidas': len(removidas), 'ignoradas': inalteradas
+        }
+        relatorio['temporadas_alteradas'] = sorted(
+            set(inseridas['temporada']) | set(atualizadas['temporada']) | set(removidas['temporada'])
+        )
+
+        # Um nome alterado muda as listas de melhores dos agregados das temporadas do jogador.
+        renomeados = df[df['id_jogador'].isin(alterados['id_jogador'])]['temporada']
+
+        # Derivadas e versão na mesma transação do upsert: o lote é publicado inteiro ou não é publicado.
+        if relatorio['temporadas_alteradas'] or not renomeados.empty:
+            alteracoes = pd.concat(
+                [inseridas[['id_jogador', 'temporada']], atualizadas[['id_jogador', 'temporada']], removidas[['id_jogador', 'temporada']]]
+            ).drop_duplicates()
+            relatorio.update(materializar_derivadas(
+                conn, sorted(set(renomeados)), alteracoes=alteracoes.itertuples(index=False, name=None)
+            ))
+            relatorio['versao_carga'] = registrar_versao_carga(conn, 'temporadas')
+
+    return relatorio
+
+def _carregar_incremental(engine_destino, lotes, tamanho_lote):
+    """Aplica a carga incremental lote a lote; cada lote precisa trazer todas as linhas dos seus jogadores."""
+    relatorio = {
+        'metodo': f"upsert em lotes de {tamanho_lote}",
+        'lotes': 0,
+        'jogadores': {'inseridas': 0, 'atualizadas': 0, 'ignoradas': 0},
+        'estatisticas': {'inseridas': 0, 'atualizadas': 0, 'removidas': 0, 'ignoradas': 0},
+        'evolucao_temporada': 0,
+        'agregados_temporada': 0,
+        'versao_carga': None
+    }
+    temporadas_alteradas = set()
+    for df in lotes:
+        if df.empty:
+            continue
+        parcial = _carregar_lote_incremental(engine_destino, df, tamanho_lote)
+        relatorio['lotes'] += 1
+        for tabela in ('jogadores', 'estatisticas'):
+            for chave, valor in parcial[tabela].items():
+                relatorio[tabela][chave] += valor
+        temporadas_alteradas.update(parcial['temporadas_alteradas'])
+        for chave in ('evolucao_temporada', 'agregados_temporada'):
+            relatorio[chave] += parcial.get(chave, 0)
+        relatorio['versao_carga'] = parcial.get('versao_carga', relatorio['versao_carga'])
+    relatorio['temporadas_alteradas'] = sorted(temporadas_alteradas)
+
+    tocadas = sum(v for r in (relatorio['jogadores'], relatorio['estatisticas']) for k, v in r.items() if k != 'ignoradas')
+    ignoradas = relatorio['jogadores']['ignoradas'] + relatorio['estatisticas']['ignoradas']
+    relatorio.update({'linhas': tocadas, 'linhas_ignoradas': ignoradas})
+    print(f"Jogadores: {relatorio['jogadores']}")
+    print(f"Estatísticas: {relatorio['estatisticas']}")
+    print(f"Linhas tocadas: {tocadas} | linhas inalteradas ignoradas: {ignoradas}")
+    return relatorio
+
+# %%
+
+def carregar_para_mysql(df, engine_destino=None, tamanho_lote=TAMANHO_LOTE, usar_infile=True, modo=MODO_CARGA):
+    """Substitui o conteúdo de 'jogadores' e 'estatisticas_temporada' pelo DataFrame.
+
+    As linhas são inseridas com insert() do SQLAlchemy Core em lotes de
+    'tamanho_lote' (executemany), ou com LOAD DATA LOCAL INFILE quando o
+    servidor MySQL permite e a conexão foi aberta com DB_LOCAL_INFILE=1.
+
+    No modo 'substituir' as tabelas são esvaziadas e recarregadas, ficando
+    vazias durante a carga. No modo 'troca' os dados vão para tabelas sombra
+    que substituem as ativas num único RENAME TABLE, então o dashboard nunca
+    lê tabelas vazias ou pela metade; o usuário do banco precisa dos
+    privilégios CREATE, DROP e ALTER. No modo 'incremental' o DataFrame é
+    comparado por hash de conteúdo com as linhas atuais dos mesmos jogadores
+    e só as diferenças são gravadas (INSERT ... ON DUPLICATE KEY UPDATE e
+    DELETE); jogadores ausentes do DataFrame não são tocados.
+
+    As tabelas derivadas ('evolucao_temporada' e 'agregados_temporada') e a
+    versão de carga 'temporadas', que invalida o cache do dashboard, são
+    publicadas junto com os dados: no modo 'troca' as derivadas são montadas
+    em sombras e entram na mesma troca; no 'incremental' são refeitas na
+    transação de cada lote, só para o que o lote alterou; no 'substituir',
+    numa transação no fim. Qualquer falha, inclusive nas derivadas, faz a
+    função retornar {}.
+
+    Retorna um dict com as linhas carregadas e a vazão em linhas por segundo.
+    """
+    if df.empty:
+        print("DataFrame vazio, sem dados para carregar.")
+        return {}
+    return carregar_lotes_para_mysql([df], engine_destino, tamanho_lote, usar_infile, modo)
+
+def carregar_lotes_para_mysql(lotes, engine_destino=None, tamanho_lote=TAMANHO_LOTE, usar_infile=True, modo=MODO_CARGA):
+    """Como carregar_para_mysql, mas consome um iterável de DataFrames sem juntá-los.
+
+    Cada lote é gravado em sua própria transação e descartado antes do
+    próximo, então a memória não cresce com o total de linhas. No modo
+    'troca' a publicação continua sendo uma única troca no fim; no modo
+    'incremental' cada lote precisa trazer todas as linhas dos seus
+    jogadores, já que linhas ausentes de um jogador do lote são removidas.
+    """
+    if modo not in MODOS_CARGA:
+        raise ValueError(f"Modo de carga desconhecido: '{modo}'. Use um de {MODOS_CARGA}.")
+
+    engine_destino = engine_destino or obter_engine()
+    if modo == 'incremental' and engine_destino.dialect.name not in DIALETOS_UPSERT:
+        raise ValueError(f"O modo 'incremental' precisa de upsert nativo e o banco '{engine_destino.dialect.name}' não está em {DIALETOS_UPSERT}.")
+    Base.metadata.create_all(engine_destino)
+
+    inicio = time.perf_counter()
     try:
-        session.add_all(estatisticas_para_adicionar)
-        session.commit()
-        print(f"Total de {len(estatisticas_para_adicionar)} estatísticas inseridas em 'estatisticas_temporada'.")
+        if modo == 'troca':
+            resultado = _carregar_com_troca(engine_destino, lotes, tamanho_lote, usar_infile)
+        elif modo == 'incremental':
+            resultado = _carregar_incremental(engine_destino, lotes, tamanho_lote)
+        else:
+            resultado = _carregar_substituindo(engine_destino, lotes, tamanho_lote, usar_infile)
     except IntegrityError as e:
-        session.rollback()
-        print(f"Erro de integridade ao carregar estatísticas: {e}. Revertendo.")
+        print(f"Erro de integridade ao carregar dados: {e}. Revertendo.")
+        return {}
     except Exception as e:
-        session.rollback()
-        print(f"Erro inesperado ao carregar estatísticas: {e}. Revertendo.")
-    finally:
-        session.close()
+        print(f"Erro inesperado ao carregar dados: {e}. Revertendo.")
+        return {}
+
+    segundos = time.perf_counter() - inicio
+    linhas = resultado['linhas']
+    metricas = {
+        'modo': modo,
+        **resultado,
+        'segundos': round(segundos, 3),
+        'linhas_por_segundo': round(linhas / segundos, 1) if segundos else 0.0
+    }
+    print(f"\nCarga concluída: {linhas} linhas em {metricas['segundos']}s ({metricas['linhas_por_segundo']} linhas/s).")
+    return metricas
 
 if __name__ == "__main__":
-    nome_arquivo_csv_transformado = project_root_dir / 'data' / 'processed' / 'nba_stats_transformadas.csv'
+    parser = argparse.ArgumentParser(description="Carrega os dados transformados no banco de dados.")
+    parser.add_argument('--tamanho-lote', type=int, default=TAMANHO_LOTE, help="Linhas por lote de insert.")
+    parser.add_argument('--modo', choices=MODOS_CARGA, default=MODO_CARGA, help="'substituir' (padrão, ou ETL_MODO_CARGA) esvazia e recarrega; 'troca' publica tabelas sombra atomicamente; 'incremental' grava só as diferenças.")
+    parser.add_argument('--sem-infile', action='store_true', help="Não usa LOAD DATA LOCAL INFILE mesmo se o servidor permitir.")
+    args = parser.parse_args()
+
+    caminho_transformado = project_root_dir / 'data' / 'processed' / 'nba_stats_transformadas'
 
     try:
-        df_transformado = pd.read_csv(nome_arquivo_csv_transformado)
-        print(f"Dados transformados carregados de: {nome_arquivo_csv_transformado}")
+        df_transformado = ler_staging(caminho_transformado)
+        print(f"Dados transformados carregados de: {caminho_transformado}")
         print(f"Número de linhas carregadas: {len(df_transformado)}")
     except FileNotFoundError:
-        print(f"Erro: O arquivo '{nome_arquivo_csv_transformado}' não foi encontrado.")
+        print(f"Erro: O arquivo '{caminho_transformado}' não foi encontrado.")
         df_transformado = pd.DataFrame()
     except Exception as e:
-        print(f"Erro ao carregar o arquivo CSV: {e}")
+        print(f"Erro ao carregar o arquivo de staging: {e}")
         df_transformado = pd.DataFrame()
 
     if not df_transformado.empty:
-        carregar_para_mysql(df_transformado)
+        carregar_para_mysql(df_transformado, tamanho_lote=args.tamanho_lote, usar_infile=not args.sem_infile, modo=args.modo)
     else:
         print("DataFrame transformado está vazio. Carga no MySQL não realizada.")
 
@@ -0,0 +1,301 @@
+from sqlalchemy import text, bindparam, delete, insert, update, func, select, or_, table, column
+from datetime import datetime
+from pathlib import Path
+import json
+import pandas as pd
+from dotenv import load_dotenv
+import sys
+
+# %%
+
+script_dir = Path(__file__).resolve().parent
+src_dir = script_dir.parent
+project_root_dir = src_dir.parent
+
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+dotenv_path = project_root_dir / '.env'
+load_dotenv(dotenv_path)
+
+from dashboard.db_setup import obter_engine, Base, Jogador, EstatisticaTemporada, EvolucaoTemporada, AgregadoTemporada, VersaoCarga
+
+# %%
+
+MINIMO_JOGOS = 50
+TOP_N_AGREGADOS = 20 # Máximo do slider "Mostrar número selecionado de jogadores"
+METRICAS_POR_JOGO = {
+    'pontos_por_jogo': 'pontos',
+    'assistencias_por_jogo': 'assistencias',
+    'rebotes_por_jogo': 'rebotes'
+}
+
+_SQL_LINHAS_TEMPORADA = """
+SELECT
+    et.temporada,
+    j.id_jogador,
+    j.nome_jogador,
+    et.jogos_jogados,
+    et.pontos,
+    et.assistencias,
+    et.rebotes
+FROM
+    {estatisticas} et
+JOIN
+    {jogadores} j ON et.id_jogador = j.id_jogador
+WHERE
+    et.jogos_jogados > 0
+    {filtro_temporadas}
+ORDER BY
+    et.id_jogador
+"""
+
+_SQL_EVOLUCAO = """
+INSERT INTO {evolucao} (
+    id_jogador, temporada, temporada_anterior,
+    jogos_jogados, jogos_jogados_anterior,
+    pontos, pontos_anterior, diferenca_pontos,
+    assistencias, assistencias_anterior, diferenca_assistencias,
+    rebotes, rebotes_anterior, diferenca_rebotes,
+    minimo_jogos
+)
+SELECT
+    id_jogador, temporada, temporada_anterior,
+    jogos_jogados, jogos_jogados_anterior,
+    pontos, pontos_anterior, pontos - pontos_anterior,
+    assistencias, assistencias_anterior, assistencias - assistencias_anterior,
+    rebotes, rebotes_anterior, rebotes - rebotes_anterior,
+    CASE WHEN jogos_jogados >= :minimo_jogos AND jogos_jogados_anterior >= :minimo_jogos THEN 1 ELSE 0 END
+FROM (
+    SELECT
+        et.id_jogador,
+        et.temporada,
+        et.jogos_jogados,
+        et.pontos,
+        et.assistencias,
+        et.rebotes,
+        LAG(et.temporada) OVER janela AS temporada_anterior,
+        LAG(et.jogos_jogados) OVER janela AS jogos_jogados_anterior,
+        LAG(et.pontos) OVER janela AS pontos_anterior,
+        LAG(et.assistencias) OVER janela AS assistencias_anterior,
+        LAG(et.rebotes) OVER janela AS rebotes_anterior
+    FROM
+        {estatisticas} et
+    {filtro_jogadores}
+    WINDOW janela AS (PARTITION BY et.id_jogador ORDER BY et.temporada ASC)
+) pares
+WHERE
+    temporada_anterior IS NOT NULL
+"""
+
+_SQL_CARREIRAS = """
+SELECT
+    id_jogador, temporada, jogos_jogados, pontos, assistencias, rebotes
+FROM
+    {estatisticas}
+WHERE
+    id_jogador IN :jogadores
+"""
+
+# %%
+
+def _tabela(modelo, sufixo=''):
+    # Com 'sufixo', a tabela sombra da carga com troca (load.py): só o nome e as colunas, para montar o SQL.
+    if not sufixo:
+        return modelo.__table__
+    return table(f"{modelo.__tablename__}{sufixo}", *[column(c.name) for c in modelo.__table__.columns])
+
+def _nomes(sufixo=''):
+    return {
+        'estatisticas': f"{EstatisticaTemporada.__tablename__}{sufixo}",
+        'jogadores': f"{Jogador.__tablename__}{sufixo}",
+        'evolucao': f"{EvolucaoTemporada.__tablename__}{sufixo}"
+    }
+
+def _jogadores_afetados(conn, temporadas, sufixo=''):
+    tabela = _tabela(EvolucaoTemporada, sufixo)
+    consulta = text(
+        f"SELECT DISTINCT id_jogador FROM {_nomes(sufixo)['estatisticas']} WHERE temporada IN :temporadas"
+    ).bindparams(bindparam('temporadas', expanding=True))
+    ids = {linha[0] for linha in conn.execute(consulta, {'temporadas': temporadas})}
+    ids |= {
+        linha[0] for linha in conn.execute(
+            select(tabela.c.id_jogador).distinct()
+            .where(or_(tabela.c.temporada.in_(temporadas), tabela.c.temporada_anterior.in_(temporadas)))
+        )
+    }
+    return sorted(ids)
+
+def materializar_evolucao(conn, temporadas=None, sufixo=''):
+    """Reconstrói 'evolucao_temporada' a partir de 'estatisticas_temporada'.
+
+    Sem 'temporadas', a tabela é refeita por inteiro. Com uma lista de
+    temporadas alteradas, só são refeitos os jogadores que têm (ou tinham)
+    linha nessas temporadas, e a janela LAG() só percorre as carreiras deles.
+    Com 'sufixo', lê e grava as tabelas sombra da carga com troca.
+    Retorna o número de linhas gravadas.
+    """
+    tabela = _tabela(EvolucaoTemporada, sufixo)
+    parametros = {'minimo_jogos': MINIMO_JOGOS}
+    if temporadas is None:
+        conn.execute(delete(tabela))
+        sql = text(_SQL_EVOLUCAO.format(filtro_jogadores='', **_nomes(sufixo)))
+    else:
+        jogadores = _jogadores_afetados(conn, sorted(set(temporadas)), sufixo) if temporadas else []
+        if not jogadores:
+            return 0
+        conn.execute(delete(tabela).where(tabela.c.id_jogador.in_(jogadores)))
+        sql = text(_SQL_EVOLUCAO.format(filtro_jogadores="WHERE et.id_jogador IN :jogadores", **_nomes(sufixo))).bindparams(
+            bindparam('jogadores', expanding=True)
+        )
+        parametros['jogadores'] = jogadores
+
+    return conn.execute(sql, parametros).rowcount
+
+def _pares_da_carreira(df):
+    # Mesmo resultado da janela LAG() de _SQL_EVOLUCAO, em pandas, para as carreiras lidas.
+    df = df.sort_values(['id_jogador', 'temporada'], kind='stable')
+    anteriores = df.groupby('id_jogador', sort=False)[['temporada', 'jogos_jogados', 'pontos', 'assistencias', 'rebotes']].shift()
+    pares = df.join(anteriores, rsuffix='_anterior').dropna(subset=['temporada_anterior'])
+    for coluna in ('jogos_jogados_anterior', 'pontos_anterior', 'assistencias_anterior', 'rebotes_anterior'):
+        pares[coluna] = pares[coluna].astype('int64')
+    for metrica in ('pontos', 'assistencias', 'rebotes'):
+        pares[f"diferenca_{metrica}"] = pares[metrica] - pares[f"{metrica}_anterior"]
+    pares['minimo_jogos'] = (pares['jogos_jogados'] >= MINIMO_JOGOS) & (pares['jogos_jogados_anterior'] >= MINIMO_JOGOS)
+    return pares
+
+def atualizar_evolucao(conn, alteracoes, sufixo=''):
+    """Refaz em 'evolucao_temporada' só os pares afetados pelas linhas alteradas.
+
+    'alteracoes' são os pares (id_jogador, temporada) inseridos, atualizados
+    ou removidos em 'estatisticas_temporada' (o diff da carga incremental).
+    Uma temporada alterada só mexe nos pares que a cobrem, ou seja, com
+    temporada_anterior <= temporada alterada <= temporada: o par que termina
+    nela e o que começa nela, ou o par que passa a ligar as vizinhas quando
+    ela é removida. Uma mudança na última temporada refaz só o par
+    (penúltima, última). Retorna o número de linhas gravadas.
+    """
+    tabela = _tabela(EvolucaoTemporada, sufixo)
+    alteracoes = pd.DataFrame(list(alteracoes), columns=['id_jogador', 'temporada_alterada']).drop_duplicates()
+    if alteracoes.empty:
+        return 0
+    alteracoes['id_jogador'] = alteracoes['id_jogador'].astype('int64')
+
+    for temporada, grupo in alteracoes.groupby('temporada_alterada'):
+        conn.execute(delete(tabela).where(
+            tabela.c.id_jogador.in_([int(i) for i in grupo['id_jogador']]),
+            tabela.c.temporada_anterior <= temporada,
+            tabela.c.temporada >= temporada
+        ))
+
+    sql = text(_SQL_CARREIRAS.format(**_nomes(sufixo))).bindparams(bindparam('jogadores', expanding=True))
+    carreiras = pd.read_sql(sql, conn, params={'jogadores': sorted(int(i) for i in alteracoes['id_jogador'].unique())})
+    if carreiras.empty:
+        return 0
+    carreiras['id_jogador'] = carreiras['id_jogador'].astype('int64')
+    pares = _pares_da_carreira(carreiras).merge(alteracoes, on='id_jogador')
+    pares = pares[(pares['temporada_anterior'] <= pares['temporada_alterada']) & (pares['temporada_alterada'] <= pares['temporada'])]
+    pares = pares.drop_duplicates(subset=['id_jogador', 'temporada'])
+    if pares.empty:
+        return 0
+    registros = pares[[c.name for c in EvolucaoTemporada.__table__.columns]].astype(object).to_dict('records')
+    conn.execute(insert(tabela), registros)
+    return len(registros)
+
+def _agregar_temporada(temporada, df):
+    linha = {
+        'temporada': temporada,
+        'total_linhas': len(df),
+        'total_jogadores': int(df['id_jogador'].nunique())
+    }
+    for metrica, coluna in METRICAS_POR_JOGO.items():
+        valores = df[coluna] / df['jogos_jogados']
+        linha[f"soma_{metrica}"] = float(valores.sum())
+        linha[f"soma_quadrados_{metrica}"] = float((valores ** 2).sum())
+        # Empates ficam na ordem de id_jogador (ORDER BY da consulta), não na ordem física da tabela.
+        melhores = df.assign(valor=valores).nlargest(TOP_N_AGREGADOS, 'valor')
+        linha[f"top_{metrica}"] = json.dumps(
+            melhores[['id_jogador', 'nome_jogador', 'jogos_jogados', 'valor']].to_dict('records'),
+            ensure_ascii=False
+        )
+    return linha
+
+def materializar_agregados(conn, temporadas=None, sufixo=''):
+    """Reconstrói 'agregados_temporada' para todas as temporadas ou só para as informadas.
+
+    As linhas são lidas uma temporada por vez, então a memória usada depende
+    do tamanho de uma temporada e não do histórico inteiro. Com 'sufixo',
+    lê e grava as tabelas sombra. Retorna o número de temporadas gravadas.
+    """
+    tabela = _tabela(AgregadoTemporada, sufixo)
+    nomes = _nomes(sufixo)
+    if temporadas is None:
+        conn.execute(delete(tabela))
+        temporadas = [linha[0] for linha in conn.execute(text(f"SELECT DISTINCT temporada FROM {nomes['estatisticas']}"))]
+    temporadas = sorted(set(temporadas))
+    if not temporadas:
+        return 0
+    conn.execute(delete(tabela).where(tabela.c.temporada.in_(temporadas)))
+
+    sql = text(_SQL_LINHAS_TEMPORADA.format(filtro_temporadas="AND et.temporada = :temporada", **nomes))
+    linhas = []
+    for temporada in temporadas:
+        df = pd.read_sql(sql, conn, params={'temporada': temporada})
+        if not df.empty:
+            linhas.append(_agregar_temporada(temporada, df))
+    if linhas:
+        conn.execute(insert(tabela), linhas)
+    return len(linhas)
+
+def registrar_versao_carga(conn, conjunto):
+    """Incrementa a versão de carga do conjunto ('temporadas' ou 'jogos') e retorna a nova versão.
+
+    Deve rodar na mesma transação que publica os dados (ver load.py), para
+    que o dashboard só veja a versão nova junto com os dados novos.
+    """
+    tabela = VersaoCarga.__table__
+    agora = datetime.now()
+    atualizadas = conn.execute(
+        update(tabela).where(tabela.c.conjunto == conjunto).values(versao=tabela.c.versao + 1, atualizado_em=agora)
+    ).rowcount
+    if not atualizadas:
+        conn.execute(insert(tabela).values(conjunto=conjunto, versao=1, atualizado_em=agora))
+    return conn.execute(select(tabela.c.versao).where(tabela.c.conjunto == conjunto)).scalar()
+
+def materializar_derivadas(conn, temporadas=None, sufixo='', alteracoes=None):
+    """Reconstrói 'evolucao_temporada' e 'agregados_temporada' na transação de 'conn', sem publicar versão.
+
+    É o que load.py chama dentro da própria transação da carga. Com
+    'alteracoes' (pares (id_jogador, temporada) alterados), a evolução só
+    refaz os pares afetados (atualizar_evolucao) e os agregados, as
+    temporadas alteradas mais as de 'temporadas' (jogadores renomeados).
+    Retorna as linhas de evolução e as temporadas agregadas gravadas.
+    """
+    if alteracoes is not None:
+        alteracoes = list(alteracoes)
+        temporadas = sorted(set(temporadas or ()) | {temporada for _, temporada in alteracoes})
+        linhas = atualizar_evolucao(conn, alteracoes, sufixo)
+    else:
+        linhas = materializar_evolucao(conn, temporadas, sufixo)
+    total = conn.execute(select(func.count()).select_from(_tabela(EvolucaoTemporada, sufixo))).scalar()
+    temporadas_agregadas = materializar_agregados(conn, temporadas, sufixo)
+    escopo = "completa" if temporadas is None else f"temporadas {', '.join(sorted(set(temporadas)))}"
+    print(f"Tabela '{EvolucaoTemporada.__tablename__}{sufixo}' atualizada ({escopo}): {linhas} linhas gravadas, {total} no total.")
+    print(f"Tabela '{AgregadoTemporada.__tablename__}{sufixo}' atualizada ({escopo}): {temporadas_agregadas} temporadas gravadas.")
+    return {'evolucao_temporada': linhas, 'agregados_temporada': temporadas_agregadas}
+
+def atualizar_tabelas_derivadas(engine_destino=None, temporadas=None):
+    """Reconstrói as tabelas derivadas e publica a versão 'temporadas' numa única transação (uso manual)."""
+    engine_destino = engine_destino or obter_engine()
+    Base.metadata.create_all(engine_destino)
+    with engine_destino.begin() as conn:
+        resultado = materializar_derivadas(conn, temporadas)
+        versao = registrar_versao_carga(conn, 'temporadas') if temporadas is None or temporadas else None
+    if versao:
+        print(f"Versão de carga 'temporadas' publicada: {versao}.")
+    return {**resultado, 'versao_carga': versao}
+
+# %%
+
+if __name__ == "__main__":
+    atualizar_tabelas_derivadas()
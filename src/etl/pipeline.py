@@ -0,0 +1,291 @@
+import pandas as pd
+from datetime import datetime
+from pathlib import Path
+from dotenv import load_dotenv
+import argparse
+import contextlib
+import cProfile
+import importlib.util
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError: # Windows: sem getrusage, ficam os.times() e o pico de RSS fica de fora
+    resource = None
+
+# %%
+
+script_dir = Path(__file__).resolve().parent
+src_dir = script_dir.parent
+project_root_dir = src_dir.parent
+
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+dotenv_path = project_root_dir / '.env'
+load_dotenv(dotenv_path)
+
+from etl.staging import caminho_staging, detectar_formato, ler_staging, salvar_staging, FORMATO_STAGING, FORMATOS
+from etl.extract import (
+    obter_todos_os_jogadores, extrair_estatisticas_concorrente, playercareerstats, playergamelogs,
+    MAX_EM_VOO, REQUISICOES_POR_SEGUNDO, MAX_TENTATIVAS
+)
+from etl.cache_respostas import CacheRespostas
+from etl.transform import carregar_dados_brutos, transformar_dados_evolucao_jogador, transformar_em_paralelo, WORKERS
+from etl.load import carregar_para_mysql, TAMANHO_LOTE, MODOS_CARGA, MODO_CARGA
+
+CAMINHO_BRUTO = project_root_dir / 'data' / 'raw' / 'nba_stats_brutas'
+CAMINHO_TRANSFORMADO = project_root_dir / 'data' / 'processed' / 'nba_stats_transformadas'
+ARQUIVO_METRICAS = project_root_dir / 'data' / 'logs' / 'pipeline.jsonl'
+DIRETORIO_PERFIS = project_root_dir / 'data' / 'logs' / 'perfis'
+PERFILADORES = ('cprofile', 'pyinstrument')
+
+# %%
+# Medição de memória por etapa. No Linux o pico de RSS do processo (VmHWM) pode
+# ser zerado escrevendo '5' em /proc/self/clear_refs, então cada etapa mede o
+# próprio pico. Sem isso vale ru_maxrss, que é o pico desde o início do processo.
+
+def _zerar_pico_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w') as arquivo:
+            arquivo.write('5')
+        return True
+    except OSError:
+        return False
+
+def _ler_status_mb(campo):
+    try:
+        with open('/proc/self/status') as arquivo:
+            for linha in arquivo:
+                if linha.startswith(f"{campo}:"):
+                    return round(int(linha.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+def _pico_rss_mb():
+    pico = _ler_status_mb('VmHWM')
+    if pico is not None or resource is None:
+        return pico
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(maximo / 1024 ** 2 if sys.platform == 'darwin' else maximo / 1024, 1) # bytes no macOS, KB no Linux
+
+def _tempo_cpu():
+    if resource is None:
+        tempos = os.times()
+        return tempos.user + tempos.system, tempos.children_user + tempos.children_system
+    proprio = resource.getrusage(resource.RUSAGE_SELF)
+    filhos = resource.getrusage(resource.RUSAGE_CHILDREN) # Processos do transform --workers
+    return proprio.ru_utime + proprio.ru_stime, filhos.ru_utime + filhos.ru_stime
+
+def _bytes_staging(caminho_base):
+    formato = detectar_formato(caminho_base)
+    if formato is None:
+        return 0
+    caminho = caminho_staging(caminho_base, formato)
+    if caminho.is_dir():
+        return sum(arquivo.stat().st_size for arquivo in caminho.rglob('*') if arquivo.is_file())
+    return caminho.stat().st_size
+
+# %%
+# Etapas. Cada uma lê e grava os mesmos arquivos de staging dos scripts
+# extract.py, transform.py e load.py, então qualquer subconjunto pode rodar
+# sozinho, e devolve as contagens que entram no registro da etapa.
+
+def etapa_extracao(opcoes):
+    endpoint, endpoint_jogos = playercareerstats.PlayerCareerStats, playergamelogs.PlayerGameLogs
+    if opcoes.simulado:
+        from etl.endpoint_simulado import criar_endpoint_simulado, criar_endpoint_jogos_simulado, obter_todos_os_jogadores_simulados
+        endpoint = criar_endpoint_simulado()
+        jogadores = obter_todos_os_jogadores_simulados(opcoes.historicos)
+        endpoint_jogos = criar_endpoint_jogos_simulado(jogadores)
+    else:
+        jogadores = obter_todos_os_jogadores(opcoes.historicos)
+    if not jogadores:
+        raise RuntimeError("Nenhum jogador encontrado para extrair.")
+
+    cache = CacheRespostas(project_root_dir / 'data' / 'cache' / 'carreira') if opcoes.cache or opcoes.incremental else None
+    df, metricas = extrair_estatisticas_concorrente(
+        jogadores, endpoint=endpoint, max_em_voo=opcoes.max_em_voo, requisicoes_por_segundo=opcoes.taxa,
+        max_tentativas=opcoes.tentativas, cache=cache, incremental=opcoes.incremental,
+        endpoint_jogos=endpoint_jogos
+    )
+    if df.empty:
+        raise RuntimeError("Nenhuma estatística de jogador foi extraída com sucesso.")
+    salvar_staging(df, CAMINHO_BRUTO, formato=opcoes.formato, coluna_particao='SEASON_ID')
+    return {
+        'linhas_entrada': len(jogadores),
+        'linhas_saida': len(df),
+        'bytes_lidos': 0,
+        'bytes_gravados': _bytes_staging(CAMINHO_BRUTO),
+        'chamadas_api': metricas['chamadas_api'],
+        'retentativas': metricas['retentativas'],
+        'detalhes': {'falhas': metricas['falhas'], 'sem_dados': metricas['sem_dados'], **({'cache': metricas['cache']} if 'cache' in metricas else {})}
+    }
+
+def etapa_transformacao(opcoes):
+    bytes_lidos = _bytes_staging(CAMINHO_BRUTO)
+    if opcoes.workers > 1:
+        df = transformar_em_paralelo(CAMINHO_BRUTO, opcoes.workers)
+        linhas_entrada = df.attrs.get('metricas', {}).get('linhas_entrada', 0)
+    else:
+        df_bruto = carregar_dados_brutos(CAMINHO_BRUTO)
+        linhas_entrada = len(df_bruto)
+        df = transformar_dados_evolucao_jogador(df_bruto, medir_memoria=opcoes.medir_memoria) if not df_bruto.empty else pd.DataFrame()
+        del df_bruto
+    if df.empty:
+        raise RuntimeError("Staging bruto vazio ou ausente; rode a extração antes.")
+    salvar_staging(df, CAMINHO_TRANSFORMADO, formato=opcoes.formato, coluna_particao='temporada')
+    return {
+        'linhas_entrada': linhas_entrada,
+        'linhas_saida': len(df),
+        'bytes_lidos': bytes_lidos,
+        'bytes_gravados': _bytes_staging(CAMINHO_TRANSFORMADO),
+        'detalhes': {'workers': opcoes.workers, **({'pico_memoria_mb': df.attrs['metricas']['pico_memoria_mb']} if 'pico_memoria_mb' in df.attrs.get('metricas', {}) else {})}
+    }
+
+def etapa_carga(opcoes):
+    bytes_lidos = _bytes_staging(CAMINHO_TRANSFORMADO)
+    df = ler_staging(CAMINHO_TRANSFORMADO)
+    metricas = carregar_para_mysql(df, tamanho_lote=opcoes.tamanho_lote, usar_infile=not opcoes.sem_infile, modo=opcoes.modo)
+    if not metricas:
+        raise RuntimeError("Carga não concluída; veja as mensagens acima.")
+    return {
+        'linhas_entrada': len(df),
+        'linhas_saida': metricas['linhas'],
+        'bytes_lidos': bytes_lidos,
+        'bytes_gravados': None, # Escrito pelo servidor do banco, fora deste processo
+        'detalhes': {chave: metricas[chave] for chave in ('modo', 'metodo', 'lotes', 'linhas_por_segundo', 'versao_carga') if chave in metricas}
+    }
+
+ETAPAS = {'extracao': etapa_extracao, 'transformacao': etapa_transformacao, 'carga': etapa_carga}
+
+# %%
+
+@contextlib.contextmanager
+def _perfilando(perfilador, destino):
+    """Perfila o bloco com cProfile (.prof, para pstats/snakeviz) ou pyinstrument (.html)."""
+    if perfilador is None:
+        yield
+        return
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    if perfilador == 'cprofile':
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            perfil.dump_stats(destino)
+    else:
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise ImportError("O perfilador 'pyinstrument' não está instalado (pip install pyinstrument).")
+        perfil = Profiler()
+        perfil.start()
+        try:
+            yield
+        finally:
+            perfil.stop()
+            destino.write_text(perfil.output_html())
+
+def medir_etapa(nome, opcoes, execucao, perfilador=None):
+    """Roda uma etapa e retorna o registro com tempo, CPU, pico de RSS, linhas, bytes e chamadas à API.
+
+    Uma exceção na etapa vira status 'erro' no registro em vez de subir.
+    """
+    destino_perfil = None
+    if perfilador:
+        destino_perfil = DIRETORIO_PERFIS / f"{execucao}-{nome}.{'prof' if perfilador == 'cprofile' else 'html'}"
+    pico_zerado = _zerar_pico_rss()
+    rss_inicial = _ler_status_mb('VmRSS')
+    cpu_inicial, cpu_filhos_inicial = _tempo_cpu()
+    inicio = time.perf_counter()
+    registro = {'execucao': execucao, 'etapa': nome, 'inicio': datetime.now().isoformat(timespec='seconds'), 'status': 'ok'}
+    resultado = {}
+    try:
+        with _perfilando(perfilador, destino_perfil):
+            resultado = ETAPAS[nome](opcoes)
+    except Exception as e:
+        registro.update(status='erro', erro=f"{type(e).__name__}: {e}")
+    cpu_final, cpu_filhos_final = _tempo_cpu()
+    registro.update({
+        'segundos': round(time.perf_counter() - inicio, 3),
+        'cpu_segundos': round(cpu_final - cpu_inicial, 3),
+        'cpu_filhos_segundos': round(cpu_filhos_final - cpu_filhos_inicial, 3),
+        'rss_inicial_mb': rss_inicial,
+        'pico_rss_mb': _pico_rss_mb(),
+        'pico_rss_da_etapa': pico_zerado,
+        'linhas_entrada': resultado.get('linhas_entrada'),
+        'linhas_saida': resultado.get('linhas_saida'),
+        'bytes_lidos': resultado.get('bytes_lidos'),
+        'bytes_gravados': resultado.get('bytes_gravados'),
+        'chamadas_api': resultado.get('chamadas_api', 0),
+        'retentativas': resultado.get('retentativas', 0),
+        'perfil': str(destino_perfil) if destino_perfil and destino_perfil.exists() else None,
+        'detalhes': resultado.get('detalhes', {})
+    })
+    return registro
+
+def executar_pipeline(etapas, opcoes, arquivo_metricas=ARQUIVO_METRICAS, perfilador=None, etapas_perfiladas=None):
+    """Roda as etapas pedidas na ordem extracao -> transformacao -> carga, gravando um JSON por etapa em 'arquivo_metricas'.
+
+    Para na primeira etapa com erro. 'etapas_perfiladas' limita o perfilador
+    a algumas etapas (padrão: todas). Retorna a lista de registros.
+    """
+    execucao = datetime.now().strftime('%Y%m%dT%H%M%S')
+    arquivo_metricas = Path(arquivo_metricas)
+    arquivo_metricas.parent.mkdir(parents=True, exist_ok=True)
+    registros = []
+    for nome in [etapa for etapa in ETAPAS if etapa in etapas]:
+        print(f"\n=== Etapa '{nome}' ===")
+        perfil = perfilador if etapas_perfiladas is None or nome in etapas_perfiladas else None
+        registro = medir_etapa(nome, opcoes, execucao, perfil)
+        registros.append(registro)
+        with open(arquivo_metricas, 'a', encoding='utf-8') as arquivo:
+            arquivo.write(json.dumps(registro, ensure_ascii=False, default=str) + '\n')
+        if registro['status'] != 'ok':
+            print(f"Etapa '{nome}' falhou: {registro['erro']}")
+            break
+
+    print(f"\n{'etapa':<15}{'status':>7}{'segundos':>10}{'CPU s':>8}{'pico RSS MB':>13}{'linhas in':>11}{'linhas out':>11}{'chamadas':>10}")
+    for r in registros:
+        cpu = r['cpu_segundos'] + r['cpu_filhos_segundos']
+        pico = '-' if r['pico_rss_mb'] is None else f"{r['pico_rss_mb']:.1f}" # Sem /proc nem resource (Windows)
+        print(f"{r['etapa']:<15}{r['status']:>7}{r['segundos']:>10.2f}{cpu:>8.2f}{pico:>13}"
+              f"{str(r['linhas_entrada']):>11}{str(r['linhas_saida']):>11}{r['chamadas_api']:>10}")
+    print(f"Métricas gravadas em '{arquivo_metricas}'.")
+    return registros
+
+# %%
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roda extração, transformação e carga (ou parte delas) com métricas por etapa em JSON lines.")
+    parser.add_argument('--etapas', nargs='+', choices=list(ETAPAS), default=list(ETAPAS), help="Etapas a rodar (padrão: todas).")
+    parser.add_argument('--metricas', type=Path, default=ARQUIVO_METRICAS, help="Arquivo JSON lines que recebe um registro por etapa.")
+    parser.add_argument('--perfil', choices=PERFILADORES, default=None, help="Perfila as etapas e grava o resultado em data/logs/perfis/.")
+    parser.add_argument('--etapas-perfil', nargs='+', choices=list(ETAPAS), default=None, help="Etapas perfiladas (padrão: todas as que rodarem).")
+    parser.add_argument('--max-em-voo', type=int, default=MAX_EM_VOO, help="Máximo de requisições simultâneas.")
+    parser.add_argument('--taxa', type=float, default=REQUISICOES_POR_SEGUNDO, help="Requisições por segundo.")
+    parser.add_argument('--tentativas', type=int, default=MAX_TENTATIVAS, help="Tentativas por jogador.")
+    parser.add_argument('--cache', action='store_true', help="Reaproveita respostas em cache dentro do TTL.")
+    parser.add_argument('--incremental', action='store_true', help="Só rebusca quem jogou na temporada atual desde a última busca, segundo o game log da liga; os demais após ETL_CACHE_TTL_HISTORICO (implica --cache).")
+    parser.add_argument('--historicos', action='store_true', help="Extrai todos os jogadores da história da NBA, não só os ativos.")
+    parser.add_argument('--simulado', action='store_true', help="Usa o endpoint local simulado em vez da API da NBA.")
+    parser.add_argument('--formato', choices=FORMATOS, default=FORMATO_STAGING, help="Formato dos arquivos de staging.")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="Processos para transformar as temporadas em paralelo.")
+    parser.add_argument('--medir-memoria', action='store_true', help="Mede o pico de memória Python da transformação com tracemalloc (mais lento; só sem --workers).")
+    parser.add_argument('--tamanho-lote', type=int, default=TAMANHO_LOTE, help="Linhas por lote de insert (padrão: ETL_TAMANHO_LOTE).")
+    parser.add_argument('--modo', choices=MODOS_CARGA, default=MODO_CARGA, help="Modo de carga (padrão: ETL_MODO_CARGA; ver load.py).")
+    parser.add_argument('--sem-infile', action='store_true', help="Não usa LOAD DATA LOCAL INFILE mesmo se o servidor permitir.")
+    args = parser.parse_args()
+
+    if args.perfil == 'pyinstrument' and importlib.util.find_spec('pyinstrument') is None:
+        parser.error("--perfil pyinstrument requer o pacote pyinstrument (pip install pyinstrument).")
+
+    registros = executar_pipeline(args.etapas, args, args.metricas, args.perfil, args.etapas_perfil)
+    sys.exit(0 if all(r['status'] == 'ok' for r in registros) else 1)
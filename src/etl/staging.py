@@ -0,0 +1,137 @@
+import os
+import shutil
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.feather as feather
+
+# %%
+
+FORMATO_STAGING = os.getenv('ETL_FORMATO_STAGING', 'parquet')
+FORMATOS = ('parquet', 'arrow', 'csv')
+EXTENSOES = {'parquet': '.parquet', 'arrow': '.arrow', 'csv': '.csv'}
+TIPOS_ARROW = {'int16': pa.int16(), 'int32': pa.int32(), 'int64': pa.int64(), 'float32': pa.float32(), 'float64': pa.float64()}
+
+# %%
+
+def caminho_staging(caminho_base, formato):
+    caminho_base = Path(caminho_base)
+    return caminho_base.with_name(caminho_base.name + EXTENSOES[formato])
+
+def detectar_formato(caminho_base):
+    """Retorna o formato gravado mais recentemente para 'caminho_base', ou None se não houver nenhum."""
+    existentes = [
+        (caminho_staging(caminho_base, formato).stat().st_mtime, formato)
+        for formato in FORMATOS
+        if caminho_staging(caminho_base, formato).exists()
+    ]
+    return max(existentes)[1] if existentes else None
+
+# %%
+
+def salvar_staging(df, caminho_base, formato=FORMATO_STAGING, coluna_particao=None, substituir_particoes=False):
+    """Grava o DataFrame no formato de staging e retorna o caminho gerado.
+
+    Em Parquet, 'coluna_particao' gera um diretório particionado no estilo
+    Hive (uma pasta por valor, ex. SEASON_ID=2024-25/). O conteúdo anterior
+    é substituído por inteiro: a escrita vai para um diretório temporário que
+    é renomeado no fim. Com 'substituir_particoes', só as partições presentes
+    no DataFrame são regravadas e as demais ficam como estavam.
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de staging desconhecido: '{formato}'. Use um de {FORMATOS}.")
+
+    destino = caminho_staging(caminho_base, formato)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    if substituir_particoes:
+        if formato != 'parquet' or not coluna_particao:
+            raise ValueError("substituir_particoes só vale para Parquet particionado.")
+        df.sort_values(coluna_particao, kind='stable').to_parquet(
+            destino, index=False, partition_cols=[coluna_particao], existing_data_behavior='delete_matching'
+        )
+        return destino
+
+    temporario = destino.with_name(destino.name + '.tmp')
+    if temporario.exists():
+        shutil.rmtree(temporario) if temporario.is_dir() else temporario.unlink()
+
+    if formato == 'csv':
+        df.to_csv(temporario, index=False)
+    elif formato == 'arrow':
+        feather.write_feather(df.reset_index(drop=True), temporario, compression='uncompressed')
+    elif coluna_particao:
+        # Ordenar pela partição antes de gravar deixa um row group por partição;
+        # com as linhas intercaladas o pyarrow grava milhares de row groups minúsculos.
+        df = df.sort_values(coluna_particao, kind='stable')
+        df.to_parquet(temporario, index=False, partition_cols=[coluna_particao])
+    else:
+        df.to_parquet(temporario, index=False)
+
+    if destino.exists():
+        shutil.rmtree(destino) if destino.is_dir() else destino.unlink()
+    os.replace(temporario, destino)
+    return destino
+
+def _converter_tipos_arrow(tabela, tipos):
+    if not tipos:
+        return tabela
+    for i, campo in enumerate(tabela.schema):
+        tipo = tipos.get(campo.name)
+        if tipo == 'category':
+            coluna = tabela.column(i)
+            if not pa.types.is_dictionary(coluna.type):
+                coluna = coluna.cast(pa.string()).dictionary_encode()
+            tabela = tabela.set_column(i, campo.name, coluna)
+        elif tipo in TIPOS_ARROW:
+            tabela = tabela.set_column(i, campo.name, tabela.column(i).cast(TIPOS_ARROW[tipo]))
+    return tabela
+
+def ler_staging(caminho_base, colunas=None, filtro_particao=None, formato=None, tipos=None):
+    """Lê um arquivo de staging gravado por salvar_staging.
+
+    'colunas' projeta só as colunas pedidas (em Parquet e Arrow as demais nem
+    são lidas do disco). 'filtro_particao' é um par (coluna, valores) que em
+    Parquet particionado descarta as partições fora da lista. 'tipos' mapeia
+    colunas para 'int32', 'float32', 'category' etc.; em Parquet e Arrow a
+    conversão é feita ainda em Arrow, sem passar por colunas int64/object no
+    pandas. Sem 'formato', usa o gravado mais recentemente; levanta
+    FileNotFoundError se não houver nenhum.
+    """
+    formato = formato or detectar_formato(caminho_base)
+    if formato is None:
+        raise FileNotFoundError(f"Nenhum arquivo de staging encontrado para '{caminho_base}'.")
+    origem = caminho_staging(caminho_base, formato)
+
+    if formato == 'csv':
+        # Inteiros podem vir com lacunas no CSV; só tipos que aceitam nulos são aplicados na leitura.
+        tipos_csv = {col: tipo for col, tipo in (tipos or {}).items() if tipo in ('category', 'float32', 'float64')}
+        df = pd.read_csv(origem, usecols=(lambda c: c in colunas) if colunas else None, dtype=tipos_csv or None)
+        if filtro_particao:
+            df = df[df[filtro_particao[0]].astype(str).isin(filtro_particao[1])]
+        return df.reset_index(drop=True)
+
+    if formato == 'arrow':
+        tabela = feather.read_table(origem, memory_map=True)
+        if colunas:
+            tabela = tabela.select(_colunas_existentes(tabela.schema.names, colunas))
+        df = _converter_tipos_arrow(tabela, tipos).to_pandas()
+        if filtro_particao:
+            df = df[df[filtro_particao[0]].astype(str).isin(filtro_particao[1])].reset_index(drop=True)
+        return df
+
+    dataset = ds.dataset(origem, format='parquet', partitioning='hive')
+    filtro = ds.field(filtro_particao[0]).isin(list(filtro_particao[1])) if filtro_particao else None
+    tabela = dataset.to_table(columns=_colunas_existentes(dataset.schema.names, colunas), filter=filtro)
+    df = _converter_tipos_arrow(tabela, tipos).to_pandas()
+    for campo in dataset.partitioning.schema.names if dataset.partitioning else []:
+        if campo in df.columns and campo not in (tipos or {}):
+            df[campo] = df[campo].astype(str)
+    if colunas:
+        df = df[_colunas_existentes(df.columns, colunas)]
+    return df
+
+def _colunas_existentes(disponiveis, colunas):
+    if colunas is None:
+        return None
+    return [col for col in colunas if col in disponiveis]
@@ -0,0 +1,127 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+script_dir = Path(__file__).resolve().parent
+src_dir = script_dir.parent
+project_root_dir = src_dir.parent
+
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+dotenv_path = project_root_dir / '.env'
+load_dotenv(dotenv_path)
+
+from etl.cache_respostas import CacheRespostas
+from etl.extract import (
+    extrair_estatisticas_concorrente, obter_todos_os_jogadores, playercareerstats, playergamelogs,
+    MAX_EM_VOO, REQUISICOES_POR_SEGUNDO, MAX_TENTATIVAS, JOGADORES_POR_LOTE
+)
+from etl.transform import transformar_dados_evolucao_jogador
+from etl.load import carregar_lotes_para_mysql, TAMANHO_LOTE, MODOS_CARGA, MODO_CARGA
+
+# %%
+
+def extrair_em_lotes(lista_de_jogadores, jogadores_por_lote=JOGADORES_POR_LOTE, metricas=None, **opcoes_extracao):
+    """Gera um DataFrame bruto por lote de 'jogadores_por_lote' jogadores.
+
+    Cada lote é extraído com extrair_estatisticas_concorrente (mesma
+    concorrência, limitador e cache) e só é buscado quando o consumidor pede
+    o próximo. 'metricas', se informado, acumula chamadas, retentativas,
+    falhas e jogadores sem dados de todos os lotes.
+    """
+    total_lotes = (len(lista_de_jogadores) + jogadores_por_lote - 1) // jogadores_por_lote
+    for numero, inicio in enumerate(range(0, len(lista_de_jogadores), jogadores_por_lote), start=1):
+        lote = lista_de_jogadores[inicio:inicio + jogadores_por_lote]
+        print(f"\nLote {numero}/{total_lotes}: {len(lote)} jogadores.")
+        df_bruto, metricas_lote = extrair_estatisticas_concorrente(lote, **opcoes_extracao)
+        if metricas is not None:
+            for chave in ('jogadores', 'chamadas_api', 'retentativas', 'falhas', 'sem_dados'):
+                metricas[chave] = metricas.get(chave, 0) + metricas_lote[chave]
+        yield df_bruto
+
+def transformar_em_lotes(lotes_brutos, metricas=None):
+    """Aplica transformar_dados_evolucao_jogador a cada lote bruto.
+
+    Como cada lote traz carreiras inteiras, a deduplicação por
+    (jogador, temporada) dentro do lote dá o mesmo resultado que sobre o
+    conjunto completo.
+    """
+    for df_bruto in lotes_brutos:
+        df_transformado = transformar_dados_evolucao_jogador(df_bruto, verboso=False)
+        if metricas is not None and not df_transformado.empty:
+            for chave in ('linhas_entrada', 'linhas_saida'):
+                metricas[chave] = metricas.get(chave, 0) + df_transformado.attrs['metricas'][chave]
+        yield df_transformado
+
+def executar_pipeline_streaming(lista_de_jogadores, jogadores_por_lote=JOGADORES_POR_LOTE, modo=MODO_CARGA,
+                                engine_destino=None, tamanho_lote=TAMANHO_LOTE, **opcoes_extracao):
+    """Extrai, transforma e carrega 'lista_de_jogadores' lote a lote, sem arquivos de staging.
+
+    As três etapas são geradores encadeados: só um lote de jogadores existe
+    em memória por vez, então o pico de memória depende de
+    'jogadores_por_lote' e não do total de jogadores. Retorna as métricas de
+    cada etapa.
+    """
+    metricas = {'extracao': {}, 'transformacao': {}}
+    inicio = time.perf_counter()
+
+    lotes_brutos = extrair_em_lotes(lista_de_jogadores, jogadores_por_lote, metricas['extracao'], **opcoes_extracao)
+    lotes_transformados = transformar_em_lotes(lotes_brutos, metricas['transformacao'])
+    metricas['carga'] = carregar_lotes_para_mysql(lotes_transformados, engine_destino, tamanho_lote, modo=modo)
+
+    metricas['segundos'] = round(time.perf_counter() - inicio, 2)
+    print(f"\nPipeline em streaming concluído em {metricas['segundos']}s: "
+          f"{metricas['extracao'].get('jogadores', 0)} jogadores, "
+          f"{metricas['transformacao'].get('linhas_saida', 0)} linhas transformadas.")
+    return metricas
+
+# %%
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roda extração, transformação e carga em lotes de jogadores, com memória limitada.")
+    parser.add_argument('--jogadores-por-lote', type=int, default=JOGADORES_POR_LOTE, help="Jogadores extraídos, transformados e carregados por vez.")
+    parser.add_argument('--modo', choices=MODOS_CARGA, default=MODO_CARGA, help="Modo de carga (ver load.py).")
+    parser.add_argument('--historicos', action='store_true', help="Usa todos os jogadores da história da NBA, não só os ativos.")
+    parser.add_argument('--max-em-voo', type=int, default=MAX_EM_VOO, help="Máximo de requisições simultâneas.")
+    parser.add_argument('--taxa', type=float, default=REQUISICOES_POR_SEGUNDO, help="Requisições por segundo.")
+    parser.add_argument('--tentativas', type=int, default=MAX_TENTATIVAS, help="Tentativas por jogador.")
+    parser.add_argument('--cache', action='store_true', help="Reaproveita respostas em cache dentro do TTL.")
+    parser.add_argument('--incremental', action='store_true', help="Só rebusca quem jogou na temporada atual desde a última busca, segundo o game log da liga; os demais após ETL_CACHE_TTL_HISTORICO (implica --cache).")
+    parser.add_argument('--simulado', action='store_true', help="Usa o endpoint local simulado em vez da API da NBA.")
+    args = parser.parse_args()
+
+    endpoint = playercareerstats.PlayerCareerStats
+    endpoint_jogos = playergamelogs.PlayerGameLogs
+    if args.simulado:
+        from etl.endpoint_simulado import criar_endpoint_simulado, criar_endpoint_jogos_simulado, obter_todos_os_jogadores_simulados
+        endpoint = criar_endpoint_simulado()
+        lista_de_jogadores = obter_todos_os_jogadores_simulados(args.historicos)
+        endpoint_jogos = criar_endpoint_jogos_simulado(lista_de_jogadores)
+    else:
+        lista_de_jogadores = obter_todos_os_jogadores(args.historicos)
+
+    cache = None
+    if args.cache or args.incremental:
+        cache = CacheRespostas(project_root_dir / 'data' / 'cache' / 'carreira')
+
+    if lista_de_jogadores:
+        print(f"Total de jogadores encontrados: {len(lista_de_jogadores)}")
+        executar_pipeline_streaming(
+            lista_de_jogadores,
+            jogadores_por_lote=args.jogadores_por_lote,
+            modo=args.modo,
+            endpoint=endpoint,
+            max_em_voo=args.max_em_voo,
+            requisicoes_por_segundo=args.taxa,
+            max_tentativas=args.tentativas,
+            cache=cache,
+            incremental=args.incremental,
+            endpoint_jogos=endpoint_jogos
+        )
+    else:
+        print("Nenhum jogador encontrado.")
+
+    print("\nProcesso em streaming concluído.")
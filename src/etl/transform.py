@@ -1,15 +1,77 @@
 import pandas as pd
+import argparse
+import os
+import time
+import tracemalloc
 from pathlib import Path
 from dotenv import load_dotenv 
+import sys
 
-dotenv_path = Path(__file__).resolve().parent.parent.parent / '.env'
+script_dir = Path(__file__).resolve().parent
+src_dir = script_dir.parent
+project_root_dir = src_dir.parent
+
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+dotenv_path = project_root_dir / '.env'
 load_dotenv(dotenv_path)
 
+from etl.staging import ler_staging, salvar_staging, FORMATO_STAGING, FORMATOS
+
+WORKERS = int(os.getenv('ETL_WORKERS', 1))
+
 # %%
 
-def carregar_dados_brutos(caminho_arquivo):
+COLUNAS_ORIGINAIS = [
+    'PLAYER_ID', 'PLAYER_NAME',
+    'SEASON_ID', 'TEAM_ID',
+    'TEAM_ABBREVIATION', 'GP',
+    'PTS', 'AST', 'REB',
+    'FG_PCT', 'FG3_PCT', 'FT_PCT'
+]
+
+NOVOS_NOMES = {
+    'PLAYER_ID': 'id_jogador',
+    'PLAYER_NAME': 'nome_jogador',
+    'SEASON_ID': 'temporada',
+    'TEAM_ID': 'id_time',
+    'TEAM_ABBREVIATION': 'sigla_time',
+    'GP': 'jogos_jogados',
+    'PTS': 'pontos',
+    'AST': 'assistencias',
+    'REB': 'rebotes',
+    'FG_PCT': 'perc_arremessos_quadra',
+    'FG3_PCT': 'perc_arremessos_3pts',
+    'FT_PCT': 'perc_lances_livres'
+}
+
+COLUNAS_OBRIGATORIAS = ['id_jogador', 'temporada', 'id_time']
+COLUNAS_CONTAGEM = ['jogos_jogados', 'pontos', 'assistencias', 'rebotes']
+COLUNAS_NUMERICAS = ['id_jogador', 'id_time'] + COLUNAS_CONTAGEM + ['perc_arremessos_quadra', 'perc_arremessos_3pts', 'perc_lances_livres']
+
+# Tipos compactos: ids e contagens cabem em int32, percentuais em float32,
+# temporada e sigla do time se repetem muito e viram category.
+TIPOS_TRANSFORMADOS = {
+    'id_jogador': 'int32',
+    'temporada': 'category',
+    'id_time': 'int32',
+    'sigla_time': 'category',
+    'jogos_jogados': 'int32',
+    'pontos': 'int32',
+    'assistencias': 'int32',
+    'rebotes': 'int32',
+    'perc_arremessos_quadra': 'float32',
+    'perc_arremessos_3pts': 'float32',
+    'perc_lances_livres': 'float32'
+}
+TIPOS_BRUTOS = {original: TIPOS_TRANSFORMADOS[novo] for original, novo in NOVOS_NOMES.items() if novo in TIPOS_TRANSFORMADOS}
+
+# %%
+
+def carregar_dados_brutos(caminho_arquivo, colunas=COLUNAS_ORIGINAIS, tipos=TIPOS_BRUTOS):
     try:
-        df = pd.read_csv(caminho_arquivo)
+        df = ler_staging(caminho_arquivo, colunas=colunas, tipos=tipos)
         print(f"Dados brutos carregados de: {caminho_arquivo}")
         print(f"Número de linhas carregadas: {len(df)}")
         return df
@@ -17,80 +79,170 @@ def carregar_dados_brutos(caminho_arquivo):
         print(f"Erro: o arquivo '{caminho_arquivo}' não foi encontrado. Certifique-se de que a extração foi executada primeiro.")
         return pd.DataFrame()
     except Exception as e:
-        print(f"Erro ao carregar o arquivo CSV: {e}")
+        print(f"Erro ao carregar o arquivo de staging: {e}")
         return pd.DataFrame()
     
 # %%
 
-def transformar_dados_evolucao_jogador(df_bruto):
+def transformar_dados_evolucao_jogador(df_bruto, verboso=True, medir_memoria=False):
+    """Projeta, renomeia, tipa e deduplica o DataFrame bruto de carreira.
+
+    Mantém uma linha por (id_jogador, temporada): a de menor id_time, que em
+    temporadas com troca de time é a linha agregada 'TOT' (TEAM_ID 0). A
+    deduplicação é um único groupby com idxmin, sem ordenar o DataFrame
+    inteiro. O tempo fica em df.attrs['metricas']; com medir_memoria=True
+    (--medir-memoria), também o pico de memória via tracemalloc, que deixa
+    a transformação bem mais lenta. Com verboso=False (um lote do pipeline
+    em streaming) nada é impresso.
+
+    Diferente da versão original, linhas sem id_time são descartadas e
+    contagens ausentes viram 0: 'id_time' e as contagens são NOT NULL em
+    'estatisticas_temporada', então essas linhas derrubavam a carga inteira.
+    Uma linha sem id_time só sobrevivia à deduplicação quando era a única
+    do jogador na temporada. Percentuais ausentes continuam nulos (a coluna
+    aceita NULL): antes de 1979-80 não há FG3_PCT, e 0 seria um valor falso.
+    """
     if df_bruto.empty:
-        print("O DataFrame bruto está vazio, sem dados para transformar.")
+        if verboso:
+            print("O DataFrame bruto está vazio, sem dados para transformar.")
         return pd.DataFrame()
 
-    print("\nIniciando a transformação dos dados...")
+    if verboso:
+        print("\nIniciando a transformação dos dados...")
+    inicio = time.perf_counter()
+    if medir_memoria:
+        ja_rastreando = tracemalloc.is_tracing()
+        if not ja_rastreando:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
 
-    colunas_originais = [
-        'PLAYER_ID', 'PLAYER_NAME',
-        'SEASON_ID', 'TEAM_ID',
-        'TEAM_ABBREVIATION', 'GP',
-        'PTS', 'AST', 'REB',
-        'FG_PCT', 'FG3_PCT', 'FT_PCT'
+    colunas_presentes = [col for col in COLUNAS_ORIGINAIS if col in df_bruto.columns]
+    df_transformado = df_bruto[colunas_presentes].rename(columns=NOVOS_NOMES)
+
+    # Vindo do Parquet as colunas já são numéricas; só texto (ex.: CSV sujo) precisa de conversão.
+    colunas_texto = [
+        col for col in COLUNAS_NUMERICAS
+        if col in df_transformado.columns and not pd.api.types.is_numeric_dtype(df_transformado[col])
     ]
+    if colunas_texto:
+        df_transformado[colunas_texto] = df_transformado[colunas_texto].apply(pd.to_numeric, errors='coerce')
 
-    colunas_presentes = [col for col in colunas_originais if col in df_bruto.columns]
-    df_transformado = df_bruto[colunas_presentes].copy()
-
-    novos_nomes = {
-        'PLAYER_ID': 'id_jogador',
-        'PLAYER_NAME': 'nome_jogador',
-        'SEASON_ID': 'temporada',
-        'TEAM_ID': 'id_time',
-        'TEAM_ABBREVIATION': 'sigla_time',
-        'GP': 'jogos_jogados',
-        'PTS': 'pontos',
-        'AST': 'assistencias',
-        'REB': 'rebotes',
-        'FG_PCT': 'perc_arremessos_quadra',
-        'FG3_PCT': 'perc_arremessos_3pts',
-        'FT_PCT': 'perc_lances_livres'
-    }
-    df_transformado.rename(columns=novos_nomes, inplace=True)
+    # id_time entra na chave única da tabela e é NOT NULL; sem ele a linha não pode ser carregada.
+    df_transformado = df_transformado.dropna(subset=[col for col in COLUNAS_OBRIGATORIAS if col in df_transformado.columns])
+    # idxmin devolve rótulos do índice; com rótulos repetidos (lotes concatenados) o .loc pegaria linhas a mais.
+    df_transformado = df_transformado.reset_index(drop=True)
 
-    numeric_cols_to_check = ['jogos_jogados', 'pontos', 'assistencias', 'rebotes', 'perc_arremessos_quadra', 'perc_arremessos_3pts', 'perc_lances_livres']
-    for col in numeric_cols_to_check:
-        if col in df_transformado.columns:
-            df_transformado[col] = pd.to_numeric(df_transformado[col], errors='coerce')
+    # Contagens ausentes viram 0: as colunas são NOT NULL no banco.
+    contagens = [col for col in COLUNAS_CONTAGEM if col in df_transformado.columns]
+    if contagens and df_transformado[contagens].isna().any().any():
+        df_transformado[contagens] = df_transformado[contagens].fillna(0)
+    df_transformado = df_transformado.astype({col: tipo for col, tipo in TIPOS_TRANSFORMADOS.items() if col in df_transformado.columns})
 
     if 'id_time' in df_transformado.columns:
-        df_transformado['id_time'] = pd.to_numeric(df_transformado['id_time'], errors='coerce')
-
-    df_transformado.dropna(subset=['id_jogador', 'temporada'], inplace=True)
-
-    df_transformado.sort_values(by=['id_jogador', 'temporada', 'id_time'], ascending=[True, True, True], inplace=True)
+        primeiras = df_transformado.groupby(['id_jogador', 'temporada'], observed=True, sort=True)['id_time'].idxmin()
+        df_transformado = df_transformado.loc[primeiras.to_numpy()].reset_index(drop=True)
+    else:
+        df_transformado = df_transformado.drop_duplicates(subset=['id_jogador', 'temporada']).reset_index(drop=True)
 
-    df_transformado.drop_duplicates(subset=['id_jogador', 'temporada'], keep='first', inplace=True)
+    metricas = {
+        'linhas_entrada': len(df_bruto),
+        'linhas_saida': len(df_transformado),
+        'segundos': round(time.perf_counter() - inicio, 4),
+        'memoria_resultado_mb': round(df_transformado.memory_usage(deep=True).sum() / 1024 ** 2, 2)
+    }
+    if medir_memoria:
+        _, pico = tracemalloc.get_traced_memory()
+        if not ja_rastreando:
+            tracemalloc.stop()
+        metricas['pico_memoria_mb'] = round(pico / 1024 ** 2, 2)
+    df_transformado.attrs['metricas'] = metricas
+    if not verboso:
+        return df_transformado
 
     print("Dados transformados com sucesso!")
     print("\nPrimeiras 5 linhas do DataFrame transformado:")
     print(df_transformado.head())
+    pico = f"pico de memória {metricas['pico_memoria_mb']} MB, " if medir_memoria else ""
+    print(f"\nTransformação: {metricas['linhas_entrada']} -> {metricas['linhas_saida']} linhas em {metricas['segundos']}s, "
+          f"{pico}resultado com {metricas['memoria_resultado_mb']} MB.")
+
+    return df_transformado
+
+def _transformar_temporadas(caminho_arquivo, temporadas):
+    df_bruto = ler_staging(caminho_arquivo, colunas=COLUNAS_ORIGINAIS, filtro_particao=('SEASON_ID', temporadas), tipos=TIPOS_BRUTOS)
+    return transformar_dados_evolucao_jogador(df_bruto, verboso=False)
+
+def transformar_em_paralelo(caminho_arquivo, workers=WORKERS):
+    """Transforma o staging bruto dividindo-o por temporada entre 'workers' processos.
 
-    print("\nVerificando tipos de dados após a transformação:")
-    print(df_transformado.info())
+    A deduplicação é por (jogador, temporada), então cada temporada pode ser
+    transformada de forma independente. Cada processo lê do disco só as
+    partições SEASON_ID que recebeu (em Parquet particionado; CSV e Arrow são
+    lidos inteiros e filtrados). O resultado é reordenado por
+    (id_jogador, temporada) e fica idêntico ao de transformar_dados_evolucao_jogador
+    sobre o arquivo inteiro, qualquer que seja o número de processos.
+    """
+    from concurrent.futures import ProcessPoolExecutor
 
+    inicio = time.perf_counter()
+    temporadas = sorted(ler_staging(caminho_arquivo, colunas=['SEASON_ID'])['SEASON_ID'].astype(str).unique())
+    if not temporadas:
+        return pd.DataFrame()
+    # Blocos contíguos de temporadas, alguns por processo, para equilibrar a carga sem multiplicar leituras.
+    tamanho_bloco = max(1, len(temporadas) // (workers * 4))
+    blocos = [temporadas[i:i + tamanho_bloco] for i in range(0, len(temporadas), tamanho_bloco)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        partes = list(executor.map(_transformar_temporadas, [caminho_arquivo] * len(blocos), blocos))
+    partes = [parte for parte in partes if not parte.empty]
+    if not partes:
+        return pd.DataFrame()
+
+    linhas_entrada = sum(parte.attrs['metricas']['linhas_entrada'] for parte in partes)
+    df_transformado = pd.concat(partes, ignore_index=True)
+    # Categorias diferentes entre as partes viram object no concat; os tipos são reaplicados.
+    df_transformado = df_transformado.astype({col: tipo for col, tipo in TIPOS_TRANSFORMADOS.items() if col in df_transformado.columns})
+    df_transformado = df_transformado.sort_values(['id_jogador', 'temporada'], kind='stable').reset_index(drop=True)
+
+    metricas = {
+        'linhas_entrada': linhas_entrada,
+        'linhas_saida': len(df_transformado),
+        'segundos': round(time.perf_counter() - inicio, 4),
+        'workers': workers,
+        'particoes': len(blocos),
+        'memoria_resultado_mb': round(df_transformado.memory_usage(deep=True).sum() / 1024 ** 2, 2)
+    }
+    df_transformado.attrs['metricas'] = metricas
+    print(f"\nTransformação paralela: {metricas['linhas_entrada']} -> {metricas['linhas_saida']} linhas em "
+          f"{metricas['segundos']}s com {workers} processos ({len(temporadas)} temporadas em {len(blocos)} blocos).")
     return df_transformado
 
 if __name__ == "__main__":
-    nome_arquivo_csv_bruto = Path(__file__).resolve().parent.parent.parent / 'data' / 'raw' / 'nba_stats_brutas.csv'
-    df_bruto = carregar_dados_brutos(nome_arquivo_csv_bruto)
+    parser = argparse.ArgumentParser(description="Transforma os dados brutos de carreira para a carga no banco.")
+    parser.add_argument('--formato', choices=FORMATOS, default=FORMATO_STAGING, help="Formato do arquivo de staging transformado.")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="Processos para transformar as temporadas em paralelo.")
+    parser.add_argument('--medir-memoria', action='store_true', help="Mede o pico de memória com tracemalloc (mais lento; só sem --workers).")
+    args = parser.parse_args()
 
-    if not df_bruto.empty:
-        df_transformado = transformar_dados_evolucao_jogador(df_bruto)
+    caminho_bruto = project_root_dir / 'data' / 'raw' / 'nba_stats_brutas'
+    if args.workers > 1:
+        try:
+            df_transformado = transformar_em_paralelo(caminho_bruto, args.workers)
+        except FileNotFoundError:
+            print(f"Erro: o arquivo '{caminho_bruto}' não foi encontrado. Certifique-se de que a extração foi executada primeiro.")
+            df_transformado = pd.DataFrame()
+    else:
+        df_bruto = carregar_dados_brutos(caminho_bruto)
+        df_transformado = transformar_dados_evolucao_jogador(df_bruto, medir_memoria=args.medir_memoria) if not df_bruto.empty else pd.DataFrame()
 
-        if not df_transformado.empty:
-            output_path_transformed = Path(__file__).resolve().parent.parent.parent / 'data' / 'processed' / 'nba_stats_transformadas.csv'
-            output_path_transformed.parent.mkdir(parents=True, exist_ok=True) 
-            df_transformado.to_csv(output_path_transformed, index=False)
-            print(f"\nDados transformados salvos em '{output_path_transformed}'")
+    if not df_transformado.empty:
+        output_path_transformed = salvar_staging(
+            df_transformado,
+            project_root_dir / 'data' / 'processed' / 'nba_stats_transformadas',
+            formato=args.formato,
+            coluna_particao='temporada'
+        )
+        print(f"\nDados transformados salvos em '{output_path_transformed}'")
     else:
         print("DataFrame bruto está vazio. Transformação não realizada.")
 
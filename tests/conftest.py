@@ -0,0 +1,67 @@
+from collections import Counter, OrderedDict
+from pathlib import Path
+import os
+import sys
+import threading
+import pytest
+
+# %%
+# Os testes rodam contra o endpoint simulado (etl/endpoint_simulado.py) e
+# bancos SQLite temporários: nenhum acesso à API da NBA nem ao MySQL do .env.
+# Sem backoff entre tentativas, para as retentativas não custarem segundos.
+
+os.environ.setdefault('ETL_BACKOFF_BASE', '0')
+
+src_dir = Path(__file__).resolve().parent.parent / 'src'
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+from etl.endpoint_simulado import FalhaSimulada, gerar_carreira_sintetica
+
+# %%
+
+@pytest.fixture
+def endpoint_roteirizado():
+    """Fábrica de endpoints no formato do PlayerCareerStats com falhas determinísticas.
+
+    'falhas' mapeia player_id -> quantas chamadas falham antes de a resposta
+    vir; jogadores em 'sem_dados' respondem sem nenhuma temporada. O atributo
+    'chamadas' conta as chamadas por jogador.
+    """
+    def criar(falhas=None, sem_dados=()):
+        falhas = dict(falhas or {})
+        trava = threading.Lock()
+
+        class PlayerCareerStatsRoteirizado:
+            chamadas = Counter()
+
+            def __init__(self, player_id, **kwargs):
+                with trava:
+                    PlayerCareerStatsRoteirizado.chamadas[player_id] += 1
+                    numero = PlayerCareerStatsRoteirizado.chamadas[player_id]
+                if numero <= falhas.get(player_id, 0):
+                    raise FalhaSimulada(f"Falha roteirizada {numero} para o jogador ID {player_id}")
+                self.player_id = player_id
+
+            def get_data_frames(self):
+                carreira = gerar_carreira_sintetica(self.player_id)
+                return [carreira.iloc[0:0] if self.player_id in sem_dados else carreira]
+
+        return PlayerCareerStatsRoteirizado
+    return criar
+
+@pytest.fixture
+def servir_dashboard(tmp_path, monkeypatch):
+    """Aponta a camada de dados do dashboard para 'engine', com o cache zerado (disco em tmp_path) e sem intervalo entre leituras de versão."""
+    from dashboard import analitico, dados, db_setup
+
+    def servir(engine):
+        monkeypatch.setattr(db_setup, '_engine', engine)
+        monkeypatch.setattr(dados, 'DIRETORIO_CACHE', tmp_path / 'cache')
+        monkeypatch.setattr(dados, 'INTERVALO_VERSAO', 0)
+        monkeypatch.setattr(dados, '_memoria', OrderedDict())
+        monkeypatch.setattr(dados, '_versoes', {'valores': {}, 'lido_em': None})
+        monkeypatch.setattr(dados, '_metricas', {**{chave: 0 for chave in dados._metricas}, 'consultas': {}})
+        monkeypatch.setattr(analitico, '_indice', {**analitico._indice, 'snapshot': None, 'recargas': 0})
+        return engine
+    return servir
@@ -0,0 +1,111 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+import etl.backfill as backfill
+from etl.backfill import executar_backfill, consolidar_backfill, ler_progresso
+from etl.endpoint_simulado import obter_jogadores_simulados, obter_jogadores_historicos_simulados
+from etl.load import carregar_para_mysql
+from etl.staging import ler_staging
+from etl.transform import carregar_dados_brutos, transformar_dados_evolucao_jogador
+
+# %%
+
+JOGADORES_POR_LOTE = 5
+
+@pytest.fixture
+def jogadores():
+    return obter_jogadores_simulados(25) # 5 lotes
+
+def _opcoes(endpoint):
+    return {'endpoint': endpoint, 'max_em_voo': 4, 'requisicoes_por_segundo': 1e6, 'max_tentativas': 2}
+
+def _ids_do_lote(jogadores, numero):
+    return {jogador['id'] for jogador in jogadores[(numero - 1) * JOGADORES_POR_LOTE:numero * JOGADORES_POR_LOTE]}
+
+# %%
+
+def test_backfill_retoma_depois_de_interrupcao_e_falha_intermitente(tmp_path, jogadores, endpoint_roteirizado, monkeypatch):
+    diretorio = tmp_path / 'backfill'
+
+    # Rodada 1: para depois de dois lotes.
+    endpoint = endpoint_roteirizado()
+    progresso = executar_backfill(jogadores, diretorio, JOGADORES_POR_LOTE, limite_lotes=2, **_opcoes(endpoint))
+    assert progresso['lotes_concluidos'] == [1, 2]
+    assert set(endpoint.chamadas) == _ids_do_lote(jogadores, 1) | _ids_do_lote(jogadores, 2)
+
+    # Rodada 2: o processo cai no meio do quarto lote; o checkpoint fica no terceiro.
+    extrair = backfill.extrair_estatisticas_concorrente
+    lotes_extraidos = []
+
+    def extrair_e_cair(lote, **opcoes):
+        lotes_extraidos.append(lote)
+        if len(lotes_extraidos) == 2:
+            raise RuntimeError("processo interrompido")
+        return extrair(lote, **opcoes)
+
+    monkeypatch.setattr(backfill, 'extrair_estatisticas_concorrente', extrair_e_cair)
+    endpoint = endpoint_roteirizado()
+    with pytest.raises(RuntimeError):
+        executar_backfill(jogadores, diretorio, JOGADORES_POR_LOTE, **_opcoes(endpoint))
+    monkeypatch.setattr(backfill, 'extrair_estatisticas_concorrente', extrair)
+    assert ler_progresso(diretorio)['lotes_concluidos'] == [1, 2, 3]
+    assert set(endpoint.chamadas) == _ids_do_lote(jogadores, 3)
+
+    # Rodada 3: retoma do quarto lote. Um jogador do quinto falha nas duas tentativas
+    # do lote e volta a responder na repescagem do fim da execução.
+    instavel = jogadores[-1]['id']
+    endpoint = endpoint_roteirizado(falhas={instavel: 3})
+    progresso = executar_backfill(jogadores, diretorio, JOGADORES_POR_LOTE, **_opcoes(endpoint))
+
+    assert progresso['lotes_concluidos'] == [1, 2, 3, 4, 5]
+    assert set(endpoint.chamadas) == _ids_do_lote(jogadores, 4) | _ids_do_lote(jogadores, 5)
+    assert endpoint.chamadas[instavel] == 4 # 2 no lote, 2 na repescagem
+    assert progresso['ids_com_falha'] == []
+    assert list((diretorio / 'lotes').glob('repescagem_*'))
+
+    # Nenhum lote refeito: cada jogador foi buscado com sucesso uma única vez.
+    assert consolidar_backfill(diretorio, destino=tmp_path / 'nba_stats_brutas') is not None
+    df = ler_staging(tmp_path / 'nba_stats_brutas', tipos={'PLAYER_ID': 'int32'})
+    assert sorted(int(i) for i in df['PLAYER_ID'].unique()) == [jogador['id'] for jogador in jogadores]
+    assert not df.duplicated(subset=['PLAYER_ID', 'SEASON_ID', 'TEAM_ID']).any()
+
+def test_backfill_guarda_falha_persistente_para_a_proxima_execucao(tmp_path, jogadores, endpoint_roteirizado):
+    diretorio = tmp_path / 'backfill'
+    instavel = jogadores[0]['id']
+
+    progresso = executar_backfill(jogadores, diretorio, JOGADORES_POR_LOTE, **_opcoes(endpoint_roteirizado(falhas={instavel: 99})))
+    assert progresso['ids_com_falha'] == [instavel]
+
+    # Todos os lotes já estão concluídos: a nova execução só repesca o jogador que falhou.
+    endpoint = endpoint_roteirizado()
+    progresso = executar_backfill(jogadores, diretorio, JOGADORES_POR_LOTE, **_opcoes(endpoint))
+    assert dict(endpoint.chamadas) == {instavel: 1}
+    assert progresso['ids_com_falha'] == []
+
+def test_backfill_recusa_checkpoint_de_outra_lista(tmp_path, jogadores, endpoint_roteirizado):
+    diretorio = tmp_path / 'backfill'
+    executar_backfill(jogadores, diretorio, JOGADORES_POR_LOTE, limite_lotes=1, **_opcoes(endpoint_roteirizado()))
+
+    with pytest.raises(ValueError):
+        executar_backfill(jogadores[:10], diretorio, JOGADORES_POR_LOTE, **_opcoes(endpoint_roteirizado()))
+
+@pytest.mark.parametrize('modo', ['troca', 'substituir'])
+def test_backfill_historico_carrega_temporadas_sem_3_pontos(tmp_path, endpoint_roteirizado, modo):
+    # Lotes só de carreiras anteriores a 1979-80 (FG3_PCT nulo em todas as linhas) e lotes mistos.
+    jogadores = obter_jogadores_historicos_simulados(15) + obter_jogadores_simulados(5)
+    progresso = executar_backfill(jogadores, tmp_path / 'backfill', JOGADORES_POR_LOTE, **_opcoes(endpoint_roteirizado()))
+    assert progresso['ids_com_falha'] == []
+    consolidar_backfill(tmp_path / 'backfill', destino=tmp_path / 'nba_stats_brutas')
+
+    df = transformar_dados_evolucao_jogador(carregar_dados_brutos(tmp_path / 'nba_stats_brutas'), verboso=False)
+    sem_3pts = df['temporada'].astype(str) < '1979-80'
+    assert sem_3pts.any() and df.loc[sem_3pts, 'perc_arremessos_3pts'].isna().all()
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'nba.db'}")
+    metricas = carregar_para_mysql(df, engine, usar_infile=False, modo=modo)
+
+    assert metricas['versao_carga'] == 1
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM jogadores")).scalar() == len(jogadores)
+        assert conn.execute(text("SELECT COUNT(*) FROM estatisticas_temporada")).scalar() == len(df)
+        assert conn.execute(text("SELECT COUNT(*) FROM estatisticas_temporada WHERE perc_arremessos_3pts IS NULL")).scalar() == sem_3pts.sum()
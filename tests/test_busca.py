@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from dashboard import busca, dados
+
+# %%
+
+NOMES = ['LeBron James', 'James Harden', 'Jamal Murray', 'Nikola Jokić', "D'Angelo Russell", 'Kevin Durant', 'Anthony Davis', 'Davis Bertans']
+
+@pytest.fixture
+def jogadores(monkeypatch):
+    """Troca dados.jogadores() por uma tabela em memória; atribuir a 'atual' simula uma carga nova."""
+    tabela = {'atual': pd.DataFrame({'id_jogador': range(1, len(NOMES) + 1), 'nome_jogador': NOMES})}
+    monkeypatch.setattr(dados, 'jogadores', lambda: tabela['atual'])
+    monkeypatch.setattr(busca, '_indice', {**busca._indice, 'jogadores': None})
+    return tabela
+
+def _nomes(termo, limite=10):
+    return [nome for _, nome in busca.buscar_jogadores(termo, limite)]
+
+# %%
+
+def test_prefixo_poe_comeco_do_nome_antes_do_sobrenome(jogadores):
+    assert _nomes('jam') == ['Jamal Murray', 'James Harden', 'LeBron James']
+    assert _nomes('Davis') == ['Davis Bertans', 'Anthony Davis']
+    assert _nomes('lebron  J.') == ['LeBron James']
+    assert _nomes('jam', limite=2) == ['Jamal Murray', 'James Harden']
+    assert busca.buscar_jogadores('harden') == [(2, 'James Harden')]
+
+def test_trigramas_cobrem_acentos_erros_de_digitacao_e_trechos(jogadores):
+    assert busca.normalizar("D'Angelo Jokić Jr.") == 'dangelo jokic jr'
+    assert _nomes('dangelo') == ["D'Angelo Russell"]
+    assert _nomes('jokich') == ['Nikola Jokić']
+    assert _nomes('ussel') == ["D'Angelo Russell"]
+    assert _nomes('j') == [] and _nomes("'.") == []
+
+def test_indice_refeito_quando_a_tabela_de_jogadores_muda(jogadores):
+    assert _nomes('wemb') == []
+    jogadores['atual'] = pd.concat(
+        [jogadores['atual'], pd.DataFrame({'id_jogador': [99], 'nome_jogador': ['Victor Wembanyama']})], ignore_index=True
+    )
+    assert busca.buscar_jogadores('wemb') == [(99, 'Victor Wembanyama')]
+    assert busca.info_indice()['jogadores'] == len(NOMES) + 1
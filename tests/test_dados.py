@@ -0,0 +1,84 @@
+import os
+import time
+import pytest
+from sqlalchemy import create_engine
+
+from dashboard import dados
+from etl.endpoint_simulado import gerar_liga_sintetica
+from etl.load import carregar_para_mysql
+from etl.materializacao import registrar_versao_carga
+from etl.transform import transformar_dados_evolucao_jogador
+
+# %%
+
+@pytest.fixture
+def banco(tmp_path, servir_dashboard):
+    """Banco SQLite carregado com uma liga sintética, servido ao dashboard com o cache zerado."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'nba.db'}")
+    df = transformar_dados_evolucao_jogador(gerar_liga_sintetica(0.1), verboso=False)
+    df['temporada'] = df['temporada'].astype(str)
+    carregar_para_mysql(df, engine, modo='substituir')
+    return servir_dashboard(engine)
+
+def _arquivo(temporada, versao):
+    return dados._arquivo_cache(('estatisticas_temporada', (('temporada', temporada),)), 'temporadas', versao)
+
+def _publicar(engine, conjunto):
+    with engine.begin() as conn:
+        return registrar_versao_carga(conn, conjunto)
+
+# %%
+
+def test_nova_versao_de_carga_descarta_o_conjunto_na_memoria_e_no_disco(banco):
+    temporada = dados.temporadas()[0]
+    versao = dados.versoes_carga()['temporadas']
+    dados.estatisticas_temporada(temporada)
+    dados.estatisticas_temporada(temporada)
+    assert (dados.metricas_cache()['faltas'], dados.metricas_cache()['acertos_memoria']) == (2, 1)
+    assert _arquivo(temporada, versao).exists()
+
+    # Outra réplica (ou o processo reiniciado) acha o resultado no disco.
+    dados._memoria.clear()
+    dados.estatisticas_temporada(temporada)
+    assert dados.metricas_cache()['acertos_disco'] == 1
+
+    # Versão nova de outro conjunto não mexe nas temporadas.
+    _publicar(banco, 'jogos')
+    dados.estatisticas_temporada(temporada)
+    assert (dados.metricas_cache()['acertos_memoria'], dados.metricas_cache()['invalidadas']) == (2, 0)
+
+    nova = _publicar(banco, 'temporadas')
+    dados.estatisticas_temporada(temporada)
+    metricas = dados.metricas_cache()
+    assert metricas['invalidadas'] == 1
+    assert metricas['faltas'] == 3
+    assert not _arquivo(temporada, versao).exists() and _arquivo(temporada, nova).exists()
+
+def test_limites_de_memoria_e_disco_despejam_o_menos_recente(banco, monkeypatch):
+    a, b, c = dados.temporadas()[:3]
+    versao = dados.versoes_carga()['temporadas']
+    tamanhos = {t: dados._tamanho(dados.estatisticas_temporada(t)) for t in (a, b, c)}
+    bytes_disco = {t: _arquivo(t, versao).stat().st_size for t in (a, b, c)}
+    dados.invalidar_cache()
+    monkeypatch.setattr(dados, 'CACHE_MEMORIA_BYTES', sum(tamanhos.values()) - 1)
+    monkeypatch.setattr(dados, 'CACHE_DISCO_BYTES', sum(bytes_disco.values()) - 1)
+
+    dados.estatisticas_temporada(a)
+    dados.estatisticas_temporada(b)
+    # Arquivos com idades distintas; 'a' é o mais antigo no disco.
+    agora = time.time()
+    os.utime(_arquivo(a, versao), (agora - 20, agora - 20))
+    os.utime(_arquivo(b, versao), (agora - 10, agora - 10))
+    dados.estatisticas_temporada(a) # 'a' volta a ser o mais recente na memória
+    dados.estatisticas_temporada(c)
+
+    metricas = dados.metricas_cache()
+    assert (metricas['despejadas_memoria'], metricas['entradas_memoria']) == (1, 2)
+    assert metricas['bytes_memoria'] == tamanhos[a] + tamanhos[c] <= dados.CACHE_MEMORIA_BYTES
+    assert (metricas['despejadas_disco'], metricas['entradas_disco']) == (1, 2)
+    assert not _arquivo(a, versao).exists()
+
+    dados.estatisticas_temporada(a)
+    dados.estatisticas_temporada(b)
+    metricas = dados.metricas_cache()
+    assert (metricas['acertos_memoria'], metricas['acertos_disco']) == (2, 1) # 'b' saiu da memória, mas não do disco
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard import dispersao
+
+# %%
+
+@pytest.fixture
+def pontos():
+    rng = np.random.default_rng(3)
+    quantidade = 4 * dispersao.LIMITE_PONTOS
+    return pd.DataFrame({
+        'pontos_por_jogo': rng.gamma(2.0, 5.0, quantidade),
+        'assistencias_por_jogo': rng.gamma(1.5, 2.0, quantidade),
+        'jogos_jogados': rng.integers(1, 83, quantidade),
+        'nome_jogador': [f"Jogador {i}" for i in range(quantidade)]
+    })
+
+def _grafico(df, **kwargs):
+    return dispersao.grafico_dispersao(df, 'pontos_por_jogo', 'assistencias_por_jogo', 'jogos_jogados', 'nome_jogador', 'Dispersão', {}, **kwargs)
+
+# %%
+
+def test_acima_do_limite_agrupa_em_grade_sem_perder_pontos(pontos):
+    fig, info = _grafico(pontos)
+
+    grade, destaques = fig.data
+    assert info['modo'] == 'grade' and info['pontos_visiveis'] == len(pontos)
+    assert info['marcadores'] == len(grade.x) + len(destaques.x) <= dispersao.BINS ** 2 + 2 * dispersao.DESTAQUES
+    contagens = np.asarray(grade.customdata)[:, 0]
+    assert contagens.min() >= 1 and contagens.sum() == len(pontos)
+    assert np.average(np.asarray(grade.x), weights=contagens) == pytest.approx(pontos['pontos_por_jogo'].mean(), rel=0.01)
+    lideres = set(pontos.nlargest(dispersao.DESTAQUES, 'pontos_por_jogo')['nome_jogador'])
+    lideres |= set(pontos.nlargest(dispersao.DESTAQUES, 'assistencias_por_jogo')['nome_jogador'])
+    assert set(destaques.text) == lideres
+
+def test_faixa_estreita_volta_a_mostrar_jogadores(pontos):
+    faixa_x, faixa_y = (20, 30), (0, 4)
+    na_faixa = dispersao.filtrar_faixa(pontos, 'pontos_por_jogo', 'assistencias_por_jogo', faixa_x, faixa_y)
+    assert 0 < len(na_faixa) <= dispersao.LIMITE_PONTOS
+
+    fig, info = _grafico(pontos, faixa_x=faixa_x, faixa_y=faixa_y)
+
+    assert (info['modo'], info['pontos_visiveis'], info['marcadores']) == ('pontos', len(na_faixa), len(na_faixa))
+    assert sorted(fig.data[0].hovertext) == sorted(na_faixa['nome_jogador'])
+    assert list(fig.layout.xaxis.range) == list(faixa_x)
+
+def test_modo_forcado_e_modo_invalido(pontos):
+    amostra = pontos.head(200)
+    assert _grafico(amostra, modo='grade')[1]['modo'] == 'grade'
+    assert _grafico(pontos, modo='pontos')[1]['marcadores'] == len(pontos)
+    # Faixa vazia não tem o que agrupar: cai para pontos, sem marcadores.
+    assert _grafico(pontos, modo='grade', faixa_x=(-2, -1))[1] == {'modo': 'pontos', 'pontos_totais': len(pontos), 'pontos_visiveis': 0, 'marcadores': 0}
+    with pytest.raises(ValueError):
+        _grafico(amostra, modo='hexbin')
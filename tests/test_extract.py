@@ -0,0 +1,163 @@
+import time
+import pandas as pd
+import pytest
+
+from etl.cache_respostas import CacheRespostas
+from etl.endpoint_simulado import (
+    FalhaSimulada, criar_endpoint_simulado, gerar_jogos_sinteticos, obter_jogadores_simulados, obter_jogadores_historicos_simulados
+)
+from etl.extract import LimitadorDeTaxa, chamar_com_retry, extrair_estatisticas_concorrente
+
+# %%
+
+def test_limitador_libera_rajada_e_depois_segura_a_taxa():
+    limitador = LimitadorDeTaxa(taxa_por_segundo=50, capacidade=5)
+
+    inicio = time.perf_counter()
+    for _ in range(5):
+        limitador.adquirir()
+    rajada = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    for _ in range(10):
+        limitador.adquirir()
+    regime = time.perf_counter() - inicio
+
+    assert rajada < 0.05
+    assert regime >= 10 / 50 * 0.9
+
+def test_chamar_com_retry_conta_tentativas_ate_responder():
+    limitador = LimitadorDeTaxa(1e6)
+    respostas = iter([RuntimeError("1"), RuntimeError("2"), pd.DataFrame({'a': [1]})])
+
+    def chamada():
+        resposta = next(respostas)
+        if isinstance(resposta, Exception):
+            raise resposta
+        return resposta
+
+    df, tentativas = chamar_com_retry(chamada, limitador, "teste", max_tentativas=4, backoff_base=0)
+    assert tentativas == 3
+    assert df['a'].tolist() == [1]
+
+def test_chamar_com_retry_devolve_none_ao_esgotar_as_tentativas():
+    limitador = LimitadorDeTaxa(1e6)
+
+    def chamada():
+        raise RuntimeError("sempre falha")
+
+    assert chamar_com_retry(chamada, limitador, "teste", max_tentativas=3, backoff_base=0) == (None, 3)
+
+def test_chamar_com_retry_nao_refaz_resposta_vazia():
+    limitador = LimitadorDeTaxa(1e6)
+    chamadas = []
+
+    def chamada():
+        chamadas.append(1)
+        return pd.DataFrame()
+
+    df, tentativas = chamar_com_retry(chamada, limitador, "teste", max_tentativas=3, backoff_base=0)
+    assert df.empty and tentativas == 1 and len(chamadas) == 1
+
+# %%
+
+def test_extracao_separa_falhas_retentativas_e_carreiras_vazias(endpoint_roteirizado):
+    jogadores = obter_jogadores_simulados(12)
+    ids = [jogador['id'] for jogador in jogadores]
+    sempre_falha, falha_uma_vez, sem_dados = ids[0], ids[1], ids[2]
+    endpoint = endpoint_roteirizado(falhas={sempre_falha: 99, falha_uma_vez: 1}, sem_dados={sem_dados})
+
+    df, metricas = extrair_estatisticas_concorrente(
+        jogadores, endpoint, max_em_voo=4, requisicoes_por_segundo=1e6, max_tentativas=3
+    )
+
+    assert metricas['falhas'] == 1
+    assert metricas['ids_com_falha'] == [sempre_falha]
+    assert metricas['sem_dados'] == 1
+    # 12 jogadores: o que sempre falha gasta 3 chamadas, o que falha uma vez gasta 2.
+    assert metricas['chamadas_api'] == 12 + 2 + 1
+    assert metricas['retentativas'] == 2 + 1
+    assert metricas['chamadas_api'] == sum(endpoint.chamadas.values())
+    # Sem as linhas de quem falhou ou não tem temporadas, e na ordem da lista de entrada.
+    assert df['PLAYER_ID'].drop_duplicates().tolist() == ids[1:2] + ids[3:]
+    assert set(df['PLAYER_NAME']) == {jogador['full_name'] for jogador in jogadores[1:2] + jogadores[3:]}
+
+def test_extracao_com_endpoint_simulado_sempre_falhando():
+    jogadores = obter_jogadores_simulados(6)
+    endpoint = criar_endpoint_simulado(latencia_min=0, latencia_max=0, taxa_falha=1.0, semente=1)
+
+    df, metricas = extrair_estatisticas_concorrente(jogadores, endpoint, max_em_voo=3, requisicoes_por_segundo=1e6, max_tentativas=2)
+
+    assert df.empty
+    assert metricas['falhas'] == 6
+    assert sorted(metricas['ids_com_falha']) == [jogador['id'] for jogador in jogadores]
+    assert metricas['chamadas_api'] == endpoint.chamadas == 12
+    assert metricas['retentativas'] == 6
+
+@pytest.mark.parametrize('max_em_voo', [1, 8])
+def test_extracao_com_endpoint_simulado_sem_falhas(max_em_voo):
+    jogadores = obter_jogadores_simulados(10)
+    endpoint = criar_endpoint_simulado(latencia_min=0, latencia_max=0, taxa_falha=0, semente=1)
+
+    df, metricas = extrair_estatisticas_concorrente(jogadores, endpoint, max_em_voo=max_em_voo, requisicoes_por_segundo=1e6)
+
+    assert (metricas['falhas'], metricas['retentativas'], metricas['chamadas_api']) == (0, 0, 10)
+    assert df['PLAYER_ID'].drop_duplicates().tolist() == [jogador['id'] for jogador in jogadores]
+
+# %%
+# Modo incremental: o game log da liga decide quem é rebuscado.
+
+TEMPORADA = '2024-25'
+
+def _game_log(jogadores, jogos_a_mais=(), falhar=False):
+    """PlayerGameLogs de TEMPORADA; cada id em 'jogos_a_mais' ganha um jogo além dos da carreira sintética."""
+    class PlayerGameLogsRoteirizado:
+        chamadas = 0
+
+        def __init__(self, season_nullable='', **kwargs):
+            PlayerGameLogsRoteirizado.chamadas += 1
+            if falhar:
+                raise FalhaSimulada("game log indisponível")
+
+        def get_data_frames(self):
+            df = gerar_jogos_sinteticos(TEMPORADA, jogadores)
+            return [pd.concat([df] + [df[df['PLAYER_ID'] == i].head(1) for i in jogos_a_mais], ignore_index=True)]
+    return PlayerGameLogsRoteirizado
+
+def _extrair_incremental(jogadores, endpoint, endpoint_jogos, cache):
+    return extrair_estatisticas_concorrente(
+        jogadores, endpoint, max_em_voo=4, requisicoes_por_segundo=1e6, max_tentativas=2,
+        cache=cache, incremental=True, endpoint_jogos=endpoint_jogos
+    )[1]
+
+def test_incremental_rebusca_so_quem_mudou_de_numero_de_jogos(tmp_path, endpoint_roteirizado):
+    jogadores = obter_jogadores_simulados(6)
+    ids = [jogador['id'] for jogador in jogadores]
+
+    metricas = _extrair_incremental(jogadores, endpoint_roteirizado(), _game_log(jogadores), CacheRespostas(tmp_path, temporada=TEMPORADA))
+    assert metricas['chamadas_api'] == 1 + 6 # O game log conta como uma chamada
+
+    # Mesmo número de jogos, dentro do TTL: tudo sai do cache, só o game log vai à API.
+    endpoint = endpoint_roteirizado()
+    metricas = _extrair_incremental(jogadores, endpoint, _game_log(jogadores), CacheRespostas(tmp_path, temporada=TEMPORADA))
+    assert (metricas['chamadas_api'], metricas['cache']['acertos']) == (1, 6)
+    assert not endpoint.chamadas
+
+    # Um jogador com um jogo a mais no game log é rebuscado; os demais não.
+    endpoint = endpoint_roteirizado()
+    metricas = _extrair_incremental(jogadores, endpoint, _game_log(jogadores, jogos_a_mais=[ids[2]]), CacheRespostas(tmp_path, temporada=TEMPORADA))
+    assert dict(endpoint.chamadas) == {ids[2]: 1}
+    assert (metricas['chamadas_api'], metricas['cache']['acertos'], metricas['cache']['faltas']) == (2, 5, 1)
+
+def test_incremental_sem_game_log_decide_pela_idade(tmp_path, endpoint_roteirizado):
+    ativos, historicos = obter_jogadores_simulados(4), obter_jogadores_historicos_simulados(2)
+    jogadores = ativos + historicos
+    _extrair_incremental(jogadores, endpoint_roteirizado(), _game_log(jogadores), CacheRespostas(tmp_path, temporada=TEMPORADA))
+
+    # Game log falhando nas duas tentativas: as duas chamadas contam, e com o TTL curto vencido só quem
+    # tem linha na temporada atual é rebuscado; os aposentados esperam o TTL histórico.
+    endpoint, game_log = endpoint_roteirizado(), _game_log(jogadores, falhar=True)
+    metricas = _extrair_incremental(jogadores, endpoint, game_log, CacheRespostas(tmp_path, ttl=0, temporada=TEMPORADA))
+    assert game_log.chamadas == 2
+    assert (metricas['chamadas_api'], metricas['retentativas']) == (2 + 4, 1)
+    assert set(endpoint.chamadas) == {jogador['id'] for jogador in ativos}
@@ -0,0 +1,154 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from dashboard.ranking import top_n
+from etl.endpoint_simulado import gerar_liga_sintetica, obter_jogadores_historicos_simulados
+from etl.load import carregar_para_mysql, SUFIXO_SOMBRA, SUFIXO_ANTIGO
+from etl.materializacao import materializar_evolucao, materializar_agregados
+from etl.transform import transformar_dados_evolucao_jogador
+
+# %%
+
+@pytest.fixture(scope='module')
+def liga():
+    df = transformar_dados_evolucao_jogador(gerar_liga_sintetica(0.1), verboso=False)
+    df['temporada'] = df['temporada'].astype(str)
+    return df
+
+@pytest.fixture(scope='module')
+def liga_historica():
+    # Carreiras que começam antes de 1979-80: FG3_PCT nulo nessas temporadas.
+    df = transformar_dados_evolucao_jogador(gerar_liga_sintetica(jogadores=obter_jogadores_historicos_simulados(30)), verboso=False)
+    df['temporada'] = df['temporada'].astype(str)
+    return df
+
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'nba.db'}")
+
+def _contar(engine, tabela):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {tabela}")).scalar()
+
+def _versao(engine):
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT versao FROM versoes_carga WHERE conjunto = 'temporadas'")).scalar()
+
+def _derivadas(engine):
+    with engine.connect() as conn:
+        evolucao = pd.read_sql("SELECT * FROM evolucao_temporada ORDER BY id_jogador, temporada", conn)
+        agregados = pd.read_sql("SELECT * FROM agregados_temporada ORDER BY temporada", conn)
+    return evolucao, agregados
+
+def _reconstruidas(engine):
+    """As derivadas refeitas do zero a partir das tabelas ativas, sem publicar nada."""
+    with engine.connect() as conn:
+        transacao = conn.begin()
+        materializar_evolucao(conn)
+        materializar_agregados(conn)
+        evolucao = pd.read_sql("SELECT * FROM evolucao_temporada ORDER BY id_jogador, temporada", conn)
+        agregados = pd.read_sql("SELECT * FROM agregados_temporada ORDER BY temporada", conn)
+        transacao.rollback()
+    return evolucao, agregados
+
+def _assert_publicado(engine, df):
+    assert _contar(engine, 'jogadores') == df['id_jogador'].nunique()
+    assert _contar(engine, 'estatisticas_temporada') == len(df)
+    evolucao, agregados = _derivadas(engine)
+    esperada_evolucao, esperados_agregados = _reconstruidas(engine)
+    assert len(evolucao) > 0
+    pd.testing.assert_frame_equal(evolucao, esperada_evolucao)
+    pd.testing.assert_frame_equal(agregados, esperados_agregados)
+    assert len(agregados) == df['temporada'].nunique()
+
+# %%
+
+@pytest.mark.parametrize('modo', ['troca', 'substituir', 'incremental'])
+def test_carga_publica_dados_derivadas_e_versao(engine, liga, modo):
+    metricas = carregar_para_mysql(liga, engine, usar_infile=False, modo=modo)
+
+    assert metricas['modo'] == modo
+    assert metricas['versao_carga'] == 1
+    _assert_publicado(engine, liga)
+
+    carregar_para_mysql(liga, engine, usar_infile=False, modo='troca')
+    assert _versao(engine) == 2
+    _assert_publicado(engine, liga)
+
+def test_troca_nao_deixa_tabelas_sombra(engine, liga):
+    carregar_para_mysql(liga, engine, usar_infile=False, modo='troca')
+    carregar_para_mysql(liga, engine, usar_infile=False, modo='troca')
+
+    tabelas = inspect(engine).get_table_names()
+    assert not [t for t in tabelas if t.endswith(SUFIXO_SOMBRA) or t.endswith(SUFIXO_ANTIGO)]
+
+def test_troca_com_falha_nas_derivadas_mantem_a_versao_publicada(engine, liga, monkeypatch):
+    import etl.load
+
+    carregar_para_mysql(liga, engine, usar_infile=False, modo='troca')
+    alterada = liga.assign(pontos=liga['pontos'] + 1)
+
+    def falhar(*args, **kwargs):
+        raise RuntimeError("falha nas derivadas")
+    monkeypatch.setattr(etl.load, 'materializar_derivadas', falhar)
+
+    assert carregar_para_mysql(alterada, engine, usar_infile=False, modo='troca') == {}
+    assert _versao(engine) == 1
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT SUM(pontos) FROM estatisticas_temporada")).scalar() == int(liga['pontos'].sum())
+    assert not [t for t in inspect(engine).get_table_names() if t.endswith(SUFIXO_SOMBRA)]
+
+def test_incremental_grava_e_conta_so_as_diferencas(engine, liga):
+    carregar_para_mysql(liga, engine, usar_infile=False, modo='troca')
+
+    jogadores = liga['id_jogador'].value_counts().index
+    atualizado, removido, com_temporada_nova = int(jogadores[0]), int(jogadores[1]), int(jogadores[2])
+    alterada = liga.copy()
+    linhas_atualizadas = alterada.index[alterada['id_jogador'] == atualizado][:3]
+    alterada.loc[linhas_atualizadas, 'pontos'] += 10
+    temporada_removida = sorted(alterada.loc[alterada['id_jogador'] == removido, 'temporada'])[1]
+    alterada = alterada[~((alterada['id_jogador'] == removido) & (alterada['temporada'] == temporada_removida))]
+    nova = alterada[alterada['id_jogador'] == com_temporada_nova].tail(1).assign(temporada='2030-31')
+    alterada = pd.concat([alterada, nova], ignore_index=True)
+
+    metricas = carregar_para_mysql(alterada, engine, usar_infile=False, modo='incremental')
+
+    assert metricas['estatisticas'] == {'inseridas': 1, 'atualizadas': 3, 'removidas': 1, 'ignoradas': len(liga) - 4}
+    assert metricas['jogadores'] == {'inseridas': 0, 'atualizadas': 0, 'ignoradas': liga['id_jogador'].nunique()}
+    assert metricas['linhas'] == 5
+    assert metricas['versao_carga'] == 2
+    # Só os pares de temporadas em volta das linhas alteradas: 3 atualizadas (até 4 pares),
+    # 1 removida (o par que passa a ligar as vizinhas), 1 nova (o par com a anterior).
+    assert 0 < metricas['evolucao_temporada'] <= 6
+    _assert_publicado(engine, alterada)
+
+    repetida = carregar_para_mysql(alterada, engine, usar_infile=False, modo='incremental')
+    assert repetida['linhas'] == 0
+    assert repetida['estatisticas']['ignoradas'] == len(alterada)
+    assert repetida['versao_carga'] is None
+    assert _versao(engine) == 2
+
+@pytest.mark.parametrize('modo', ['troca', 'substituir', 'incremental'])
+def test_carga_com_percentuais_nulos(engine, liga_historica, modo):
+    sem_3pts = int(liga_historica['perc_arremessos_3pts'].isna().sum())
+    assert sem_3pts > 0
+
+    metricas = carregar_para_mysql(liga_historica, engine, usar_infile=False, modo=modo)
+
+    assert metricas['versao_carga'] == 1
+    _assert_publicado(engine, liga_historica)
+    with engine.connect() as conn:
+        estatisticas = pd.read_sql("SELECT * FROM estatisticas_temporada", conn)
+    assert int(estatisticas['perc_arremessos_3pts'].isna().sum()) == sem_3pts
+    assert estatisticas['perc_arremessos_quadra'].notna().all()
+    # Quem não tem percentual fica fora do ranking, em vez de aparecer com 0.
+    assert top_n(estatisticas, 'perc_arremessos_3pts', len(estatisticas))['perc_arremessos_3pts'].notna().all()
+
+    # Nulo no banco e NaN no DataFrame têm o mesmo hash: nada muda numa nova carga incremental.
+    repetida = carregar_para_mysql(liga_historica, engine, usar_infile=False, modo='incremental')
+    assert repetida['linhas'] == 0
+
+def test_modo_desconhecido(engine, liga):
+    with pytest.raises(ValueError):
+        carregar_para_mysql(liga, engine, usar_infile=False, modo='apagar')
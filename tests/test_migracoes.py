@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text, MetaData, UniqueConstraint
+
+from dashboard.db_setup import Base, EstatisticaTemporada
+from dashboard.migracoes import aplicar_migracoes, verificar_uso_de_indices
+
+# %%
+
+COLUNAS_PERCENTUAIS = ['perc_arremessos_quadra', 'perc_arremessos_3pts', 'perc_lances_livres']
+
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'nba.db'}")
+
+def _esquema_antigo(engine):
+    """Cria as tabelas como eram antes dos percentuais aceitarem NULL, com uma linha de estatística."""
+    metadata = MetaData()
+    for tabela in Base.metadata.sorted_tables:
+        tabela.to_metadata(metadata)
+    for coluna in COLUNAS_PERCENTUAIS:
+        metadata.tables[EstatisticaTemporada.__tablename__].c[coluna].nullable = False
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO jogadores VALUES (1, 'Jogador')"))
+        conn.execute(text(
+            "INSERT INTO estatisticas_temporada (id_jogador, temporada, id_time, sigla_time, jogos_jogados, pontos, assistencias, rebotes, "
+            "perc_arremessos_quadra, perc_arremessos_3pts, perc_lances_livres) VALUES (1, '1985-86', 10, 'BOS', 80, 2000, 300, 500, 0.5, 0.3, 0.8)"
+        ))
+
+def _esquema_sem_indices(engine):
+    """Cria as tabelas sem as chaves únicas e os índices declarados nos modelos, como num banco anterior a eles."""
+    metadata = MetaData()
+    for tabela in Base.metadata.sorted_tables:
+        copia = tabela.to_metadata(metadata)
+        copia.indexes.clear()
+        copia.constraints = {restricao for restricao in copia.constraints if not isinstance(restricao, UniqueConstraint)}
+    metadata.create_all(engine)
+
+def _nulidade(engine):
+    colunas = inspect(engine).get_columns(EstatisticaTemporada.__tablename__)
+    return {coluna['name']: coluna['nullable'] for coluna in colunas if coluna['name'] in COLUNAS_PERCENTUAIS}
+
+# %%
+
+def test_migracao_libera_nulos_nos_percentuais_mantendo_dados_e_indices(engine):
+    _esquema_antigo(engine)
+    assert not any(_nulidade(engine).values())
+
+    criados = aplicar_migracoes(engine)
+
+    assert [f"{EstatisticaTemporada.__tablename__}.{coluna} NULL" for coluna in COLUNAS_PERCENTUAIS] == criados[:3]
+    assert all(_nulidade(engine).values())
+    indices = {indice['name'] for indice in inspect(engine).get_indexes(EstatisticaTemporada.__tablename__)}
+    assert indices == {indice.name for indice in EstatisticaTemporada.__table__.indexes}
+    with engine.begin() as conn:
+        assert conn.execute(text("SELECT pontos, perc_arremessos_3pts FROM estatisticas_temporada")).fetchall() == [(2000, 0.3)]
+        conn.execute(text(
+            "INSERT INTO estatisticas_temporada (id_jogador, temporada, id_time, jogos_jogados, pontos, assistencias, rebotes) "
+            "VALUES (1, '1975-76', 10, 70, 1500, 200, 400)"
+        ))
+    assert aplicar_migracoes(engine) == []
+
+def test_migracao_cria_indices_que_faltam_uma_unica_vez(engine):
+    _esquema_sem_indices(engine)
+    assert 'get_seasonal_player_stats' in verificar_uso_de_indices(engine, temporada='2023-24')
+
+    criados = aplicar_migracoes(engine)
+
+    esperados = {indice.name for tabela in Base.metadata.sorted_tables for indice in tabela.indexes}
+    esperados |= {
+        restricao.name for tabela in Base.metadata.sorted_tables
+        for restricao in tabela.constraints if isinstance(restricao, UniqueConstraint)
+    }
+    assert sorted(criados) == sorted(esperados)
+    assert aplicar_migracoes(engine) == []
+    assert verificar_uso_de_indices(engine, temporada='2023-24') == {}
@@ -0,0 +1,19 @@
+import json
+from argparse import Namespace
+
+import etl.pipeline as pipeline
+
+# %%
+
+def test_resumo_sem_medida_de_pico_de_memoria(tmp_path, monkeypatch, capsys):
+    # Sem /proc e sem o módulo resource (Windows) não há pico de RSS; o resumo mostra '-' em vez de quebrar.
+    monkeypatch.setattr(pipeline, '_pico_rss_mb', lambda: None)
+    monkeypatch.setitem(pipeline.ETAPAS, 'transformacao', lambda opcoes: {'linhas_entrada': 10, 'linhas_saida': 8})
+    arquivo = tmp_path / 'pipeline.jsonl'
+
+    registros = pipeline.executar_pipeline(['transformacao'], Namespace(), arquivo_metricas=arquivo)
+
+    assert [r['status'] for r in registros] == ['ok']
+    assert json.loads(arquivo.read_text(encoding='utf-8'))['pico_rss_mb'] is None
+    linha = [l for l in capsys.readouterr().out.splitlines() if l.startswith('transformacao')][-1]
+    assert linha.split()[4:] == ['-', '10', '8', '0']
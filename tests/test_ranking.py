@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from dashboard import analitico, dados
+from dashboard.ranking import MINIMO_JOGOS_POR_COLUNA, top_n
+from etl.endpoint_simulado import gerar_liga_sintetica, obter_jogadores_simulados, obter_jogadores_historicos_simulados
+from etl.load import carregar_para_mysql
+from etl.materializacao import METRICAS_POR_JOGO, TOP_N_AGREGADOS
+from etl.transform import transformar_dados_evolucao_jogador
+
+# %%
+
+@pytest.fixture
+def banco(tmp_path, servir_dashboard):
+    """Liga com muitos empates (médias inteiras, percentuais com uma casa) gravada fora da ordem de id_jogador."""
+    jogadores = obter_jogadores_historicos_simulados(60) + obter_jogadores_simulados(60)
+    df = transformar_dados_evolucao_jogador(gerar_liga_sintetica(jogadores=jogadores), verboso=False)
+    df['temporada'] = df['temporada'].astype(str)
+    jogos = df['jogos_jogados'].astype('int64').clip(lower=1)
+    for coluna in ('pontos', 'assistencias', 'rebotes'):
+        df[coluna] = (df[coluna] // jogos) * jogos
+    for coluna in ('perc_arremessos_quadra', 'perc_arremessos_3pts', 'perc_lances_livres'):
+        df[coluna] = df[coluna].round(1)
+    engine = create_engine(f"sqlite:///{tmp_path / 'nba.db'}")
+    carregar_para_mysql(df.sample(frac=1, random_state=7), engine, modo='substituir')
+    return servir_dashboard(engine)
+
+def _esperado(banco, temporada, coluna, n):
+    """nlargest sobre a temporada em ordem de id_jogador: empates ficam com o menor id."""
+    with banco.connect() as conn:
+        df = pd.read_sql(
+            "SELECT * FROM estatisticas_temporada WHERE temporada = :temporada AND jogos_jogados > 0 ORDER BY id_jogador",
+            conn, params={'temporada': temporada}
+        )
+    for metrica, contagem in METRICAS_POR_JOGO.items():
+        df[metrica] = df[contagem] / df['jogos_jogados']
+    df[dados.COLUNAS_PERCENTUAIS] = df[dados.COLUNAS_PERCENTUAIS].astype('float32') # Como em dados._medias_por_jogo
+    return top_n(df, coluna, n)['id_jogador'].tolist()
+
+# %%
+
+@pytest.mark.parametrize('coluna', list(MINIMO_JOGOS_POR_COLUNA))
+def test_ranking_pre_calculado_igual_a_nlargest_com_desempate_por_id(banco, coluna):
+    empates = 0
+    for temporada in analitico.temporadas():
+        fatia = analitico.estatisticas_temporada(temporada)
+        for n in (TOP_N_AGREGADOS, len(fatia)):
+            ids = analitico.top_jogadores(temporada, coluna, n)['id_jogador'].tolist()
+            assert ids == _esperado(banco, temporada, coluna, n)
+        empates += fatia[coluna].dropna().duplicated().sum()
+    assert empates # Sem empates o desempate não estaria sendo testado
+
+@pytest.mark.parametrize('coluna', list(METRICAS_POR_JOGO))
+def test_top_n_guardado_nos_agregados_igual_a_nlargest(banco, coluna):
+    for temporada in dados.temporadas():
+        ids = dados.top_jogadores(temporada, coluna, TOP_N_AGREGADOS)['id_jogador'].tolist()
+        assert ids == _esperado(banco, temporada, coluna, TOP_N_AGREGADOS)
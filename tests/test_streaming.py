@@ -0,0 +1,32 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from etl.endpoint_simulado import gerar_carreira_sintetica, obter_jogadores_simulados, obter_jogadores_historicos_simulados
+from etl.streaming import executar_pipeline_streaming
+
+# %%
+
+@pytest.mark.parametrize('modo', ['troca', 'substituir', 'incremental'])
+def test_streaming_historico_carrega_temporadas_sem_3_pontos(tmp_path, endpoint_roteirizado, modo):
+    # Como --historicos: lotes de carreiras anteriores a 1979-80, com FG3_PCT nulo, e lotes mistos.
+    jogadores = obter_jogadores_historicos_simulados(12) + obter_jogadores_simulados(4)
+    engine = create_engine(f"sqlite:///{tmp_path / 'nba.db'}")
+
+    metricas = executar_pipeline_streaming(
+        jogadores, jogadores_por_lote=4, modo=modo, engine_destino=engine,
+        endpoint=endpoint_roteirizado(), max_em_voo=4, requisicoes_por_segundo=1e6
+    )
+
+    assert metricas['extracao']['falhas'] == 0
+    assert metricas['carga']['lotes'] == 4
+    assert metricas['carga']['versao_carga'] is not None
+    with engine.connect() as conn:
+        estatisticas = pd.read_sql("SELECT temporada, perc_arremessos_3pts FROM estatisticas_temporada", conn)
+    assert len(estatisticas) == metricas['transformacao']['linhas_saida']
+    assert sorted(estatisticas['temporada'].unique()) == sorted(
+        pd.concat([gerar_carreira_sintetica(jogador['id']) for jogador in jogadores])['SEASON_ID'].unique()
+    )
+    anteriores = estatisticas['temporada'] < '1979-80'
+    assert anteriores.any()
+    assert estatisticas['perc_arremessos_3pts'].isna().equals(anteriores)
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl.endpoint_simulado import gerar_liga_sintetica, obter_jogadores_simulados, obter_jogadores_historicos_simulados, ANO_LINHA_3PTS
+from etl.staging import salvar_staging
+from etl.transform import carregar_dados_brutos, transformar_dados_evolucao_jogador, transformar_em_paralelo, TIPOS_TRANSFORMADOS
+
+# %%
+
+def _bruto(linhas):
+    colunas = ['PLAYER_ID', 'PLAYER_NAME', 'SEASON_ID', 'TEAM_ID', 'TEAM_ABBREVIATION', 'GP', 'PTS', 'AST', 'REB', 'FG_PCT', 'FG3_PCT', 'FT_PCT']
+    return pd.DataFrame(linhas, columns=colunas)
+
+def test_transformacao_descarta_sem_time_zera_contagens_e_mantem_percentuais_nulos():
+    df = transformar_dados_evolucao_jogador(_bruto([
+        (1, 'A', '1975-76', 10, 'BOS', 70, 1200, None, 500, 0.48, None, 0.81),
+        (1, 'A', '1976-77', None, None, 60, 900, 100, 300, 0.45, None, 0.80),
+        (2, 'B', '1975-76', 0, 'TOT', 50, 700, 200, 250, None, None, None),
+        (2, 'B', '1975-76', 11, 'NYK', 20, 300, 80, 100, 0.40, None, 0.70),
+    ]), verboso=False)
+
+    assert df[['id_jogador', 'temporada', 'id_time']].astype(str).values.tolist() == [['1', '1975-76', '10'], ['2', '1975-76', '0']]
+    assert df['assistencias'].tolist() == [0, 200]
+    assert df['perc_arremessos_3pts'].isna().all()
+    assert np.isnan(df.loc[1, 'perc_arremessos_quadra']) and df.loc[0, 'perc_arremessos_quadra'] == np.float32(0.48)
+    assert {col: str(df[col].dtype) for col in TIPOS_TRANSFORMADOS} == TIPOS_TRANSFORMADOS
+
+def test_carreiras_historicas_so_tem_3_pontos_a_partir_de_1979_80():
+    df = transformar_dados_evolucao_jogador(gerar_liga_sintetica(jogadores=obter_jogadores_historicos_simulados(60)), verboso=False)
+    anos = df['temporada'].astype(str).str[:4].astype(int)
+
+    assert (anos < ANO_LINHA_3PTS).any() and (anos >= ANO_LINHA_3PTS).any()
+    assert df.loc[anos < ANO_LINHA_3PTS, 'perc_arremessos_3pts'].isna().all()
+    assert df.loc[anos >= ANO_LINHA_3PTS, 'perc_arremessos_3pts'].notna().all()
+    assert df[['perc_arremessos_quadra', 'perc_lances_livres', 'pontos']].notna().all().all()
+
+@pytest.mark.parametrize('formato', ['parquet', 'arrow', 'csv'])
+def test_transformacao_paralela_igual_a_serial(tmp_path, formato):
+    # Liga com trocas de time no meio da temporada (linhas TOT) e temporadas sem 3 pontos.
+    jogadores = obter_jogadores_historicos_simulados(40) + obter_jogadores_simulados(40)
+    caminho = tmp_path / 'dados_brutos'
+    salvar_staging(gerar_liga_sintetica(jogadores=jogadores), caminho, formato=formato, coluna_particao='SEASON_ID')
+
+    serial = transformar_dados_evolucao_jogador(carregar_dados_brutos(caminho), verboso=False)
+    serial = serial.sort_values(['id_jogador', 'temporada'], kind='stable').reset_index(drop=True)
+    for workers in (1, 3):
+        paralelo = transformar_em_paralelo(caminho, workers)
+        assert paralelo.attrs['metricas']['linhas_entrada'] == serial.attrs['metricas']['linhas_entrada']
+        # A ordem interna das categorias pode diferir (o paralelo reaplica os tipos depois do concat); os valores não.
+        pd.testing.assert_frame_equal(paralelo, serial, check_categorical=False)
+        categoricas = [col for col, tipo in TIPOS_TRANSFORMADOS.items() if tipo == 'category']
+        assert paralelo[categoricas].astype(str).equals(serial[categoricas].astype(str))